@@ -7,12 +7,54 @@ class Settings(BaseSettings):
     app_name: str = "Strym API"
     debug: bool = False
 
+    # Workers (uvicorn --workers reads the same variable)
+    web_concurrency: int = 1
+
     # Database
     database_url: str
-    database_pool_size: int = 20
+    database_pool_size: int = 20  # total for this instance, divided across workers
+
+    # Stats
+    stats_use_rollups: bool = True  # read from continuous aggregates (002 migration)
+
+    # Cardinality (HyperLogLog)
+    cardinality_retention_hours: int = 8 * 24
+
+    # Streaming
+    stream_queue_size: int = 1000  # outgoing frames buffered per connection
+    stream_send_timeout: float = 5.0  # seconds
+    stream_overflow_policy: str = "drop_oldest"  # drop_oldest | drop_newest | coalesce | disconnect
+    stream_pause_buffer_bytes: int = 1_048_576  # logs kept per paused subscription
+    stream_pause_total_bytes: int = 64 * 1_048_576  # across all paused subscriptions
+    stream_history_maxlen: int = 100_000  # recent logs kept for resuming (approximate)
+    stream_backfill_max_logs: int = 10_000  # per resumed subscription
+    stream_backfill_concurrency: int = 4  # backfills running at once per process
+    stream_channel_shards: int = 64  # pub/sub channels logs are spread over (same on all instances)
 
-    # Redis
+    # Rate limiting ("requests/seconds"); routes are "METHOD /path" with their own bucket
+    rate_limit_per_ip: str = "100/60"
+    rate_limit_per_key: str = "6000/60"  # per client IP, for requests sending the API key
+    rate_limit_routes: dict[str, str] = {}
+    rate_limit_local_precheck: bool = True  # admit clients far below their limit without Redis
+
+    # Access log (JSON lines on stdout, written off the request path)
+    access_log_enabled: bool = True
+    access_log_sample_rate: float = 1.0  # share of 2xx/3xx requests logged; errors always are
+
+    # Slow query log (per process, see /admin/slow-queries)
+    slow_query_log_enabled: bool = False
+    slow_query_threshold_ms: float = 200.0
+    slow_query_explain_sample_rate: float = 0.1  # share of slow reads re-run under EXPLAIN ANALYZE
+
+    # Redis (one client and pool per worker process, shared by all services)
     redis_url: str
+    redis_pool_size: int = 32  # per worker; pub/sub holds one connection
+    redis_pool_timeout: float = 5.0  # seconds to wait for a free connection
+
+    # Cache
+    cache_codec: str = "json"  # json | marshal (same Python on every instance only)
+    cache_compress_threshold: int = 4096  # bytes, 0 disables compression
+    cache_max_entry_bytes: int = 1_048_576  # larger results are not cached, 0 = no limit
 
     # Auth
     api_key: str
@@ -0,0 +1,121 @@
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import TextIO
+
+from app.config import get_settings
+
+logger = logging.getLogger("strym.requests")
+logger.propagate = False
+logger.addHandler(logging.NullHandler())
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; access fields come from record.access."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+        }
+        access = getattr(record, "access", None)
+        if access:
+            entry.update(access)
+        else:
+            entry["message"] = record.getMessage()
+        return json.dumps(entry)
+
+
+class AccessLog:
+    """
+    Non-blocking structured access log.
+
+    Requests only build a LogRecord and put it on an in-memory queue; a
+    QueueListener thread formats it as JSON and writes it out. Successful
+    requests can be sampled; 4xx/5xx responses are always logged.
+    """
+
+    QUEUE_SIZE = 10_000  # records waiting for the writer thread; extra are dropped
+
+    def __init__(self):
+        self._listener: QueueListener | None = None
+        self._handler: QueueHandler | None = None
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.dropped = 0
+
+    def init(self, stream: TextIO | None = None) -> None:
+        """Start the writer thread."""
+        settings = get_settings()
+        self.enabled = settings.access_log_enabled
+        self.sample_rate = settings.access_log_sample_rate
+        if not self.enabled:
+            return
+
+        records: queue.Queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter())
+        self._listener = QueueListener(records, output, respect_handler_level=False)
+        self._handler = _DroppingQueueHandler(records, self)
+        logger.addHandler(self._handler)
+        logger.setLevel(logging.INFO)
+        self._listener.start()
+        print(f"Access log initialized (sample rate: {self.sample_rate})")
+
+    def close(self) -> None:
+        """Flush queued records and stop the writer thread."""
+        if self._handler:
+            logger.removeHandler(self._handler)
+            self._handler = None
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+        self.enabled = False
+
+    def log(self, method: str, path: str, status: int, duration_ms: float, client_ip: str) -> None:
+        """Record one request (sampled when successful)."""
+        if not self.enabled:
+            return
+        if status < 400 and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        if status >= 500:
+            level = logging.ERROR
+        elif status >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+
+        logger.log(level, "request", extra={"access": {
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": duration_ms,
+            "client_ip": client_ip,
+        }})
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when full."""
+
+    def __init__(self, records: queue.Queue, access_log: AccessLog):
+        super().__init__(records)
+        self._access_log = access_log
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._access_log.dropped += 1
+
+
+# Global instance
+access_log = AccessLog()
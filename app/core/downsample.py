@@ -0,0 +1,45 @@
+def lttb_indices(values: list[float], threshold: int) -> list[int]:
+    """
+    Select indices with Largest-Triangle-Three-Buckets downsampling.
+
+    Points are assumed to be evenly spaced (regular time buckets), so the
+    index doubles as the x coordinate. First and last points are kept.
+    """
+    size = len(values)
+    if threshold >= size:
+        return list(range(size))
+    if threshold < 3:
+        return [0, size - 1][:threshold]
+
+    selected = [0]
+    bucket_size = (size - 2) / (threshold - 2)
+    anchor = 0
+
+    for i in range(threshold - 2):
+        bucket_start = int(i * bucket_size) + 1
+        bucket_end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third triangle vertex
+        next_start = bucket_end
+        next_end = min(int((i + 2) * bucket_size) + 1, size)
+        if next_start >= next_end:
+            avg_x, avg_y = size - 1, values[-1]
+        else:
+            avg_x = (next_start + next_end - 1) / 2
+            avg_y = sum(values[next_start:next_end]) / (next_end - next_start)
+
+        anchor_y = values[anchor]
+        best, best_area = bucket_start, -1.0
+        for j in range(bucket_start, bucket_end):
+            area = abs(
+                (anchor - avg_x) * (values[j] - anchor_y)
+                - (anchor - j) * (avg_y - anchor_y)
+            )
+            if area > best_area:
+                best, best_area = j, area
+
+        selected.append(best)
+        anchor = best
+
+    selected.append(size - 1)
+    return selected
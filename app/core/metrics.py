@@ -0,0 +1,246 @@
+import math
+from bisect import bisect_left
+from typing import Iterable
+
+# Seconds; request and query latencies
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; in-process fan-out is usually well below a millisecond
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """A named metric family with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+    def dump(self) -> dict:
+        """JSON-safe state, for merging with other processes (see merge())."""
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "documentation": self.documentation,
+            "labels": list(self.labels),
+        }
+
+    def absorb(self, data: dict) -> None:
+        """Add another process's dump of this metric."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic count; inc() is a single dict update."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+            for key, value in self.values.items()
+        ]
+
+    def dump(self) -> dict:
+        return {**super().dump(), "values": [[list(k), v] for k, v in self.values.items()]}
+
+    def absorb(self, data: dict) -> None:
+        for key, value in data["values"]:
+            self.inc(*key, amount=value)
+
+
+class Gauge(Metric):
+    """Point-in-time value, set by its owner or at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple, float] = {}
+
+    def set(self, value: float, *label_values) -> None:
+        self.values[label_values] = value
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+            for key, value in self.values.items()
+        ]
+
+    def dump(self) -> dict:
+        return {**super().dump(), "values": [[list(k), v] for k, v in self.values.items()]}
+
+    def absorb(self, data: dict) -> None:
+        # Gauges of different workers (pool size, connections) add up
+        for key, value in data["values"]:
+            key = tuple(key)
+            self.values[key] = self.values.get(key, 0) + value
+
+
+class Histogram(Metric):
+    """
+    Fixed-bucket histogram.
+
+    observe() bisects into per-bucket (non-cumulative) counts; buckets are
+    only accumulated when rendering, so the hot path stays O(log buckets).
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: dict[tuple, list] = {}  # labels -> [bucket counts (+Inf last), sum]
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for key, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = _labels(self.labels, key, f'le="{_number(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def dump(self) -> dict:
+        return {
+            **super().dump(),
+            "buckets": list(self.buckets),
+            "series": [[list(k), counts, total] for k, (counts, total) in self.series.items()],
+        }
+
+    def absorb(self, data: dict) -> None:
+        for key, counts, total in data["series"]:
+            key = tuple(key)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0] = [a + b for a, b in zip(series[0], counts)]
+            series[1] += total
+
+
+def merge(dumps: Iterable[list[dict]]) -> list[Metric]:
+    """Sum metric dumps from several processes, by name, in first-seen order."""
+    merged: dict[str, Metric] = {}
+    for dump in dumps:
+        for data in dump:
+            metric = merged.get(data["name"])
+            if metric is None:
+                kind = _KINDS[data["kind"]]
+                if kind is Histogram:
+                    metric = Histogram(
+                        data["name"], data["documentation"], data["labels"], tuple(data["buckets"]),
+                    )
+                else:
+                    metric = kind(data["name"], data["documentation"], data["labels"])
+                merged[data["name"]] = metric
+            metric.absorb(data)
+    return list(merged.values())
+
+
+def render(metrics: Iterable[Metric]) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.header())
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+_KINDS: dict[str, type[Metric]] = {
+    Counter.kind: Counter,
+    Gauge.kind: Gauge,
+    Histogram.kind: Histogram,
+}
+
+# Hot-path metrics, updated in process as events happen. Everything else
+# (pool, cache, rate limiter, stream state) is read from its owner at scrape.
+HTTP_REQUEST_DURATION = Histogram(
+    "strym_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    labels=("method", "route", "status"),
+)
+DB_POOL_ACQUIRE = Histogram(
+    "strym_db_pool_acquire_seconds",
+    "Time spent waiting for a database pool connection.",
+    buckets=FAST_BUCKETS + (0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_CONNECTION_HOLD = Histogram(
+    "strym_db_connection_hold_seconds",
+    "Time a database pool connection stays checked out.",
+    buckets=FAST_BUCKETS + (0.25, 0.5, 1.0, 2.5, 5.0),
+)
+STREAM_FANOUT = Histogram(
+    "strym_stream_fanout_seconds",
+    "Time to match and queue one log for local stream subscriptions.",
+    buckets=FAST_BUCKETS,
+)
+STREAM_PUBSUB_LAG = Histogram(
+    "strym_stream_pubsub_lag_seconds",
+    "Delay between publishing a log to Redis and receiving it here.",
+)
+INGEST_ROWS = Counter(
+    "strym_ingest_rows_total",
+    "Log rows ingested, by outcome.",
+    labels=("outcome",),
+)
+
+HOT_PATH_METRICS = (
+    HTTP_REQUEST_DURATION,
+    DB_POOL_ACQUIRE,
+    DB_CONNECTION_HOLD,
+    STREAM_FANOUT,
+    STREAM_PUBSUB_LAG,
+    INGEST_ROWS,
+)
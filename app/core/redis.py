@@ -0,0 +1,37 @@
+import redis.asyncio as redis
+
+from app.config import get_settings
+
+_client: redis.Redis | None = None
+
+
+async def init_redis() -> None:
+    """Create the process-wide Redis client (one bounded connection pool)."""
+    global _client
+    settings = get_settings()
+
+    # Blocking pool: when every connection is busy, callers wait for one
+    # instead of opening more or failing with "Too many connections"
+    pool = redis.BlockingConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_pool_size,
+        timeout=settings.redis_pool_timeout,
+    )
+    _client = redis.Redis(connection_pool=pool)
+    print(f"Redis pool created (size: {settings.redis_pool_size})")
+
+
+async def close_redis() -> None:
+    """Close the Redis client and its pool."""
+    global _client
+    if _client:
+        await _client.aclose()
+        _client = None
+        print("Redis pool closed")
+
+
+def get_redis() -> redis.Redis:
+    """Get the shared Redis client."""
+    if _client is None:
+        raise RuntimeError("Redis not initialized")
+    return _client
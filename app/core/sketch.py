@@ -0,0 +1,83 @@
+import math
+import struct
+
+_HEADER = struct.Struct("<dQI")
+_BIN = struct.Struct("<iQ")
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Values are mapped to logarithmic bins, so two sketches with the same
+    accuracy merge exactly by adding bin counts. Only non-negative values
+    are supported; zero is tracked separately.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Add value (count times)."""
+        if count <= 0:
+            return
+        if value <= 0:
+            self.zero_count += count
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + count
+
+    def merge(self, other: "DDSketch") -> None:
+        """Merge another sketch into this one."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """Get approximate value at quantile q (0..1)."""
+        total = self.count
+        if total == 0:
+            return 0.0
+
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a compact binary form."""
+        parts = [_HEADER.pack(self.relative_accuracy, self.zero_count, len(self.bins))]
+        parts.extend(_BIN.pack(key, count) for key, count in self.bins.items())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        """Deserialize sketch produced by to_bytes."""
+        accuracy, zero_count, num_bins = _HEADER.unpack_from(data)
+        sketch = cls(accuracy)
+        sketch.zero_count = zero_count
+        offset = _HEADER.size
+        for _ in range(num_bins):
+            key, count = _BIN.unpack_from(data, offset)
+            sketch.bins[key] = count
+            offset += _BIN.size
+        return sketch
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import random
+import re
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any
+
+from app.config import get_settings
+from app.db.connection import get_connection
+
+_WHITESPACE = re.compile(r"\s+")
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_CHUNK_SCHEMA = "_timescaledb_internal"
+
+
+@dataclass
+class SlowQuery:
+    """One query that ran over the threshold."""
+    repository: str
+    sql: str
+    params: list[Any]
+    duration_ms: float
+    rows: int | None
+    error: str | None = None
+    recorded_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    explain: dict | None = None
+    explain_error: str | None = None
+
+
+def _redact(value: Any) -> Any:
+    """Keep values that show the query's shape (numbers, times); hide text."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _row_count(result: Any) -> int | None:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, str):
+        # Command status, e.g. "INSERT 0 1" / "UPDATE 3"
+        tail = result.rsplit(" ", 1)[-1]
+        return int(tail) if tail.isdigit() else None
+    return 0 if result is None else 1
+
+
+def summarize_plan(explain: dict) -> dict:
+    """Pull timings, buffers, scanned relations and chunks out of an EXPLAIN JSON plan."""
+    relations: list[str] = []
+    chunks: list[str] = []
+    seq_scans: list[str] = []
+    chunks_excluded = 0
+
+    def walk(node: dict) -> None:
+        nonlocal chunks_excluded
+        name = node.get("Relation Name")
+        if name:
+            qualified = f"{node.get('Schema', 'public')}.{name}"
+            if node.get("Schema") == _CHUNK_SCHEMA or name.endswith("_chunk"):
+                chunks.append(qualified)
+            elif qualified not in relations:
+                relations.append(qualified)
+            if node.get("Node Type") == "Seq Scan":
+                seq_scans.append(qualified)
+        # ChunkAppend reports chunks pruned at executor startup/runtime
+        chunks_excluded += node.get("Chunks excluded during startup", 0)
+        chunks_excluded += node.get("Chunks excluded during runtime", 0)
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    plan = explain["Plan"]
+    walk(plan)
+    return {
+        "planning_ms": explain.get("Planning Time"),
+        "execution_ms": explain.get("Execution Time"),
+        "shared_hit_blocks": plan.get("Shared Hit Blocks"),
+        "shared_read_blocks": plan.get("Shared Read Blocks"),
+        "relations": relations,
+        "chunks_scanned": len(chunks),
+        "chunks": chunks,
+        "chunks_excluded": chunks_excluded,
+        "seq_scans": seq_scans,
+        "plan": plan,
+    }
+
+
+class SlowQueryLog:
+    """
+    Opt-in log of repository queries slower than a threshold.
+
+    Recorded per process in a bounded in-memory list with the SQL shape,
+    redacted parameters, duration and row count. A sampled share of slow
+    read queries is re-run under EXPLAIN (ANALYZE, BUFFERS) in the
+    background, on its own connection inside a read-only transaction,
+    to show the plan and which hypertable chunks it touched.
+    """
+
+    MAX_ENTRIES = 200
+    MAX_EXPLAINS = 1  # EXPLAIN ANALYZE re-runs the query; never more than this at once
+    EXPLAIN_TIMEOUT_MS = 30_000
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold_ms = 0.0
+        self.explain_sample_rate = 0.0
+        self.entries: deque[SlowQuery] = deque(maxlen=self.MAX_ENTRIES)
+        self._explains: set[asyncio.Task] = set()
+        self.slow_total = 0
+        self.explained_total = 0
+
+    def init(self) -> None:
+        """Load settings."""
+        settings = get_settings()
+        self.enabled = settings.slow_query_log_enabled
+        self.threshold_ms = settings.slow_query_threshold_ms
+        self.explain_sample_rate = settings.slow_query_explain_sample_rate
+        if self.enabled:
+            print(
+                f"Slow query log enabled (threshold: {self.threshold_ms}ms, "
+                f"explain sample rate: {self.explain_sample_rate})"
+            )
+
+    async def close(self) -> None:
+        """Cancel running EXPLAINs."""
+        for task in list(self._explains):
+            task.cancel()
+        if self._explains:
+            await asyncio.gather(*self._explains, return_exceptions=True)
+        self.enabled = False
+
+    def record(
+        self,
+        repository: str,
+        sql: str,
+        args: tuple,
+        duration_ms: float,
+        result: Any,
+        error: BaseException | None = None,
+    ) -> None:
+        """Keep the query if it ran over the threshold; maybe schedule an EXPLAIN."""
+        if duration_ms < self.threshold_ms:
+            return
+
+        entry = SlowQuery(
+            repository=repository,
+            sql=_WHITESPACE.sub(" ", sql).strip(),
+            params=[_redact(arg) for arg in args],
+            duration_ms=round(duration_ms, 2),
+            rows=None if error else _row_count(result),
+            error=f"{type(error).__name__}: {error}" if error else None,
+        )
+        self.entries.append(entry)
+        self.slow_total += 1
+
+        # A failed query (e.g. statement timeout) would likely fail again under EXPLAIN
+        if (
+            error is None
+            and _READ_ONLY.match(sql)
+            and len(self._explains) < self.MAX_EXPLAINS
+            and random.random() < self.explain_sample_rate
+        ):
+            task = asyncio.create_task(self._explain(entry, sql, args))
+            self._explains.add(task)
+            task.add_done_callback(self._explains.discard)
+
+    async def _explain(self, entry: SlowQuery, sql: str, args: tuple) -> None:
+        try:
+            async with get_connection() as conn, conn.transaction(readonly=True):
+                await conn.execute(f"SET LOCAL statement_timeout = {self.EXPLAIN_TIMEOUT_MS}")
+                raw = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *args)
+            explain = json.loads(raw) if isinstance(raw, str) else raw
+            entry.explain = summarize_plan(explain[0])
+            self.explained_total += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            entry.explain_error = str(e)
+
+    def get_entries(self, limit: int | None = None) -> list[dict]:
+        """Recorded slow queries, newest first."""
+        entries = list(reversed(self.entries))[:limit]
+        return [asdict(entry) for entry in entries]
+
+    def clear(self) -> int:
+        """Forget recorded queries; returns how many there were."""
+        count = len(self.entries)
+        self.entries.clear()
+        return count
+
+    def get_stats(self) -> dict:
+        """Get settings and counters for this process."""
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "slow_total": self.slow_total,
+            "explained_total": self.explained_total,
+            "explains_running": len(self._explains),
+        }
+
+
+# Global instance
+slow_query_log = SlowQueryLog()
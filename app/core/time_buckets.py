@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Default origin of time_bucket()/time_bucket_gapfill() (a Monday, whole days after the epoch)
+BUCKET_ORIGIN = datetime(2000, 1, 3, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """A pre-aggregated source with fixed, epoch-aligned bucket width."""
+    name: str
+    width: timedelta
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    Part of a time range answered by one source.
+    rollup=None means raw rows; rollup segments are half-open [start, end).
+    """
+    rollup: Rollup | None
+    start: datetime
+    end: datetime
+    end_inclusive: bool = False
+
+
+def as_utc(ts: datetime | None) -> datetime | None:
+    """Read a naive timestamp as UTC (as asyncpg does), so it compares with aware ones."""
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def floor_time(ts: datetime, width: timedelta) -> datetime:
+    """Align timestamp down to a multiple of width since the epoch."""
+    offset = (ts - EPOCH) // width
+    return EPOCH + offset * width
+
+
+def ceil_time(ts: datetime, width: timedelta) -> datetime:
+    """Align timestamp up to a multiple of width since the epoch."""
+    floored = floor_time(ts, width)
+    return floored if floored == ts else floored + width
+
+
+def plan_segments(
+    start: datetime,
+    end: datetime,
+    rollups: list[Rollup],
+) -> list[Segment]:
+    """
+    Split the inclusive range [start, end] into rollup and raw segments.
+
+    Rollups must be ordered coarsest first, and each width must be a
+    multiple of the next. Only buckets fully inside the range are read
+    from a rollup; the ragged edges fall through to finer rollups and
+    finally to raw rows, so totals match a raw scan exactly.
+    """
+    segments: list[Segment] = []
+    covered_start: datetime | None = None
+    covered_end: datetime | None = None
+
+    for rollup in rollups:
+        lo = ceil_time(start, rollup.width)
+        hi = floor_time(end, rollup.width)
+
+        if covered_start is None or covered_end is None:
+            if lo < hi:
+                segments.append(Segment(rollup, lo, hi))
+                covered_start, covered_end = lo, hi
+            continue
+
+        if lo < covered_start:
+            segments.append(Segment(rollup, lo, covered_start))
+            covered_start = lo
+        if covered_end < hi:
+            segments.append(Segment(rollup, covered_end, hi))
+            covered_end = hi
+
+    if covered_start is None or covered_end is None:
+        return [Segment(None, start, end, end_inclusive=True)]
+
+    if start < covered_start:
+        segments.append(Segment(None, start, covered_start))
+    segments.append(Segment(None, covered_end, end, end_inclusive=True))
+    return segments
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Candidate bucket widths when the server widens an interval, in seconds
+NICE_WIDTHS = [
+    1, 5, 10, 15, 30,
+    60, 120, 300, 600, 900, 1800,
+    3600, 7200, 10800, 21600, 43200,
+    86400, 2 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+]
+
+# Longest interval parse_interval accepts
+MAX_INTERVAL = timedelta(days=3650)
+
+
+def parse_interval(value: str) -> timedelta:
+    """Parse a compact interval such as '90s', '5m', '6h' or '1d'."""
+    unit = value[-1:]
+    amount = value[:-1]
+    if unit not in _UNITS or not amount.isdigit() or int(amount) <= 0:
+        raise ValueError(f"Invalid interval: {value}")
+    seconds = int(amount) * _UNITS[unit]
+    if seconds > MAX_INTERVAL.total_seconds():
+        raise ValueError(f"Interval too long (max {MAX_INTERVAL.days}d): {value}")
+    return timedelta(seconds=seconds)
+
+
+def format_interval(width: timedelta) -> str:
+    """Format a width as the largest whole unit ('300s' -> '5m')."""
+    seconds = int(width.total_seconds())
+    for unit in ("d", "h", "m"):
+        if seconds % _UNITS[unit] == 0:
+            return f"{seconds // _UNITS[unit]}{unit}"
+    return f"{seconds}s"
+
+
+def widen_interval(width: timedelta, start: datetime, end: datetime, max_points: int) -> timedelta:
+    """Get the smallest nice width >= width yielding at most max_points buckets."""
+    # One bucket of slack: the range rarely starts on a bucket boundary
+    needed = (end - start) / max(max_points - 1, 1)
+    if width >= needed:
+        return width
+
+    for seconds in NICE_WIDTHS:
+        candidate = timedelta(seconds=seconds)
+        if candidate >= needed and candidate >= width:
+            return candidate
+
+    days = -(-needed // timedelta(days=1))
+    return timedelta(days=days)
+
+
+def bucket_starts(start: datetime, end: datetime, width: timedelta) -> list[datetime]:
+    """Get time_bucket() starts covering the inclusive range [start, end]."""
+    current = BUCKET_ORIGIN + ((start - BUCKET_ORIGIN) // width) * width
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current += width
+    return starts
@@ -1,3 +1,4 @@
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -5,21 +6,37 @@ import asyncpg
 from asyncpg import Pool
 
 from app.config import get_settings
+from app.core.metrics import DB_CONNECTION_HOLD, DB_POOL_ACQUIRE
 
 _pool: Pool | None = None
 
 
 async def init_db() -> None:
-    """Initialize database connection pool."""
+    """Initialize database connection pool (this worker's share of the budget)."""
     global _pool
     settings = get_settings()
-    
+    max_size = worker_pool_size(settings.database_pool_size, settings.web_concurrency)
+
     _pool = await asyncpg.create_pool(
         dsn=settings.database_url,
-        min_size=5,
-        max_size=settings.database_pool_size,
+        min_size=min(5, max_size),
+        max_size=max_size,
+    )
+    print(
+        f"Database pool created (size: {max_size}, "
+        f"{settings.database_pool_size} across {settings.web_concurrency} workers)"
     )
-    print(f"Database pool created (size: {settings.database_pool_size})")
+
+
+def worker_pool_size(budget: int, workers: int) -> int:
+    """Split a connection budget evenly across worker processes (at least 2 each)."""
+    workers = max(1, workers)
+    if budget < 2 * workers:
+        raise RuntimeError(
+            f"DATABASE_POOL_SIZE={budget} is too small for {workers} workers "
+            f"(needs at least {2 * workers}); raise it or lower WEB_CONCURRENCY"
+        )
+    return budget // workers
 
 
 async def close_db() -> None:
@@ -42,5 +59,11 @@ def get_pool() -> Pool:
 async def get_connection() -> AsyncGenerator[asyncpg.Connection, None]:
     """Get a database connection from the pool."""
     pool = get_pool()
+    start = time.perf_counter()
     async with pool.acquire() as conn:
-        yield conn
\ No newline at end of file
+        acquired = time.perf_counter()
+        DB_POOL_ACQUIRE.observe(acquired - start)
+        try:
+            yield conn
+        finally:
+            DB_CONNECTION_HOLD.observe(time.perf_counter() - acquired)
@@ -0,0 +1,65 @@
+-- Per-minute rollup (by source_app and severity)
+CREATE MATERIALIZED VIEW IF NOT EXISTS logs_1m
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 minute', timestamp) AS bucket,
+    source_app,
+    severity,
+    COUNT(*) AS count
+FROM logs
+GROUP BY bucket, source_app, severity
+WITH NO DATA;
+
+-- Hourly rollup (hierarchical, built on logs_1m)
+CREATE MATERIALIZED VIEW IF NOT EXISTS logs_1h
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 hour', bucket) AS bucket,
+    source_app,
+    severity,
+    SUM(count)::BIGINT AS count
+FROM logs_1m
+GROUP BY 1, source_app, severity
+WITH NO DATA;
+
+-- Daily rollup (hierarchical, built on logs_1h)
+CREATE MATERIALIZED VIEW IF NOT EXISTS logs_1d
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 day', bucket) AS bucket,
+    source_app,
+    severity,
+    SUM(count)::BIGINT AS count
+FROM logs_1h
+GROUP BY 1, source_app, severity
+WITH NO DATA;
+
+-- Refresh policies (real-time aggregation covers the not-yet-materialized tail).
+-- start_offset stays below the shortest retention (1 day): refreshing a bucket
+-- whose raw rows were dropped or trimmed by apply_log_retention (005) would
+-- erase its counts. Late rows older than logs_1m's window are refreshed on
+-- ingest by RollupRefreshService, back to the shortest retention; /stats reports
+-- that limit as rollup_horizon.
+-- logs_1h/logs_1d read logs_1m, which only changes inside that window.
+SELECT add_continuous_aggregate_policy('logs_1m',
+    start_offset => INTERVAL '12 hours',
+    end_offset => INTERVAL '1 minute',
+    schedule_interval => INTERVAL '1 minute',
+    if_not_exists => TRUE);
+
+SELECT add_continuous_aggregate_policy('logs_1h',
+    start_offset => INTERVAL '2 days',
+    end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '10 minutes',
+    if_not_exists => TRUE);
+
+SELECT add_continuous_aggregate_policy('logs_1d',
+    start_offset => INTERVAL '7 days',
+    end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour',
+    if_not_exists => TRUE);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_logs_1m_source_bucket ON logs_1m (source_app, bucket DESC);
+CREATE INDEX IF NOT EXISTS idx_logs_1h_source_bucket ON logs_1h (source_app, bucket DESC);
+CREATE INDEX IF NOT EXISTS idx_logs_1d_source_bucket ON logs_1d (source_app, bucket DESC);
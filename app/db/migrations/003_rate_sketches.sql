@@ -0,0 +1,10 @@
+-- Per-second throughput sketches (DDSketch), folded per minute and per hour.
+-- source_app '*' holds the totals across all apps.
+CREATE TABLE IF NOT EXISTS log_rate_sketches (
+    source_app TEXT NOT NULL,
+    width_seconds INTEGER NOT NULL,
+    bucket TIMESTAMPTZ NOT NULL,
+    sketch BYTEA NOT NULL,
+
+    PRIMARY KEY (source_app, width_seconds, bucket)
+);
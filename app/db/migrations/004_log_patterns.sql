@@ -0,0 +1,20 @@
+-- Pattern fingerprint assigned at ingest (see PatternService)
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS pattern_id BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_logs_time_pattern ON logs (timestamp DESC, pattern_id)
+    WHERE pattern_id IS NOT NULL;
+
+-- Latest known template per pattern. Processes may mint different ids for
+-- one template; canonical_id points an id at the one it is counted as.
+CREATE TABLE IF NOT EXISTS log_patterns (
+    pattern_id BIGINT PRIMARY KEY,
+    template TEXT NOT NULL,
+    canonical_id BIGINT,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- PatternService polls for changes from other processes
+CREATE INDEX IF NOT EXISTS idx_log_patterns_updated ON log_patterns (updated_at);
+CREATE INDEX IF NOT EXISTS idx_log_patterns_canonical ON log_patterns (canonical_id)
+    WHERE canonical_id IS NOT NULL;
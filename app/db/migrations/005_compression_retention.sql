@@ -0,0 +1,74 @@
+-- Native compression: one segment per app, rows ordered by time within it.
+-- id is the tiebreak so lookups by id can skip batches on min/max metadata
+-- (and the primary key columns are covered).
+ALTER TABLE logs SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'source_app',
+    timescaledb.compress_orderby = 'timestamp DESC, id DESC'
+);
+
+SELECT add_compression_policy('logs',
+    compress_after => INTERVAL '7 days',
+    if_not_exists => TRUE);
+
+-- Retention in days per app; '*' is the default for apps without a row.
+-- Whole chunks are dropped past the longest retention (see StorageService);
+-- apps kept shorter than that are trimmed by apply_log_retention.
+-- retain_days >= 1 keeps both outside the rollup refresh windows (002),
+-- so /stats counts for dropped or trimmed ranges stay as materialized.
+CREATE TABLE IF NOT EXISTS log_retention (
+    source_app TEXT PRIMARY KEY,
+    retain_days INTEGER NOT NULL CHECK (retain_days > 0),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO log_retention (source_app, retain_days) VALUES ('*', 30)
+ON CONFLICT (source_app) DO NOTHING;
+
+SELECT add_retention_policy('logs',
+    drop_after => INTERVAL '30 days',
+    if_not_exists => TRUE);
+
+-- Delete rows of apps whose retention is shorter than the chunk horizon.
+-- segmentby source_app keeps deletes on compressed chunks to that app's
+-- segments; each app commits separately to keep transactions small.
+CREATE OR REPLACE PROCEDURE apply_log_retention(job_id INTEGER, config JSONB)
+LANGUAGE plpgsql AS $$
+DECLARE
+    default_days INTEGER;
+    horizon_days INTEGER;
+    app TEXT;
+    keep_days INTEGER;
+BEGIN
+    SELECT retain_days INTO default_days FROM log_retention WHERE source_app = '*';
+    SELECT MAX(retain_days) INTO horizon_days FROM log_retention;
+    IF default_days IS NULL THEN
+        RETURN;
+    END IF;
+
+    FOR app, keep_days IN
+        SELECT source_app, retain_days FROM log_retention
+        WHERE source_app <> '*' AND retain_days < horizon_days
+    LOOP
+        DELETE FROM logs
+        WHERE source_app = app
+          AND timestamp < NOW() - make_interval(days => keep_days)
+          AND timestamp >= NOW() - make_interval(days => horizon_days);
+        COMMIT;
+    END LOOP;
+
+    -- Apps on the default, when some app keeps chunks alive longer
+    IF default_days < horizon_days THEN
+        DELETE FROM logs
+        WHERE timestamp < NOW() - make_interval(days => default_days)
+          AND timestamp >= NOW() - make_interval(days => horizon_days)
+          AND source_app NOT IN (SELECT source_app FROM log_retention);
+        COMMIT;
+    END IF;
+END
+$$;
+
+SELECT add_job('apply_log_retention', INTERVAL '1 hour')
+WHERE NOT EXISTS (
+    SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'apply_log_retention'
+);
@@ -0,0 +1,3 @@
+-- Stream backfill reads gaps older than the recent-log stream by ingest
+-- time (see StreamHistory), keyset-paged on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_logs_created_id ON logs (created_at, id);
@@ -3,32 +3,41 @@ from typing import Annotated, AsyncGenerator
 from fastapi import Depends
 import asyncpg
 
-from app.db.connection import get_pool
+from app.config import get_settings
+from app.db.connection import get_connection
 from app.repositories.log_repository import LogRepository
+from app.repositories.rate_sketch_repository import RateSketchRepository
 from app.repositories.stats_repository import StatsRepository
+from app.repositories.storage_repository import StorageRepository
 from app.services.log_service import LogService
 from app.services.stats_service import StatsService
+from app.services.storage_service import StorageService
 
 
 async def get_db_connection() -> AsyncGenerator[asyncpg.Connection, None]:
-    """Get database connection from pool."""
-    pool = get_pool()
-    async with pool.acquire() as conn:
+    """Get a database connection held for the whole request."""
+    async with get_connection() as conn:
         yield conn
 
 
-async def get_log_repository(
-    conn: Annotated[asyncpg.Connection, Depends(get_db_connection)]
-) -> LogRepository:
-    """Get log repository instance."""
-    return LogRepository(conn)
+async def get_log_repository() -> LogRepository:
+    """Get log repository (connections are checked out per query)."""
+    return LogRepository()
 
 
-async def get_stats_repository(
-    conn: Annotated[asyncpg.Connection, Depends(get_db_connection)]
-) -> StatsRepository:
-    """Get stats repository instance."""
-    return StatsRepository(conn)
+async def get_stats_repository() -> StatsRepository:
+    """Get stats repository (connections are checked out per query)."""
+    return StatsRepository(use_rollups=get_settings().stats_use_rollups)
+
+
+async def get_rate_sketch_repository() -> RateSketchRepository:
+    """Get rate sketch repository (connections are checked out per query)."""
+    return RateSketchRepository()
+
+
+async def get_storage_repository() -> StorageRepository:
+    """Get storage repository (connections are checked out per query)."""
+    return StorageRepository()
 
 
 async def get_log_service(
@@ -39,10 +48,18 @@ async def get_log_service(
 
 
 async def get_stats_service(
-    repo: Annotated[StatsRepository, Depends(get_stats_repository)]
+    repo: Annotated[StatsRepository, Depends(get_stats_repository)],
+    sketch_repo: Annotated[RateSketchRepository, Depends(get_rate_sketch_repository)],
 ) -> StatsService:
     """Get stats service instance."""
-    return StatsService(repo)
+    return StatsService(repo, sketch_repo)
+
+
+async def get_storage_service(
+    repo: Annotated[StorageRepository, Depends(get_storage_repository)],
+) -> StorageService:
+    """Get storage service instance."""
+    return StorageService(repo)
 
 
 # Type aliases for cleaner signatures
@@ -50,4 +67,5 @@ DbConnection = Annotated[asyncpg.Connection, Depends(get_db_connection)]
 LogRepoDep = Annotated[LogRepository, Depends(get_log_repository)]
 LogServiceDep = Annotated[LogService, Depends(get_log_service)]
 StatsRepoDep = Annotated[StatsRepository, Depends(get_stats_repository)]
-StatsServiceDep = Annotated[StatsService, Depends(get_stats_service)]
\ No newline at end of file
+StatsServiceDep = Annotated[StatsService, Depends(get_stats_service)]
+StorageServiceDep = Annotated[StorageService, Depends(get_storage_service)]
\ No newline at end of file
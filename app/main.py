@@ -1,29 +1,54 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.config import get_settings
-from app.routers import health, ingestion, query, stats, stream
+from app.routers import admin, health, ingestion, metrics, query, stats, stream
+from app.core.access_log import access_log
 from app.core.exceptions import AppException, app_exception_handler
+from app.core.redis import close_redis, init_redis
+from app.core.slow_query_log import slow_query_log
 from app.db.connection import init_db, close_db
 from app.services.stream_service import stream_service
 from app.services.cache_service import cache_service
+from app.services.cardinality_service import cardinality_service
+from app.services.live_stats_service import live_stats_service
+from app.services.pattern_service import pattern_service
+from app.services.throughput_service import throughput_service
+from app.services.rate_limiter import rate_limiter
+from app.services.rollup_refresh_service import rollup_refresh_service
+from app.services.worker_stats_service import worker_stats_service
 from app.middleware import RateLimitMiddleware, RequestLoggingMiddleware
 
-# Global middleware instance for lifecycle management
-rate_limit_middleware = RateLimitMiddleware(app=None)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    access_log.init()
     await init_db()
+    await init_redis()
+    slow_query_log.init()
     await stream_service.init()
     await cache_service.init()
-    await rate_limit_middleware.init()
+    await throughput_service.init()
+    await live_stats_service.init()
+    await cardinality_service.init()
+    await pattern_service.init()
+    await rollup_refresh_service.init()
+    await rate_limiter.init()
+    await worker_stats_service.init()
     yield
     # Shutdown
-    await rate_limit_middleware.close()
+    await worker_stats_service.close()
+    await rate_limiter.close()
+    await rollup_refresh_service.close()
+    await pattern_service.close()
+    await cardinality_service.close()
+    await live_stats_service.close()
+    await throughput_service.close()
     await cache_service.close()
     await stream_service.close()
+    await slow_query_log.close()
+    await close_redis()
     await close_db()
+    access_log.close()
     print("Shutting down...")
 
 
@@ -38,13 +63,15 @@ def create_app() -> FastAPI:
     
     # Add middleware (order matters - first added = outermost)
     app.add_middleware(RequestLoggingMiddleware)
-    app.add_middleware(RateLimitMiddleware, redis_client=None)
+    app.add_middleware(RateLimitMiddleware)
     
     app.include_router(health.router)
+    app.include_router(metrics.router)
     app.include_router(ingestion.router)
     app.include_router(query.router)
     app.include_router(stats.router)
     app.include_router(stream.router)
+    app.include_router(admin.router)
 
     app.add_exception_handler(AppException, app_exception_handler)
 
@@ -1,140 +1,114 @@
 import time
-import logging
-from datetime import datetime, timezone
-from typing import Callable
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-import redis.asyncio as redis
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.config import get_settings
+from app.core.access_log import access_log
+from app.core.metrics import HTTP_REQUEST_DURATION
+from app.services.rate_limiter import rate_limiter
 
-# Configure logger
-logger = logging.getLogger("strym.requests")
+# Health checks and metric scrapes are neither access logged nor rate limited
+_OPERATIONAL_PATHS = ("/health", "/metrics")
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RequestLoggingMiddleware:
     """
-    Middleware to log all HTTP requests.
+    ASGI middleware that logs all HTTP requests to the access log
+    and records their latency per route.
     Logs: method, path, status, duration, client IP
     """
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip logging for health checks
-        if request.url.path.startswith("/health"):
-            return await call_next(request)
-        
-        start_time = time.time()
-        client_ip = request.client.host if request.client else "unknown"
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration_ms = round((time.time() - start_time) * 1000, 2)
-        
-        # Log request
-        log_message = (
-            f"{request.method} {request.url.path} "
-            f"{response.status_code} {duration_ms}ms {client_ip}"
-        )
-        
-        # Use appropriate log level based on status
-        if response.status_code >= 500:
-            logger.error(log_message)
-        elif response.status_code >= 400:
-            logger.warning(log_message)
-        else:
-            logger.info(log_message)
-        
-        # Also print to console for development
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] {log_message}")
-        
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            # Label by route template so path parameters don't explode series
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                duration, scope["method"], getattr(route, "path", "unmatched"), status,
+            )
+            path = scope["path"]
+            if not path.startswith(_OPERATIONAL_PATHS):
+                access_log.log(scope["method"], path, status, round(duration * 1000, 2), _client_ip(scope))
+
+
+class RateLimitMiddleware:
     """
-    Redis-based rate limiting middleware.
-    Limits requests per IP address.
+    ASGI rate limiting middleware.
+    Limits requests per client IP (and API key) and route, via rate_limiter.
     """
-    
-    RATE_LIMIT = 100  # requests
-    WINDOW = 60  # seconds
-    PREFIX = "strym:ratelimit:"
-    
-    def __init__(self, app, redis_client: redis.Redis | None = None):
-        super().__init__(app)
-        self._redis = redis_client
-    
-    async def init(self) -> None:
-        """Initialize Redis connection."""
-        settings = get_settings()
-        self._redis = redis.from_url(settings.redis_url)
-    
-    async def close(self) -> None:
-        """Close Redis connection."""
-        if self._redis:
-            await self._redis.close()
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip rate limiting for health endpoints
-        if request.url.path.startswith("/health"):
-            return await call_next(request)
-        
-        # Skip if Redis not available
-        if not self._redis:
-            return await call_next(request)
-        
-        # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
-        key = f"{self.PREFIX}{client_ip}"
-        
-        try:
-            # Get current count
-            current = await self._redis.get(key)
-            
-            if current is None:
-                # First request - set counter with TTL
-                await self._redis.setex(key, self.WINDOW, 1)
-                remaining = self.RATE_LIMIT - 1
-            else:
-                count = int(current)
-                if count >= self.RATE_LIMIT:
-                    # Rate limit exceeded
-                    ttl = await self._redis.ttl(key)
-                    return JSONResponse(
-                        status_code=429,
-                        content={
-                            "error": {
-                                "message": "Rate limit exceeded",
-                                "type": "RateLimitError",
-                                "retry_after": ttl,
-                            }
-                        },
-                        headers={
-                            "X-RateLimit-Limit": str(self.RATE_LIMIT),
-                            "X-RateLimit-Remaining": "0",
-                            "X-RateLimit-Reset": str(int(time.time()) + ttl),
-                            "Retry-After": str(ttl),
-                        }
-                    )
-                
-                # Increment counter
-                await self._redis.incr(key)
-                remaining = self.RATE_LIMIT - count - 1
-            
-            # Process request
-            response = await call_next(request)
-            
-            # Add rate limit headers
-            response.headers["X-RateLimit-Limit"] = str(self.RATE_LIMIT)
-            response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
-            
-            return response
-            
-        except Exception:
-            # If Redis fails, allow request
-            return await call_next(request)
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip rate limiting for non-HTTP traffic and operational endpoints
+        if scope["type"] != "http" or scope["path"].startswith(_OPERATIONAL_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        api_key = None
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                api_key = value.decode("latin-1")
+                break
+
+        result = await rate_limiter.check(scope["method"], scope["path"], _client_ip(scope), api_key)
+
+        # Limiter unavailable (Redis down or not initialized): allow request
+        if result is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not result.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "error": {
+                        "message": "Rate limit exceeded",
+                        "type": "RateLimitError",
+                        "retry_after": result.retry_after,
+                    }
+                },
+                headers={
+                    "X-RateLimit-Limit": str(result.limit),
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(int(time.time()) + result.retry_after),
+                    "Retry-After": str(result.retry_after),
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Add rate limit headers
+                headers = MutableHeaders(scope=message)
+                headers.append("X-RateLimit-Limit", str(result.limit))
+                headers.append("X-RateLimit-Remaining", str(max(0, result.remaining)))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class LogSource(BaseModel):
@@ -19,11 +19,20 @@ class LogCreate(BaseModel):
     trace_id: str | None = None
     span_id: str | None = None
 
+    @field_validator("source")
+    @classmethod
+    def check_app_id(cls, source: LogSource) -> LogSource:
+        # "*" is the all-apps key of throughput/cardinality sketches and retention
+        if source.app_id == "*":
+            raise ValueError("app_id '*' is reserved")
+        return source
+
 
 class LogResponse(BaseModel):
     id: str
     timestamp: datetime
     created_at: datetime
+    pattern_id: int | None = None
 
 
 class LogEntry(BaseModel):
@@ -35,4 +44,5 @@ class LogEntry(BaseModel):
     metadata: dict[str, Any] | None = None
     trace_id: str | None = None
     span_id: str | None = None
+    pattern_id: int | None = None
     created_at: datetime
\ No newline at end of file
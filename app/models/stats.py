@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class TimeRange(BaseModel):
@@ -18,4 +19,10 @@ class StatsSummary(BaseModel):
 
 class TimeSeriesPoint(BaseModel):
     timestamp: datetime
-    values: dict[str, int]
\ No newline at end of file
+    values: dict[str, int]
+
+
+class StatsBatchRequest(BaseModel):
+    apps: list[str] | Literal["all"] = Field(default="all", max_length=1000)
+    start: datetime | None = None
+    end: datetime | None = None
\ No newline at end of file
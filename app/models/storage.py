@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+
+class CompressionUpdate(BaseModel):
+    compress_after_days: int = Field(ge=1, le=3650)
+
+
+class ChunkIntervalUpdate(BaseModel):
+    hours: int = Field(ge=1, le=24 * 30)
+
+
+class RetentionUpdate(BaseModel):
+    days: int = Field(ge=1, le=3650)
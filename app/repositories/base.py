@@ -0,0 +1,73 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator
+
+import asyncpg
+
+from app.core.slow_query_log import slow_query_log
+from app.db.connection import get_connection
+
+
+class BaseRepository:
+    """
+    Repository that checks out a pool connection only while a query runs.
+
+    Given no connection, each query acquires one and releases it as soon
+    as the query returns, so requests answered from cache (or rejected
+    before reaching the database) never hold a pool slot. pinned() keeps
+    one connection for a group of queries; a connection passed in (e.g.
+    by a background job) is used as is.
+    """
+
+    def __init__(self, conn: asyncpg.Connection | None = None):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncGenerator[asyncpg.Connection, None]:
+        if self.conn is not None:
+            yield self.conn
+            return
+        async with get_connection() as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def pinned(self) -> AsyncGenerator[None, None]:
+        """Run the enclosed queries on one connection."""
+        if self.conn is not None:
+            yield
+            return
+        async with get_connection() as conn:
+            self.conn = conn
+            try:
+                yield
+            finally:
+                self.conn = None
+
+    async def _fetch(self, query: str, *args: Any) -> list[asyncpg.Record]:
+        return await self._run("fetch", query, args)
+
+    async def _fetchrow(self, query: str, *args: Any) -> asyncpg.Record | None:
+        return await self._run("fetchrow", query, args)
+
+    async def _execute(self, query: str, *args: Any) -> str:
+        return await self._run("execute", query, args)
+
+    async def _run(self, method: str, query: str, args: tuple) -> Any:
+        async with self._acquire() as conn:
+            return await self._run_on(conn, method, query, *args)
+
+    async def _run_on(self, conn: asyncpg.Connection, method: str, query: str, *args: Any) -> Any:
+        """Run a query on a given connection (e.g. inside a transaction), slow-logged."""
+        if not slow_query_log.enabled:
+            return await getattr(conn, method)(query, *args)
+        start = time.perf_counter()
+        try:
+            result = await getattr(conn, method)(query, *args)
+        except Exception as e:
+            # Failures (e.g. statement timeouts) are often the slowest queries
+            duration_ms = (time.perf_counter() - start) * 1000
+            slow_query_log.record(type(self).__name__, query, args, duration_ms, None, error=e)
+            raise
+        duration_ms = (time.perf_counter() - start) * 1000
+        slow_query_log.record(type(self).__name__, query, args, duration_ms, result)
+        return result
@@ -5,13 +5,11 @@ from typing import Any
 import asyncpg
 
 from app.models.log import LogCreate, LogEntry, LogSource
+from app.repositories.base import BaseRepository
 
 
-class LogRepository:
-    def __init__(self, conn: asyncpg.Connection):
-        self.conn = conn
-
-    async def insert(self, log: LogCreate) -> dict:
+class LogRepository(BaseRepository):
+    async def insert(self, log: LogCreate, pattern_id: int | None = None) -> dict:
         """Insert single log entry."""
         now = datetime.now(timezone.utc)
         timestamp = log.timestamp or now
@@ -19,12 +17,13 @@ class LogRepository:
         # Convert metadata dict to JSON string for asyncpg
         metadata_json = json.dumps(log.metadata) if log.metadata else None
 
-        row = await self.conn.fetchrow(
+        row = await self._fetchrow(
             """
             INSERT INTO logs (
                 timestamp, source_app, source_host, source_instance,
-                severity, message, metadata, trace_id, span_id, created_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                severity, message, metadata, trace_id, span_id, created_at,
+                pattern_id
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
             RETURNING id, timestamp, created_at
             """,
             timestamp,
@@ -37,17 +36,86 @@ class LogRepository:
             log.trace_id,
             log.span_id,
             now,
+            pattern_id,
         )
 
         return {
             "id": str(row["id"]),
             "timestamp": row["timestamp"],
             "created_at": row["created_at"],
+            "pattern_id": pattern_id,
         }
 
+    async def upsert_pattern(self, pattern_id: int, template: str) -> None:
+        """
+        Store the template text for a pattern. An existing template is merged
+        token by token (differences become <*>), so it never loses wildcards.
+        """
+        await self._execute(
+            """
+            INSERT INTO log_patterns (pattern_id, template)
+            VALUES ($1, $2)
+            ON CONFLICT (pattern_id)
+            DO UPDATE SET
+                template = (
+                    SELECT string_agg(CASE WHEN stored = incoming THEN stored ELSE '<*>' END, ' ' ORDER BY i)
+                    FROM unnest(
+                        string_to_array(log_patterns.template, ' '),
+                        string_to_array(EXCLUDED.template, ' ')
+                    ) WITH ORDINALITY AS t(stored, incoming, i)
+                ),
+                updated_at = NOW()
+            """,
+            pattern_id,
+            template,
+        )
+
+    async def alias_pattern(self, pattern_id: int, canonical_id: int, template: str) -> None:
+        """Count a pattern (and anything aliased to it) as canonical_id."""
+        async with self._acquire() as conn, conn.transaction():
+            await self._run_on(
+                conn,
+                "execute",
+                """
+                INSERT INTO log_patterns (pattern_id, template, canonical_id)
+                VALUES ($1, $3, $2)
+                ON CONFLICT (pattern_id)
+                DO UPDATE SET canonical_id = EXCLUDED.canonical_id, updated_at = NOW()
+                """,
+                pattern_id,
+                canonical_id,
+                template,
+            )
+            await self._run_on(
+                conn,
+                "execute",
+                """
+                UPDATE log_patterns SET canonical_id = $2, updated_at = NOW()
+                WHERE canonical_id = $1
+                """,
+                pattern_id,
+                canonical_id,
+            )
+
+    async def get_patterns(
+        self, updated_after: datetime | None = None, limit: int = 10_000,
+    ) -> list[asyncpg.Record]:
+        """Stored patterns, oldest change first (all, or changed since updated_after)."""
+        return await self._fetch(
+            """
+            SELECT pattern_id, template, canonical_id, updated_at
+            FROM log_patterns
+            WHERE $1::TIMESTAMPTZ IS NULL OR updated_at > $1
+            ORDER BY updated_at ASC
+            LIMIT $2
+            """,
+            updated_after,
+            limit,
+        )
+
     async def get_by_id(self, log_id: str) -> LogEntry | None:
         """Get single log by ID."""
-        row = await self.conn.fetchrow(
+        row = await self._fetchrow(
             "SELECT * FROM logs WHERE id = $1",
             int(log_id),
         )
@@ -97,27 +165,72 @@ class LogRepository:
         where_clause = " AND ".join(conditions) if conditions else "TRUE"
         order = "DESC" if sort == "desc" else "ASC"
 
-        # Count total
-        count_row = await self.conn.fetchrow(
-            f"SELECT COUNT(*) as total FROM logs WHERE {where_clause}",
-            *params,
-        )
-        total = count_row["total"]
+        # Count and page on one connection
+        async with self.pinned():
+            count_row = await self._fetchrow(
+                f"SELECT COUNT(*) as total FROM logs WHERE {where_clause}",
+                *params,
+            )
+            total = count_row["total"]
+
+            rows = await self._fetch(
+                f"""
+                SELECT * FROM logs
+                WHERE {where_clause}
+                ORDER BY timestamp {order}
+                LIMIT ${param_idx} OFFSET ${param_idx + 1}
+                """,
+                *params,
+                limit,
+                offset,
+            )
+
+        return [self._row_to_entry(row) for row in rows], total
+
+    async def get_ingested_range(
+        self,
+        start: datetime,
+        end: datetime,
+        source_apps: list[str] | None = None,
+        severities: list[str] | None = None,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 1000,
+    ) -> list[LogEntry]:
+        """
+        Get logs with start <= created_at < end, in ingest order.
+        after is the (created_at, id) of the previous page's last row.
+        """
+        conditions = ["created_at >= $1", "created_at < $2"]
+        params: list[Any] = [start, end]
+        param_idx = 3
 
-        # Get rows
-        rows = await self.conn.fetch(
+        if source_apps is not None:
+            conditions.append(f"source_app = ANY(${param_idx}::TEXT[])")
+            params.append(source_apps)
+            param_idx += 1
+
+        if severities is not None:
+            conditions.append(f"severity = ANY(${param_idx}::TEXT[])")
+            params.append(severities)
+            param_idx += 1
+
+        if after is not None:
+            conditions.append(f"(created_at, id) > (${param_idx}, ${param_idx + 1})")
+            params.extend(after)
+            param_idx += 2
+
+        rows = await self._fetch(
             f"""
             SELECT * FROM logs
-            WHERE {where_clause}
-            ORDER BY timestamp {order}
-            LIMIT ${param_idx} OFFSET ${param_idx + 1}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY created_at ASC, id ASC
+            LIMIT ${param_idx}
             """,
             *params,
             limit,
-            offset,
         )
 
-        return [self._row_to_entry(row) for row in rows], total
+        return [self._row_to_entry(row) for row in rows]
 
     def _row_to_entry(self, row: asyncpg.Record) -> LogEntry:
         """Convert database row to LogEntry."""
@@ -139,5 +252,6 @@ class LogRepository:
             metadata=metadata,
             trace_id=row["trace_id"],
             span_id=row["span_id"],
+            pattern_id=row["pattern_id"],
             created_at=row["created_at"],
         )
\ No newline at end of file
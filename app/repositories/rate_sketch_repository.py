@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from app.core.sketch import DDSketch
+from app.core.time_buckets import Rollup, ceil_time, floor_time, plan_segments
+from app.repositories.base import BaseRepository
+
+ALL_APPS = "*"
+
+SKETCH_LEVELS = [
+    Rollup("hour", timedelta(hours=1)),
+    Rollup("minute", timedelta(minutes=1)),
+]
+
+
+class RateSketchRepository(BaseRepository):
+    async def save_minute(self, source_app: str, bucket: datetime, sketch: DDSketch) -> None:
+        """Store a minute sketch and merge it into its hour sketch."""
+        hour = floor_time(bucket, timedelta(hours=1))
+
+        async with self._acquire() as conn, conn.transaction():
+            await self._run_on(
+                conn,
+                "execute",
+                """
+                INSERT INTO log_rate_sketches (source_app, width_seconds, bucket, sketch)
+                VALUES ($1, 60, $2, $3)
+                ON CONFLICT (source_app, width_seconds, bucket)
+                DO UPDATE SET sketch = EXCLUDED.sketch
+                """,
+                source_app,
+                bucket,
+                sketch.to_bytes(),
+            )
+
+            # Lock the hour row so concurrent folds merge instead of overwrite
+            await self._run_on(
+                conn,
+                "execute",
+                """
+                INSERT INTO log_rate_sketches (source_app, width_seconds, bucket, sketch)
+                VALUES ($1, 3600, $2, $3)
+                ON CONFLICT DO NOTHING
+                """,
+                source_app,
+                hour,
+                DDSketch(sketch.relative_accuracy).to_bytes(),
+            )
+            row = await self._run_on(
+                conn,
+                "fetchrow",
+                """
+                SELECT sketch FROM log_rate_sketches
+                WHERE source_app = $1 AND width_seconds = 3600 AND bucket = $2
+                FOR UPDATE
+                """,
+                source_app,
+                hour,
+            )
+            hour_sketch = DDSketch.from_bytes(row["sketch"])
+            hour_sketch.merge(sketch)
+            await self._run_on(
+                conn,
+                "execute",
+                """
+                UPDATE log_rate_sketches SET sketch = $3
+                WHERE source_app = $1 AND width_seconds = 3600 AND bucket = $2
+                """,
+                source_app,
+                hour,
+                hour_sketch.to_bytes(),
+            )
+
+    async def get_percentiles(
+        self,
+        start: datetime,
+        end: datetime,
+        source_app: str | None = None,
+        quantiles: tuple[float, ...] = (0.95, 0.99),
+    ) -> dict[float, float]:
+        """
+        Get per-second throughput quantiles over a window (minute resolution).
+        Hour sketches cover whole hours, minute sketches the edges. Seconds
+        without a sketch (no logs ingested) count as zero.
+        """
+        app = source_app or ALL_APPS
+        result = await self.get_percentiles_batch(start, end, [app], quantiles)
+        return result[app]
+
+    async def get_percentiles_batch(
+        self,
+        start: datetime,
+        end: datetime,
+        source_apps: list[str] | None = None,
+        quantiles: tuple[float, ...] = (0.95, 0.99),
+    ) -> dict[str, dict[float, float]]:
+        """
+        Get throughput quantiles for many apps with one query.
+        source_apps=None means every app with sketches in the window.
+        """
+        start = floor_time(start, timedelta(minutes=1))
+        end = ceil_time(end, timedelta(minutes=1))
+
+        if source_apps is not None:
+            params: list = [source_apps]
+            app_filter = "source_app = ANY($1::TEXT[])"
+        else:
+            params = []
+            app_filter = f"source_app <> '{ALL_APPS}'"
+
+        conditions = []
+        for segment in plan_segments(start, end, SKETCH_LEVELS):
+            if segment.rollup is None:
+                continue
+            params.extend([int(segment.rollup.width.total_seconds()), segment.start, segment.end])
+            idx = len(params)
+            conditions.append(
+                f"(width_seconds = ${idx - 2} AND bucket >= ${idx - 1} AND bucket < ${idx})"
+            )
+
+        merged: dict[str, DDSketch] = {app: DDSketch() for app in source_apps or []}
+        if conditions:
+            rows = await self._fetch(
+                f"""
+                SELECT source_app, sketch FROM log_rate_sketches
+                WHERE {app_filter} AND ({" OR ".join(conditions)})
+                """,
+                *params,
+            )
+            for row in rows:
+                sketch = merged.setdefault(row["source_app"], DDSketch())
+                sketch.merge(DDSketch.from_bytes(row["sketch"]))
+
+        # Pad with the seconds that had no logs at all
+        window_seconds = int((end - start).total_seconds())
+        result = {}
+        for app, sketch in merged.items():
+            sketch.add(0, window_seconds - sketch.count)
+            result[app] = {q: round(sketch.quantile(q), 2) for q in quantiles}
+
+        return result
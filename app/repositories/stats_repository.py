@@ -1,11 +1,37 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import asyncpg
 
+from app.core.downsample import lttb_indices
+from app.core.exceptions import ValidationError
+from app.core.time_buckets import (
+    Rollup,
+    Segment,
+    bucket_starts,
+    ceil_time,
+    floor_time,
+    plan_segments,
+    widen_interval,
+)
+from app.repositories.base import BaseRepository
 
-class StatsRepository:
-    def __init__(self, conn: asyncpg.Connection):
-        self.conn = conn
+# Continuous aggregates from 002_continuous_aggregates.sql, coarsest first
+ROLLUPS = [
+    Rollup("logs_1d", timedelta(days=1)),
+    Rollup("logs_1h", timedelta(hours=1)),
+    Rollup("logs_1m", timedelta(minutes=1)),
+]
+
+# Upper bound on buckets in one (gap-filled) timeseries response
+MAX_BUCKETS = 50_000
+
+SEVERITIES = ["debug", "info", "warn", "error", "fatal"]
+
+
+class StatsRepository(BaseRepository):
+    def __init__(self, conn: asyncpg.Connection | None = None, use_rollups: bool = True):
+        super().__init__(conn)
+        self.use_rollups = use_rollups
 
     async def get_summary(
         self,
@@ -18,39 +44,75 @@ class StatsRepository:
         start = start or now.replace(hour=0, minute=0, second=0, microsecond=0)
         end = end or now
 
-        conditions = ["timestamp >= $1", "timestamp <= $2"]
-        params: list = [start, end]
-        param_idx = 3
+        params: list = []
+        source_apps = [source_app] if source_app else None
+        source = self._counts_source(start, end, ROLLUPS, source_apps, params)
 
-        if source_app:
-            conditions.append(f"source_app = ${param_idx}")
-            params.append(source_app)
+        # Count by severity (total is the sum - severity is constrained)
+        severity_rows = await self._fetch(
+            f"""
+            SELECT severity, SUM(count)::BIGINT as count
+            FROM ({source}) AS counts
+            GROUP BY severity
+            """,
+            *params,
+        )
+        by_severity = dict.fromkeys(SEVERITIES, 0)
+        by_severity.update({row["severity"]: row["count"] for row in severity_rows})
 
-        where_clause = " AND ".join(conditions)
+        return self._build_summary(by_severity, start, end)
 
-        # Total count
-        total_row = await self.conn.fetchrow(
-            f"SELECT COUNT(*) as total FROM logs WHERE {where_clause}",
-            *params,
+    async def get_summaries(
+        self,
+        source_apps: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> tuple[dict, dict[str, dict]]:
+        """
+        Get aggregated statistics for many apps in one scan.
+        source_apps=None means every app with logs in the window.
+        Returns (time_range, summaries by app).
+        """
+        now = datetime.now(timezone.utc)
+        start = start or now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = end or now
+
+        params: list = []
+        source = self._counts_source(start, end, ROLLUPS, source_apps, params)
+        severity_columns = ",\n".join(
+            f"SUM(count) FILTER (WHERE severity = '{sev}')::BIGINT AS {sev}"
+            for sev in SEVERITIES
         )
-        total = total_row["total"]
 
-        # Count by severity
-        severity_rows = await self.conn.fetch(
+        rows = await self._fetch(
             f"""
-            SELECT severity, COUNT(*) as count
-            FROM logs
-            WHERE {where_clause}
-            GROUP BY severity
+            SELECT source_app, {severity_columns}
+            FROM ({source}) AS counts
+            GROUP BY source_app
             """,
             *params,
         )
-        by_severity = {row["severity"]: row["count"] for row in severity_rows}
 
-        # Fill missing severities
-        for sev in ["debug", "info", "warn", "error", "fatal"]:
-            if sev not in by_severity:
-                by_severity[sev] = 0
+        summaries = {}
+        for row in rows:
+            by_severity = {sev: row[sev] or 0 for sev in SEVERITIES}
+            summaries[row["source_app"]] = self._build_summary(by_severity, start, end)
+
+        # Requested apps without logs still get a (zero) summary
+        for app in source_apps or []:
+            if app not in summaries:
+                summaries[app] = self._build_summary(dict.fromkeys(SEVERITIES, 0), start, end)
+
+        return {"start": start, "end": end}, summaries
+
+    def _build_summary(
+        self,
+        by_severity: dict[str, int],
+        start: datetime,
+        end: datetime,
+    ) -> dict:
+        """Build summary response from per-severity counts."""
+        total = sum(by_severity.values())
 
         # Error rate
         error_count = by_severity.get("error", 0) + by_severity.get("fatal", 0)
@@ -67,64 +129,212 @@ class StatsRepository:
             "error_rate": round(error_rate, 4),
             "logs_per_second": {
                 "avg": round(avg_per_second, 2),
-                "p95": 0.0,  # TODO: implement percentile
+                "p95": 0.0,  # filled from throughput sketches
                 "p99": 0.0,
             },
         }
 
-    async def get_timeseries(
+    async def get_shortest_retention(self) -> int | None:
+        """Shortest retention in days of any app (None before 005 is applied)."""
+        row = await self._fetchrow("SELECT MIN(retain_days) AS days FROM log_retention")
+        return row["days"] if row else None
+
+    async def refresh_rollups(self, start: datetime, end: datetime, horizon: datetime) -> None:
+        """
+        Re-materialize the rollups over [start, end), finest first.
+        Nothing before horizon is refreshed: retention may have trimmed those
+        raw rows. Coarser rollups read logs_1m, so their wider buckets are safe.
+        """
+        start = max(start, ceil_time(horizon, ROLLUPS[-1].width))
+        if start >= end:
+            return
+        for rollup in reversed(ROLLUPS):
+            await self._execute(
+                "CALL refresh_continuous_aggregate($1, $2, $3)",
+                rollup.name,
+                floor_time(start, rollup.width),
+                ceil_time(end, rollup.width),
+            )
+
+    async def get_top_patterns(
         self,
         start: datetime | None = None,
         end: datetime | None = None,
-        interval: str = "5m",
-        group_by: str = "severity",
         source_app: str | None = None,
+        severity: str | None = None,
+        limit: int = 20,
     ) -> list[dict]:
-        """Get time-series data for charts."""
+        """Get the most frequent message patterns in a window."""
         now = datetime.now(timezone.utc)
         start = start or now.replace(hour=0, minute=0, second=0, microsecond=0)
         end = end or now
 
-        # Convert interval to PostgreSQL format
-        interval_map = {
-            "1m": "1 minute",
-            "5m": "5 minutes",
-            "15m": "15 minutes",
-            "1h": "1 hour",
-            "1d": "1 day",
-        }
-        pg_interval = interval_map.get(interval, "5 minutes")
-
-        conditions = ["timestamp >= $1", "timestamp <= $2"]
+        conditions = ["timestamp >= $1", "timestamp <= $2", "pattern_id IS NOT NULL"]
         params: list = [start, end]
         param_idx = 3
 
         if source_app:
             conditions.append(f"source_app = ${param_idx}")
             params.append(source_app)
+            param_idx += 1
+
+        if severity:
+            severities = severity.split(",")
+            conditions.append(f"severity = ANY(${param_idx}::TEXT[])")
+            params.append(severities)
+            param_idx += 1
 
         where_clause = " AND ".join(conditions)
 
-        rows = await self.conn.fetch(
+        rows = await self._fetch(
+            f"""
+            WITH counts AS (
+                SELECT pattern_id, COUNT(*) as count
+                FROM logs
+                WHERE {where_clause}
+                GROUP BY pattern_id
+            ),
+            top AS (
+                -- Ids another process minted for the same template count as one
+                SELECT COALESCE(a.canonical_id, counts.pattern_id) AS pattern_id,
+                       SUM(counts.count)::BIGINT AS count
+                FROM counts
+                LEFT JOIN log_patterns a USING (pattern_id)
+                GROUP BY 1
+                ORDER BY count DESC
+                LIMIT ${param_idx}
+            )
+            SELECT top.pattern_id, top.count, p.template
+            FROM top
+            LEFT JOIN log_patterns p USING (pattern_id)
+            ORDER BY top.count DESC
+            """,
+            *params,
+            limit,
+        )
+
+        return [
+            {
+                "pattern_id": row["pattern_id"],
+                "template": row["template"],
+                "count": row["count"],
+            }
+            for row in rows
+        ]
+
+    async def get_timeseries(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        bucket_width: timedelta = timedelta(minutes=5),
+        group_by: str = "severity",
+        source_app: str | None = None,
+        max_points: int | None = None,
+        downsample: str = "bucket",
+    ) -> tuple[timedelta, list[dict]]:
+        """
+        Get gap-filled time-series data for charts.
+
+        With max_points, "bucket" widens the bucket width so the series has
+        at most max_points points, and "lttb" keeps the width (unless the
+        window needs more than MAX_BUCKETS) and picks max_points
+        representative points. Returns (bucket_width, series).
+        """
+        now = datetime.now(timezone.utc)
+        start = start or now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = end or now
+
+        if max_points and downsample == "bucket":
+            bucket_width = widen_interval(bucket_width, start, end, max_points)
+        elif max_points:
+            # LTTB keeps the width but needs the whole series first; only
+            # windows too long for that are widened (to MAX_BUCKETS)
+            bucket_width = widen_interval(bucket_width, start, end, MAX_BUCKETS)
+
+        if (end - start) / bucket_width > MAX_BUCKETS:
+            raise ValidationError(
+                f"Too many buckets (max {MAX_BUCKETS}); use a larger interval or max_points"
+            )
+
+        # A rollup can only feed buckets it nests into exactly
+        rollups = [r for r in ROLLUPS if bucket_width % r.width == timedelta(0)]
+
+        params: list = [bucket_width, start, end]
+        source_apps = [source_app] if source_app else None
+        source = self._counts_source(start, end, rollups, source_apps, params)
+
+        rows = await self._fetch(
             f"""
-            SELECT 
-                time_bucket('{pg_interval}', timestamp) as bucket,
+            SELECT
+                time_bucket_gapfill($1::interval, ts, $2::timestamptz, $3::timestamptz) as bucket,
                 {group_by},
-                COUNT(*) as count
-            FROM logs
-            WHERE {where_clause}
+                COALESCE(SUM(count), 0)::BIGINT as count
+            FROM ({source}) AS counts
             GROUP BY bucket, {group_by}
             ORDER BY bucket
             """,
             *params,
         )
 
-        # Aggregate into series format
-        series_map: dict[datetime, dict] = {}
+        # Aggregate into series format (gapfill only emits groups that exist)
+        series_map: dict[datetime, dict] = {
+            bucket: {"timestamp": bucket, "values": {}}
+            for bucket in bucket_starts(start, end, bucket_width)
+        }
         for row in rows:
             bucket = row["bucket"]
             if bucket not in series_map:
                 series_map[bucket] = {"timestamp": bucket, "values": {}}
             series_map[bucket]["values"][row[group_by]] = row["count"]
 
-        return list(series_map.values())
\ No newline at end of file
+        series = sorted(series_map.values(), key=lambda point: point["timestamp"])
+
+        if max_points and downsample == "lttb" and len(series) > max_points:
+            totals = [sum(point["values"].values()) for point in series]
+            series = [series[i] for i in lttb_indices(totals, max_points)]
+
+        return bucket_width, series
+
+    def _counts_source(
+        self,
+        start: datetime,
+        end: datetime,
+        rollups: list[Rollup],
+        source_apps: list[str] | None,
+        params: list,
+    ) -> str:
+        """
+        Build a UNION ALL subquery yielding (ts, source_app, severity, count).
+        Fully covered buckets come from rollups, edges from raw rows.
+        Appends bind values to params.
+        """
+        if self.use_rollups:
+            segments = plan_segments(start, end, rollups)
+        else:
+            segments = [Segment(None, start, end, end_inclusive=True)]
+
+        app_filter = ""
+        if source_apps is not None:
+            params.append(source_apps)
+            app_filter = f" AND source_app = ANY(${len(params)}::TEXT[])"
+
+        parts = []
+        for segment in segments:
+            params.extend([segment.start, segment.end])
+            lo, hi = len(params) - 1, len(params)
+
+            if segment.rollup is None:
+                end_op = "<=" if segment.end_inclusive else "<"
+                sql = (
+                    "SELECT timestamp AS ts, source_app, severity, 1::BIGINT AS count "
+                    f"FROM logs WHERE timestamp >= ${lo} AND timestamp {end_op} ${hi}"
+                )
+            else:
+                sql = (
+                    "SELECT bucket AS ts, source_app, severity, count "
+                    f"FROM {segment.rollup.name} WHERE bucket >= ${lo} AND bucket < ${hi}"
+                )
+
+            parts.append(sql + app_filter)
+
+        return "\nUNION ALL\n".join(parts)
@@ -0,0 +1,143 @@
+import json
+
+from app.repositories.base import BaseRepository
+
+ALL_APPS = "*"  # default retention row
+HYPERTABLE = "logs"
+
+
+class StorageRepository(BaseRepository):
+    """TimescaleDB compression, retention and chunk settings for the logs hypertable."""
+
+    async def get_policies(self) -> dict:
+        """Compression settings, chunk interval and policy jobs."""
+        async with self.pinned():
+            compression = await self._fetchrow(
+                """
+                SELECT segmentby, orderby
+                FROM timescaledb_information.hypertable_compression_settings
+                WHERE hypertable = $1::REGCLASS
+                """,
+                HYPERTABLE,
+            )
+            dimension = await self._fetchrow(
+                """
+                SELECT time_interval FROM timescaledb_information.dimensions
+                WHERE hypertable_name = $1 AND dimension_number = 1
+                """,
+                HYPERTABLE,
+            )
+            jobs = await self._fetch(
+                """
+                SELECT job_id, proc_name, schedule_interval, config, next_start
+                FROM timescaledb_information.jobs
+                WHERE hypertable_name = $1 OR proc_name = 'apply_log_retention'
+                ORDER BY job_id
+                """,
+                HYPERTABLE,
+            )
+
+        return {
+            "segment_by": compression["segmentby"] if compression else None,
+            "order_by": compression["orderby"] if compression else None,
+            "chunk_interval": dimension["time_interval"] if dimension else None,
+            "jobs": [
+                {
+                    "job_id": row["job_id"],
+                    "proc_name": row["proc_name"],
+                    "schedule_interval": row["schedule_interval"],
+                    "config": json.loads(row["config"]) if row["config"] else None,
+                    "next_start": row["next_start"],
+                }
+                for row in jobs
+            ],
+        }
+
+    async def get_size(self) -> dict:
+        """On-disk size and compression savings of the hypertable."""
+        async with self.pinned():
+            size = await self._fetchrow(
+                "SELECT * FROM hypertable_detailed_size($1::REGCLASS)", HYPERTABLE,
+            )
+            stats = await self._fetchrow(
+                "SELECT * FROM hypertable_compression_stats($1::REGCLASS)", HYPERTABLE,
+            )
+            chunks = await self._fetchrow(
+                """
+                SELECT COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE is_compressed) AS compressed,
+                       MIN(range_start) AS oldest
+                FROM timescaledb_information.chunks
+                WHERE hypertable_name = $1
+                """,
+                HYPERTABLE,
+            )
+
+        return {
+            "total_bytes": size["total_bytes"] if size else 0,
+            "table_bytes": size["table_bytes"] if size else 0,
+            "index_bytes": size["index_bytes"] if size else 0,
+            "chunks": chunks["total"],
+            "compressed_chunks": chunks["compressed"],
+            "oldest_chunk": chunks["oldest"],
+            "before_compression_bytes": stats["before_compression_total_bytes"] if stats else None,
+            "after_compression_bytes": stats["after_compression_total_bytes"] if stats else None,
+        }
+
+    async def set_compress_after(self, days: int) -> None:
+        """Replace the compression policy."""
+        async with self._acquire() as conn, conn.transaction():
+            await self._run_on(
+                conn, "execute", "SELECT remove_compression_policy($1::REGCLASS, if_exists => TRUE)", HYPERTABLE,
+            )
+            await self._run_on(
+                conn,
+                "execute",
+                "SELECT add_compression_policy($1::REGCLASS, compress_after => make_interval(days => $2))",
+                HYPERTABLE,
+                days,
+            )
+
+    async def set_chunk_interval(self, hours: int) -> None:
+        """Set the time span of chunks created from now on."""
+        await self._execute(
+            "SELECT set_chunk_time_interval($1::REGCLASS, make_interval(hours => $2))",
+            HYPERTABLE,
+            hours,
+        )
+
+    async def set_drop_after(self, days: int) -> None:
+        """Replace the chunk retention policy."""
+        async with self._acquire() as conn, conn.transaction():
+            await self._run_on(
+                conn, "execute", "SELECT remove_retention_policy($1::REGCLASS, if_exists => TRUE)", HYPERTABLE,
+            )
+            await self._run_on(
+                conn,
+                "execute",
+                "SELECT add_retention_policy($1::REGCLASS, drop_after => make_interval(days => $2))",
+                HYPERTABLE,
+                days,
+            )
+
+    async def get_retention(self) -> dict[str, int]:
+        """Retention days per app ('*' = default)."""
+        rows = await self._fetch("SELECT source_app, retain_days FROM log_retention")
+        return {row["source_app"]: row["retain_days"] for row in rows}
+
+    async def set_retention(self, source_app: str, days: int) -> None:
+        """Set an app's (or the default's) retention."""
+        await self._execute(
+            """
+            INSERT INTO log_retention (source_app, retain_days) VALUES ($1, $2)
+            ON CONFLICT (source_app)
+            DO UPDATE SET retain_days = EXCLUDED.retain_days, updated_at = NOW()
+            """,
+            source_app,
+            days,
+        )
+
+    async def delete_retention(self, source_app: str) -> bool:
+        """Drop an app's override; returns whether it had one."""
+        status = await self._execute("DELETE FROM log_retention WHERE source_app = $1", source_app)
+        return status != "DELETE 0"
@@ -0,0 +1,88 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.security import verify_api_key
+from app.core.slow_query_log import slow_query_log
+from app.dependencies import StorageServiceDep
+from app.models.storage import ChunkIntervalUpdate, CompressionUpdate, RetentionUpdate
+from app.services.worker_stats_service import worker_stats_service
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    _: Annotated[str, Depends(verify_api_key)],
+    limit: int = Query(default=50, ge=1, le=slow_query_log.MAX_ENTRIES),
+) -> dict:
+    """Recent slow repository queries on this instance's workers, newest first (with sampled plans)."""
+    return await worker_stats_service.slow_queries(limit)
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Clear the slow query log on this instance's workers."""
+    return {"cleared": await worker_stats_service.clear_slow_queries()}
+
+
+@router.get("/storage")
+async def get_storage(
+    service: StorageServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Compression settings, chunk interval, retention, policy jobs and on-disk size."""
+    return await service.get_overview()
+
+
+@router.put("/storage/compression")
+async def set_compression(
+    update: CompressionUpdate,
+    service: StorageServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Compress chunks older than compress_after_days."""
+    return await service.set_compression(update.compress_after_days)
+
+
+@router.put("/storage/chunk-interval")
+async def set_chunk_interval(
+    update: ChunkIntervalUpdate,
+    service: StorageServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Time span of chunks created from now on."""
+    return await service.set_chunk_interval(update.hours)
+
+
+@router.put("/storage/retention")
+async def set_default_retention(
+    update: RetentionUpdate,
+    service: StorageServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Default retention in days."""
+    return await service.set_default_retention(update.days)
+
+
+@router.put("/storage/retention/{source_app}")
+async def set_app_retention(
+    source_app: str,
+    update: RetentionUpdate,
+    service: StorageServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Retention in days for one app."""
+    return await service.set_app_retention(source_app, update.days)
+
+
+@router.delete("/storage/retention/{source_app}")
+async def remove_app_retention(
+    source_app: str,
+    service: StorageServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """Put an app back on the default retention."""
+    return await service.remove_app_retention(source_app)
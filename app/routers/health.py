@@ -1,5 +1,8 @@
 from fastapi import APIRouter
 
+from app.services.stream_service import stream_service
+from app.services.worker_stats_service import worker_stats_service
+
 router = APIRouter(tags=["Health"])
 
 
@@ -8,4 +11,18 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "0.1.0",
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/health/cache")
+async def cache_health():
+    """Per-prefix cache hit ratio and entry size metrics (all workers on this instance)."""
+    return {
+        "prefixes": await worker_stats_service.cache_stats(),
+    }
+
+
+@router.get("/health/stream")
+async def stream_health():
+    """WebSocket connection, queue depth and drop metrics."""
+    return stream_service.get_stats()
@@ -33,6 +33,7 @@ async def ingest_log(
             "metadata": log.metadata,
             "trace_id": log.trace_id,
             "span_id": log.span_id,
+            "pattern_id": result.pattern_id,
         }
     )
     
@@ -48,11 +49,11 @@ async def ingest_bulk(
 ) -> dict:
     """Ingest multiple logs."""
     now = datetime.now(timezone.utc)
-    result = await service.ingest_bulk(logs)
+    result, pattern_ids = await service.ingest_bulk(logs)
     result["batch_id"] = f"batch_{int(now.timestamp() * 1000)}"
     
     # Broadcast each log to WebSocket subscribers
-    for log in logs:
+    for log, pattern_id in zip(logs, pattern_ids):
         background_tasks.add_task(
             stream_service.broadcast_log,
             {
@@ -63,6 +64,7 @@ async def ingest_bulk(
                 "metadata": log.metadata,
                 "trace_id": log.trace_id,
                 "span_id": log.span_id,
+                "pattern_id": pattern_id,
             }
         )
     
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render
+from app.services.worker_stats_service import worker_stats_service
+
+router = APIRouter(tags=["Health"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics of every worker on this instance in Prometheus text format."""
+    body = render(await worker_stats_service.metrics())
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
@@ -3,8 +3,11 @@ from typing import Annotated
 
 from fastapi import APIRouter, Query, Depends
 
+from app.models.stats import StatsBatchRequest
 from app.dependencies import StatsServiceDep
 from app.core.security import verify_api_key
+from app.services.cardinality_service import FIELDS, cardinality_service
+from app.services.live_stats_service import live_stats_service
 
 router = APIRouter(prefix="/stats", tags=["Stats"])
 
@@ -25,21 +28,85 @@ async def get_summary(
     )
 
 
+@router.post("/batch")
+async def get_batch_summary(
+    request: StatsBatchRequest,
+    service: StatsServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+) -> dict:
+    """High-level statistics for many apps in a single scan."""
+    return await service.get_summaries(
+        source_apps=None if request.apps == "all" else request.apps,
+        start=request.start,
+        end=request.end,
+    )
+
+
 @router.get("/timeseries")
 async def get_timeseries(
     service: StatsServiceDep,
     _: Annotated[str, Depends(verify_api_key)],
     start: datetime | None = None,
     end: datetime | None = None,
-    interval: str = Query(default="5m", pattern=r"^(1m|5m|15m|1h|1d)$"),
+    interval: str = Query(default="5m", pattern=r"^[1-9][0-9]*(s|m|h|d)$"),
     group_by: str = Query(default="severity", pattern=r"^(severity|source_app)$"),
     source_app: str | None = None,
+    max_points: int | None = Query(default=None, ge=2, le=10000),
+    downsample: str = Query(default="bucket", pattern=r"^(bucket|lttb)$"),
 ) -> dict:
-    """Time-series data for charts."""
+    """Gap-filled time-series data for charts."""
     return await service.get_timeseries(
         start=start,
         end=end,
         interval=interval,
         group_by=group_by,
         source_app=source_app,
-    )
\ No newline at end of file
+        max_points=max_points,
+        downsample=downsample,
+    )
+
+
+@router.get("/patterns")
+async def get_top_patterns(
+    service: StatsServiceDep,
+    _: Annotated[str, Depends(verify_api_key)],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    source_app: str | None = None,
+    severity: str | None = None,
+    limit: int = Query(default=20, ge=1, le=1000),
+) -> dict:
+    """Top message patterns by count over a window."""
+    return await service.get_top_patterns(
+        start=start,
+        end=end,
+        source_app=source_app,
+        severity=severity,
+        limit=limit,
+    )
+
+
+@router.get("/live")
+async def get_live(
+    _: Annotated[str, Depends(verify_api_key)],
+    source_app: str | None = None,
+) -> dict:
+    """Logs/sec by severity for the last 60s (in-memory, no database)."""
+    return live_stats_service.snapshot(source_app=source_app)
+
+
+@router.get("/cardinality")
+async def get_cardinality(
+    _: Annotated[str, Depends(verify_api_key)],
+    source_app: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    field: str | None = Query(default=None, pattern=r"^(host|instance|trace_id)$"),
+) -> dict:
+    """Approximate distinct hosts/instances/trace_ids (HyperLogLog, no database)."""
+    return await cardinality_service.estimate(
+        source_app=source_app,
+        start=start,
+        end=end,
+        fields=(field,) if field else FIELDS,
+    )
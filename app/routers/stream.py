@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, WebSocketException
 
+from app.services.stream_filters import FilterError
 from app.services.stream_service import stream_service
 from app.config import get_settings
 
@@ -20,7 +21,8 @@ async def websocket_stream(
     Connect with: ws://localhost:3000/stream?api_key=your-key
     
     Client messages:
-    - {"type": "subscribe", "subscription_id": "...", "filters": {...}}
+    - {"type": "subscribe", "subscription_id": "...", "filters": {...}, "overflow": "...", "batch": {...}, "since": "...", "max_rate": n, "sample": 0.1}
+    - {"type": "subscribe_aggregate", "subscription_id": "...", "filters": {...}, "aggregate": {...}}
     - {"type": "unsubscribe", "subscription_id": "..."}
     - {"type": "pause", "subscription_id": "..."}
     - {"type": "resume", "subscription_id": "..."}
@@ -30,9 +32,51 @@ async def websocket_stream(
     - {"type": "connected", "session_id": "...", "server_time": "..."}
     - {"type": "subscribed", "subscription_id": "...", "filters": {...}}
     - {"type": "unsubscribed", "subscription_id": "..."}
+    - {"type": "backfilled", "subscription_id": "...", "backfilled": n, "truncated": bool, "replayed": n, "dropped": n}
+    - {"type": "paused", "subscription_id": "..."}
+    - {"type": "resumed", "subscription_id": "...", "replayed": n, "dropped": n}
     - {"type": "log", "subscription_id": "...", "data": {...}}
+    - {"type": "logs", "subscription_id": "...", "data": [{...}, ...]}
+    - {"type": "aggregate", "subscription_id": "...", "data": {...}}
+    - {"type": "suppressed", "subscription_id": "...", "sampled_out": n, "rate_limited": n, "interval_seconds": 5}
     - {"type": "error", "code": "...", "message": "..."}
     - {"type": "ping", "timestamp": "..."}
+
+    Filters (all keys must match):
+    - source_app, severity, host, instance, trace_id: a value or a list
+    - min_severity: "debug" | "info" | "warn" | "error" | "fatal"
+    - message: "substring", {"contains": "...", "ignore_case": true} or {"regex": "..."} (RE2 syntax)
+    - metadata: {"key": value, "nested.key": value}
+    - all / any: [filter, ...], not: filter
+    Invalid filters are rejected with an INVALID_FILTER error.
+
+    Aggregate subscriptions receive, every "interval" seconds (1-60,
+    default 5), the window's total, logs_per_second, error_rate, counts
+    by "group_by" (severity, source_app or host) and the "top_patterns"
+    most frequent pattern ids (0-20, default 5) instead of raw logs.
+    Identical aggregate subscriptions share one computation.
+
+    "sample" keeps that fraction of matching logs and "max_rate" caps
+    delivery in logs/sec (token bucket, one second of burst). Every 5
+    seconds a "suppressed" frame reports what either one held back.
+
+    Each connection has a bounded outgoing queue. When it is full, the
+    subscription's overflow policy applies: drop_oldest (default),
+    drop_newest, coalesce (replace the newest queued frame) or disconnect.
+
+    With "batch": {"max_logs": N, "max_ms": M} a subscription receives
+    "logs" frames holding up to N logs, sent at most M ms after the first.
+
+    While paused, matching logs are kept in a server-side buffer bounded
+    in bytes (oldest evicted first). Resume replays it as "logs" frames,
+    then sends "resumed" with the replayed and evicted counts.
+
+    Every log carries a "cursor". After a reconnect, subscribe with
+    "since" set to the last cursor seen (or an ISO timestamp) to receive
+    the missed logs as "logs" frames before live delivery resumes; the
+    "backfilled" frame marks the switch. "truncated" means the backfill
+    stopped before the end of the gap (too many logs, or too many stored
+    logs scanned for a narrow filter).
     """
     # Verify API key
     settings = get_settings()
@@ -45,7 +89,7 @@ async def websocket_stream(
     await stream_service.connect(websocket, session_id)
     
     # Send connected message
-    await websocket.send_json({
+    await stream_service.send(session_id, {
         "type": "connected",
         "session_id": session_id,
         "server_time": datetime.now(timezone.utc).isoformat(),
@@ -60,45 +104,116 @@ async def websocket_stream(
                 subscription_id = data.get("subscription_id", str(uuid.uuid4()))
                 filters = data.get("filters", {})
                 
-                await stream_service.subscribe(session_id, subscription_id, filters)
+                try:
+                    await stream_service.subscribe(
+                        session_id,
+                        subscription_id,
+                        filters,
+                        overflow=data.get("overflow"),
+                        batch=data.get("batch"),
+                        since=data.get("since"),
+                        max_rate=data.get("max_rate"),
+                        sample=data.get("sample"),
+                    )
+                except FilterError as e:
+                    await stream_service.send(session_id, {
+                        "type": "error",
+                        "code": "INVALID_FILTER",
+                        "message": str(e),
+                    })
+                    continue
+                except ValueError as e:
+                    await stream_service.send(session_id, {
+                        "type": "error",
+                        "code": "INVALID_SUBSCRIPTION",
+                        "message": str(e),
+                    })
+                    continue
                 
-                await websocket.send_json({
+                await stream_service.send(session_id, {
                     "type": "subscribed",
                     "subscription_id": subscription_id,
                     "filters": filters,
                 })
+
+                if data.get("since") is not None:
+                    stream_service.start_backfill(session_id, subscription_id)
+            
+            elif msg_type == "subscribe_aggregate":
+                subscription_id = data.get("subscription_id", str(uuid.uuid4()))
+                filters = data.get("filters", {})
+
+                try:
+                    spec = await stream_service.subscribe_aggregate(
+                        session_id,
+                        subscription_id,
+                        filters,
+                        data.get("aggregate"),
+                    )
+                except FilterError as e:
+                    await stream_service.send(session_id, {
+                        "type": "error",
+                        "code": "INVALID_FILTER",
+                        "message": str(e),
+                    })
+                    continue
+                except ValueError as e:
+                    await stream_service.send(session_id, {
+                        "type": "error",
+                        "code": "INVALID_SUBSCRIPTION",
+                        "message": str(e),
+                    })
+                    continue
+
+                if spec is not None:
+                    await stream_service.send(session_id, {
+                        "type": "subscribed",
+                        "subscription_id": subscription_id,
+                        "filters": filters,
+                        "aggregate": {
+                            "group_by": spec.group_by,
+                            "interval": spec.interval,
+                            "top_patterns": spec.top_patterns,
+                        },
+                    })
             
             elif msg_type == "unsubscribe":
                 subscription_id = data.get("subscription_id")
                 if subscription_id:
                     await stream_service.unsubscribe(session_id, subscription_id)
-                    await websocket.send_json({
+                    await stream_service.send(session_id, {
                         "type": "unsubscribed",
                         "subscription_id": subscription_id,
                     })
             
             elif msg_type == "pause":
                 subscription_id = data.get("subscription_id")
-                # TODO: Implement pause
-                await websocket.send_json({
-                    "type": "paused",
-                    "subscription_id": subscription_id,
-                })
+                if await stream_service.pause(session_id, subscription_id):
+                    await stream_service.send(session_id, {
+                        "type": "paused",
+                        "subscription_id": subscription_id,
+                    })
+                else:
+                    await _send_not_found(session_id, subscription_id)
             
             elif msg_type == "resume":
                 subscription_id = data.get("subscription_id")
-                # TODO: Implement resume
-                await websocket.send_json({
-                    "type": "resumed",
-                    "subscription_id": subscription_id,
-                })
+                result = await stream_service.resume(session_id, subscription_id)
+                if result is not None:
+                    await stream_service.send(session_id, {
+                        "type": "resumed",
+                        "subscription_id": subscription_id,
+                        **result,
+                    })
+                else:
+                    await _send_not_found(session_id, subscription_id)
             
             elif msg_type == "pong":
                 # Client responded to ping
                 pass
             
             else:
-                await websocket.send_json({
+                await stream_service.send(session_id, {
                     "type": "error",
                     "code": "UNKNOWN_MESSAGE_TYPE",
                     "message": f"Unknown message type: {msg_type}",
@@ -109,3 +224,11 @@ async def websocket_stream(
     except Exception as e:
         await stream_service.disconnect(session_id)
         raise
+
+
+async def _send_not_found(session_id: str, subscription_id: str | None) -> None:
+    await stream_service.send(session_id, {
+        "type": "error",
+        "code": "SUBSCRIPTION_NOT_FOUND",
+        "message": f"Unknown subscription: {subscription_id}",
+    })
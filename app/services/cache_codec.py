@@ -0,0 +1,126 @@
+import json
+import marshal
+import sys
+import zlib
+from datetime import date, datetime
+from typing import Any, Protocol
+
+
+class CacheCodec(Protocol):
+    """Serializes cache values to bytes and back."""
+
+    codec_id: int
+    name: str
+
+    def encode(self, value: Any) -> bytes: ...
+
+    def decode(self, data: bytes) -> Any: ...
+
+
+class JsonCodec:
+    """Compact JSON encoding (portable, human-readable in redis-cli)."""
+
+    codec_id = 1
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MarshalCodec:
+    """
+    Compact binary encoding using the stdlib marshal format.
+    Decoding is a single C call, which makes cache hits cheap.
+    Values are normalized to builtin types on encode.
+
+    marshal is only stable within one Python version and is not meant for
+    data another process could have written, so bodies are tagged with
+    the writer's version and other versions' entries read as misses.
+    Opt-in: only use it when every instance sharing Redis is trusted and
+    runs the same Python.
+    """
+
+    codec_id = 2
+    name = "marshal"
+    VERSION = bytes(sys.version_info[:2])
+
+    def encode(self, value: Any) -> bytes:
+        return self.VERSION + marshal.dumps(_to_primitive(value))
+
+    def decode(self, data: bytes) -> Any:
+        if data[:2] != self.VERSION:
+            raise ValueError("Cache entry written by another Python version")
+        return marshal.loads(data[2:])
+
+
+def _to_primitive(value: Any) -> Any:
+    """Convert value to types marshal can serialize."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_primitive(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_primitive(v) for v in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+CODECS: dict[str, CacheCodec] = {
+    codec.name: codec for codec in (JsonCodec(), MarshalCodec())
+}
+_CODECS_BY_ID: dict[int, CacheCodec] = {codec.codec_id: codec for codec in CODECS.values()}
+
+# Header byte layout: low 7 bits = codec id, high bit = zlib compressed
+_COMPRESSED_FLAG = 0x80
+
+
+def get_codec(name: str) -> CacheCodec:
+    """Get codec by name."""
+    if name not in CODECS:
+        raise ValueError(f"Unknown cache codec: {name}")
+    return CODECS[name]
+
+
+def pack(codec: CacheCodec, value: Any, compress_threshold: int) -> tuple[bytes, int]:
+    """
+    Encode value into a framed payload.
+    Returns (payload, uncompressed_size).
+    """
+    body = codec.encode(value)
+    raw_size = len(body)
+    header = codec.codec_id
+
+    if compress_threshold and raw_size >= compress_threshold:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < raw_size:
+            body = compressed
+            header |= _COMPRESSED_FLAG
+
+    return bytes((header,)) + body, raw_size
+
+
+def unpack(payload: bytes) -> Any:
+    """
+    Decode a framed payload.
+    Raises ValueError for payloads that are corrupt or written by an
+    unknown codec.
+    """
+    if not payload:
+        raise ValueError("Empty cache payload")
+
+    header = payload[0]
+    codec = _CODECS_BY_ID.get(header & ~_COMPRESSED_FLAG)
+    if codec is None:
+        raise ValueError(f"Unknown cache codec id: {header}")
+
+    body = payload[1:]
+    try:
+        if header & _COMPRESSED_FLAG:
+            body = zlib.decompress(body)
+        return codec.decode(body)
+    except (zlib.error, EOFError, TypeError) as e:
+        raise ValueError(f"Corrupt cache payload: {e}") from None
@@ -1,82 +1,156 @@
 import json
 import hashlib
+from dataclasses import asdict, dataclass
 from typing import Any
 
 import redis.asyncio as redis
 
 from app.config import get_settings
+from app.core.redis import get_redis
+from app.services.cache_codec import CacheCodec, get_codec, pack, unpack
+
+
+@dataclass
+class CacheStats:
+    """Per-prefix cache counters."""
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    oversize_skips: int = 0
+    invalidations: int = 0
+    bytes_stored: int = 0
+    bytes_raw: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+            "sets": self.sets,
+            "oversize_skips": self.oversize_skips,
+            "invalidations": self.invalidations,
+            "avg_entry_bytes": self.bytes_stored // self.sets if self.sets else 0,
+            "compression_ratio": (
+                round(self.bytes_stored / self.bytes_raw, 4) if self.bytes_raw else 1.0
+            ),
+        }
 
 
 class CacheService:
     """Redis-based caching service."""
-    
+
     PREFIX = "strym:cache:"
     DEFAULT_TTL = 60  # seconds
-    
+
     def __init__(self):
         self._redis: redis.Redis | None = None
-    
+        self._codec: CacheCodec = get_codec("json")
+        self._compress_threshold = 0
+        self._max_entry_bytes = 0
+        self._stats: dict[str, CacheStats] = {}
+
     async def init(self) -> None:
-        """Initialize Redis connection."""
+        """Attach the shared Redis client."""
         settings = get_settings()
-        self._redis = redis.from_url(settings.redis_url)
-        print("Cache service initialized")
-    
+        self._redis = get_redis()
+        self._codec = get_codec(settings.cache_codec)
+        self._compress_threshold = settings.cache_compress_threshold
+        self._max_entry_bytes = settings.cache_max_entry_bytes
+        print(f"Cache service initialized (codec: {self._codec.name})")
+
     async def close(self) -> None:
-        """Close Redis connection."""
-        if self._redis:
-            await self._redis.close()
+        """Release the shared Redis client."""
+        self._redis = None
         print("Cache service closed")
-    
+
     def _make_key(self, prefix: str, params: dict) -> str:
         """Generate cache key from parameters."""
         # Sort params for consistent key
         sorted_params = json.dumps(params, sort_keys=True, default=str)
         hash_val = hashlib.md5(sorted_params.encode()).hexdigest()[:16]
         return f"{self.PREFIX}{prefix}:{hash_val}"
-    
+
+    def _stats_for(self, prefix: str) -> CacheStats:
+        stats = self._stats.get(prefix)
+        if stats is None:
+            stats = self._stats[prefix] = CacheStats()
+        return stats
+
     async def get(self, prefix: str, params: dict) -> Any | None:
         """Get cached value."""
         if not self._redis:
             return None
-        
+
         key = self._make_key(prefix, params)
         data = await self._redis.get(key)
-        
+        stats = self._stats_for(prefix)
+
         if data:
-            return json.loads(data)
+            try:
+                value = unpack(data)
+            except ValueError:
+                # Corrupt, or written by another format/version - treat as a miss
+                stats.misses += 1
+                return None
+            stats.hits += 1
+            return value
+
+        stats.misses += 1
         return None
-    
+
     async def set(
-        self, 
-        prefix: str, 
-        params: dict, 
-        value: Any, 
+        self,
+        prefix: str,
+        params: dict,
+        value: Any,
         ttl: int | None = None
     ) -> None:
-        """Set cached value."""
+        """Set cached value (skipped when the encoded entry is too large)."""
         if not self._redis:
             return
-        
+
+        data, raw_size = pack(self._codec, value, self._compress_threshold)
+        stats = self._stats_for(prefix)
+
+        if self._max_entry_bytes and len(data) > self._max_entry_bytes:
+            stats.oversize_skips += 1
+            return
+
         key = self._make_key(prefix, params)
-        data = json.dumps(value, default=str)
         await self._redis.setex(key, ttl or self.DEFAULT_TTL, data)
-    
+        stats.sets += 1
+        stats.bytes_stored += len(data)
+        stats.bytes_raw += raw_size
+
     async def invalidate_prefix(self, prefix: str) -> int:
         """Invalidate all cache entries with prefix."""
         if not self._redis:
             return 0
-        
+
         pattern = f"{self.PREFIX}{prefix}:*"
         keys = []
         async for key in self._redis.scan_iter(match=pattern):
             keys.append(key)
-        
+
         if keys:
             await self._redis.delete(*keys)
-        
+            self._stats_for(prefix).invalidations += len(keys)
+
         return len(keys)
 
+    def get_stats(self) -> dict[str, dict]:
+        """Get per-prefix cache metrics for this process."""
+        return {prefix: stats.to_dict() for prefix, stats in self._stats.items()}
+
+    def get_counters(self) -> dict[str, dict]:
+        """Raw per-prefix counters for this process (summable across processes)."""
+        return {prefix: asdict(stats) for prefix, stats in self._stats.items()}
+
 
 # Global instance
 cache_service = CacheService()
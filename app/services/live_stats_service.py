@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import redis.asyncio as redis
+
+from app.core.redis import get_redis
+
+SEVERITIES = ["debug", "info", "warn", "error", "fatal"]
+
+
+class LiveStatsService:
+    """
+    Rolling per-second counters for the last WINDOW seconds.
+
+    Ingest increments local counters (no I/O). Once a second each instance
+    pushes its deltas to shared per-second Redis hashes and reads back the
+    most recent seconds into a ring buffer, so every instance answers
+    /stats/live for the whole cluster straight from memory.
+    """
+
+    PREFIX = "strym:live:"
+    WINDOW = 60  # seconds
+    REFRESH_INTERVAL = 1.0  # seconds
+    SETTLE_SECONDS = 3  # recent seconds re-read each refresh (late flushes)
+    KEY_TTL = 120  # seconds
+
+    def __init__(self):
+        self._redis: redis.Redis | None = None
+        self._pending: dict[tuple[int, str, str], int] = defaultdict(int)
+        self._task: asyncio.Task | None = None
+
+        # Ring buffer: slot = second % WINDOW
+        self._slot_seconds: list[int] = [0] * self.WINDOW
+        self._slots: list[dict[tuple[str, str], int]] = [{} for _ in range(self.WINDOW)]
+        self._slot_by_severity: list[dict[str, int]] = [{} for _ in range(self.WINDOW)]
+        self._slot_by_app: list[dict[str, int]] = [{} for _ in range(self.WINDOW)]
+        # Per-app sums over every ring slot, kept up to date by _apply_second
+        self._app_totals: dict[str, int] = {}
+
+    async def init(self) -> None:
+        """Attach the shared Redis client and start refresh loop."""
+        self._redis = get_redis()
+        await self._refresh(self.WINDOW)
+        self._task = asyncio.create_task(self._run())
+        print("Live stats service initialized")
+
+    async def close(self) -> None:
+        """Stop refresh loop and release the shared Redis client."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._redis = None
+        print("Live stats service closed")
+
+    def record(self, source_app: str, severity: str, count: int = 1) -> None:
+        """Count an ingested log (in-memory, no I/O)."""
+        self._pending[(int(time.time()), source_app, severity)] += count
+
+    def snapshot(self, source_app: str | None = None) -> dict:
+        """Get logs/sec by severity for the last WINDOW seconds."""
+        now = int(time.time())
+        first = now - self.WINDOW
+
+        series = []
+        by_severity = dict.fromkeys(SEVERITIES, 0)
+        for second in range(first, now):
+            idx = second % self.WINDOW
+            values = dict.fromkeys(SEVERITIES, 0)
+            if self._slot_seconds[idx] == second:
+                if source_app is None:
+                    values.update(self._slot_by_severity[idx])
+                else:
+                    slot = self._slots[idx]
+                    for sev in SEVERITIES:
+                        values[sev] = slot.get((source_app, sev), 0)
+            for sev, count in values.items():
+                by_severity[sev] += count
+            series.append({
+                "timestamp": datetime.fromtimestamp(second, tz=timezone.utc),
+                "values": values,
+            })
+
+        total = sum(by_severity.values())
+        result = {
+            "as_of": datetime.fromtimestamp(now, tz=timezone.utc),
+            "window_seconds": self.WINDOW,
+            "total_logs": total,
+            "logs_per_second": round(total / self.WINDOW, 2),
+            "by_severity": by_severity,
+            "series": series,
+        }
+
+        if source_app is None:
+            result["by_app"] = self._by_app(first, now)
+
+        return result
+
+    def _by_app(self, first: int, end: int) -> dict[str, int]:
+        """Per-app counts over the same closed seconds as the series."""
+        by_app = dict(self._app_totals)
+        # Take out slots outside [first, end): the filling second, stale ones
+        for idx, second in enumerate(self._slot_seconds):
+            if not first <= second < end:
+                for app, count in self._slot_by_app[idx].items():
+                    by_app[app] -= count
+        return {app: count for app, count in by_app.items() if count}
+
+    async def _run(self) -> None:
+        """Flush local counts and refresh the ring every second."""
+        while True:
+            await asyncio.sleep(self.REFRESH_INTERVAL)
+            try:
+                await self._flush()
+                await self._refresh(self.SETTLE_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Live stats refresh failed: {e}")
+
+    async def _flush(self) -> None:
+        """Push local per-second deltas to Redis in one pipeline."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, defaultdict(int)
+        pipe = self._redis.pipeline(transaction=False)
+        for (second, app, severity), count in pending.items():
+            key = f"{self.PREFIX}{second}"
+            pipe.hincrby(key, f"{app}|{severity}", count)
+            pipe.expire(key, self.KEY_TTL)
+        await pipe.execute()
+
+    async def _refresh(self, seconds: int) -> None:
+        """Reload the most recent seconds from Redis into the ring."""
+        now = int(time.time())
+        wanted = list(range(now - seconds, now + 1))
+
+        pipe = self._redis.pipeline(transaction=False)
+        for second in wanted:
+            pipe.hgetall(f"{self.PREFIX}{second}")
+        results = await pipe.execute()
+
+        for second, fields in zip(wanted, results):
+            counts = {}
+            for field, value in fields.items():
+                app, severity = field.decode().rsplit("|", 1)
+                counts[(app, severity)] = int(value)
+            self._apply_second(second, counts)
+
+    def _apply_second(self, second: int, counts: dict[tuple[str, str], int]) -> None:
+        """Replace one ring slot (an older second or a stale read of this one)."""
+        idx = second % self.WINDOW
+
+        by_severity: dict[str, int] = defaultdict(int)
+        by_app: dict[str, int] = defaultdict(int)
+        for (app, severity), count in counts.items():
+            by_severity[severity] += count
+            by_app[app] += count
+
+        totals = self._app_totals
+        for app, count in self._slot_by_app[idx].items():
+            remaining = totals[app] - count
+            if remaining:
+                totals[app] = remaining
+            else:
+                del totals[app]
+        for app, count in by_app.items():
+            totals[app] = totals.get(app, 0) + count
+
+        self._slot_seconds[idx] = second
+        self._slots[idx] = counts
+        self._slot_by_severity[idx] = dict(by_severity)
+        self._slot_by_app[idx] = dict(by_app)
+
+
+# Global instance
+live_stats_service = LiveStatsService()
@@ -2,7 +2,13 @@ from app.models.log import LogCreate, LogEntry, LogResponse
 from app.models.common import Pagination
 from app.repositories.log_repository import LogRepository
 from app.core.exceptions import NotFoundError
+from app.core.metrics import INGEST_ROWS
 from app.services.cache_service import cache_service
+from app.services.cardinality_service import cardinality_service
+from app.services.live_stats_service import live_stats_service
+from app.services.pattern_service import pattern_service
+from app.services.rollup_refresh_service import rollup_refresh_service
+from app.services.throughput_service import throughput_service
 
 CACHE_PREFIX = "logs"
 
@@ -13,24 +19,32 @@ class LogService:
 
     async def ingest(self, log: LogCreate) -> LogResponse:
         """Ingest a single log entry."""
-        result = await self.repo.insert(log)
+        result = await self._insert(log)
+        self._record(log)
         
         # Invalidate query cache when new log is added
         await cache_service.invalidate_prefix(CACHE_PREFIX)
         
         return LogResponse(**result)
 
-    async def ingest_bulk(self, logs: list[LogCreate]) -> dict:
-        """Ingest multiple logs."""
+    async def ingest_bulk(self, logs: list[LogCreate]) -> tuple[dict, list[int | None]]:
+        """Ingest multiple logs; also returns each log's pattern_id (None if rejected)."""
         accepted = 0
         errors = []
+        pattern_ids: list[int | None] = []
 
-        for i, log in enumerate(logs):
-            try:
-                await self.repo.insert(log)
-                accepted += 1
-            except Exception as e:
-                errors.append({"index": i, "error": str(e)})
+        # One connection for the batch, released before cache invalidation
+        async with self.repo.pinned():
+            for i, log in enumerate(logs):
+                try:
+                    result = await self._insert(log)
+                    self._record(log)
+                    accepted += 1
+                    pattern_ids.append(result["pattern_id"])
+                except Exception as e:
+                    INGEST_ROWS.inc("rejected")
+                    errors.append({"index": i, "error": str(e)})
+                    pattern_ids.append(None)
 
         # Invalidate cache after bulk insert
         if accepted > 0:
@@ -40,7 +54,32 @@ class LogService:
             "accepted": accepted,
             "rejected": len(errors),
             "errors": errors,
-        }
+        }, pattern_ids
+
+    async def _insert(self, log: LogCreate) -> dict:
+        """Insert log tagged with its message pattern."""
+        pattern = pattern_service.assign(log.message)
+        result = await self.repo.insert(log, pattern_id=pattern.pattern_id)
+
+        # Persist new or generalized templates once (claimed before the await)
+        if not pattern.saved:
+            pattern.saved = True
+            try:
+                await self.repo.upsert_pattern(pattern.pattern_id, pattern.template)
+            except Exception:
+                pattern.saved = False
+                raise
+
+        return result
+
+    def _record(self, log: LogCreate) -> None:
+        """Feed in-memory ingest counters and sketches (no I/O)."""
+        source = log.source
+        INGEST_ROWS.inc("accepted")
+        throughput_service.record(source.app_id)
+        live_stats_service.record(source.app_id, log.severity)
+        cardinality_service.record(source.app_id, source.host, source.instance_id, log.trace_id)
+        rollup_refresh_service.record(log.timestamp)
 
     async def get_by_id(self, log_id: str) -> LogEntry:
         """Get single log by ID."""
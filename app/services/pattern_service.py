@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from app.repositories.log_repository import LogRepository
+
+WILDCARD = "<*>"
+OVERFLOW_KEY = "<overflow>"
+
+# Variable parts masked before clustering (order matters: most specific first)
+_MASKS = [
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+    re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"),
+    re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),
+    re.compile(r"\b0[xX][0-9a-fA-F]+\b"),
+    re.compile(r"\b[0-9a-fA-F]{16,}\b"),
+    re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?![\w.])"),
+]
+
+
+@dataclass
+class PatternCluster:
+    """A log template; pattern_id may be replaced by a stored, smaller id."""
+    pattern_id: int
+    tokens: list[str]
+    size: int = 1
+    saved: bool = False
+    node: "_Node | None" = field(default=None, repr=False, compare=False)
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+@dataclass
+class _Node:
+    children: dict[str, "_Node"] = field(default_factory=dict)
+    clusters: list[PatternCluster] = field(default_factory=list)
+
+
+class PatternService:
+    """
+    Streaming log template miner (Drain).
+
+    Messages are masked, tokenized and routed through a fixed-depth prefix
+    tree (token count, then leading tokens) to a small list of candidate
+    clusters. The most similar cluster above the threshold absorbs the
+    message, turning differing tokens into wildcards.
+
+    A new cluster's id is the fingerprint of its first message, so other
+    processes may pick a different id for the same template. Stored
+    templates are loaded at startup and polled every REFRESH_INTERVAL;
+    when a stored pattern lands on a local cluster with another id, both
+    sides settle on the smaller id and the larger one is recorded as an
+    alias (log_patterns.canonical_id) that /stats/patterns folds in.
+    """
+
+    DEPTH = 4  # tree depth including the token-count level
+    SIMILARITY = 0.5
+    MAX_CHILDREN = 100
+    MAX_CLUSTERS = 10_000
+    MAX_TOKENS = 64
+    REFRESH_INTERVAL = 30.0  # seconds
+    REFRESH_OVERLAP = timedelta(seconds=5)  # re-read rows committed late
+
+    def __init__(self):
+        self._root = _Node()
+        self._by_id: dict[int, PatternCluster] = {}
+        # Past MAX_CLUSTERS unmatched messages share one cluster (saved once)
+        self._overflow = PatternCluster(
+            pattern_id=fingerprint([OVERFLOW_KEY]), tokens=[WILDCARD], size=0,
+        )
+        self._repo: LogRepository | None = None
+        self._task: asyncio.Task | None = None
+        self._synced_at: datetime | None = None
+
+    async def init(self) -> None:
+        """Load stored templates and start polling for other processes' patterns."""
+        self._repo = LogRepository()
+        try:
+            await self._sync()
+        except Exception as e:
+            print(f"Pattern load failed: {e}")
+        self._task = asyncio.create_task(self._run())
+        print(f"Pattern service initialized ({len(self._by_id)} patterns)")
+
+    async def close(self) -> None:
+        """Stop polling."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._repo = None
+        print("Pattern service closed")
+
+    def assign(self, message: str) -> PatternCluster:
+        """Get (or create) the cluster for a message."""
+        tokens = self._tokenize(message)
+        leaf = self._leaf(tokens)
+
+        best = self._match(leaf, tokens)
+        if best is not None:
+            best.size += 1
+            self._generalize(best, tokens)
+            return best
+
+        if len(self._by_id) >= self.MAX_CLUSTERS:
+            self._overflow.size += 1
+            return self._overflow
+        return self._add(leaf, PatternCluster(pattern_id=fingerprint(tokens), tokens=tokens))
+
+    def reconcile(
+        self, pattern_id: int, template: str, canonical_id: int | None = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Merge a stored pattern into the tree.
+        Returns newly found aliases as (pattern_id, canonical_id) to store.
+        """
+        if canonical_id is not None:
+            cluster = self._by_id.get(pattern_id)
+            if cluster is not None:
+                self._rekey(cluster, canonical_id)
+            return []
+
+        tokens = template.split()
+        cluster = self._by_id.get(pattern_id)
+        if cluster is None:
+            leaf = self._leaf(tokens)
+            cluster = self._match(leaf, tokens)
+            if cluster is None:
+                if len(self._by_id) < self.MAX_CLUSTERS:
+                    self._add(leaf, PatternCluster(pattern_id, tokens, size=0, saved=True))
+                return []
+
+        aliases = []
+        if cluster.pattern_id != pattern_id:
+            winner = min(cluster.pattern_id, pattern_id)
+            aliases.append((max(cluster.pattern_id, pattern_id), winner))
+            cluster = self._rekey(cluster, winner)
+        merged = _merge(cluster.tokens, tokens)
+        if merged != cluster.tokens:
+            cluster.tokens = merged
+        if merged != tokens or aliases:
+            cluster.saved = False
+        return aliases
+
+    async def _run(self) -> None:
+        """Poll stored patterns every REFRESH_INTERVAL."""
+        while True:
+            await asyncio.sleep(self.REFRESH_INTERVAL)
+            try:
+                await self._sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Pattern sync failed: {e}")
+
+    async def _sync(self) -> None:
+        """Reconcile patterns stored since the last sync and store new aliases."""
+        since = self._synced_at - self.REFRESH_OVERLAP if self._synced_at else None
+        rows = await self._repo.get_patterns(updated_after=since, limit=self.MAX_CLUSTERS)
+        aliases: dict[int, int] = {}
+        for row in rows:
+            for alias, canonical in self.reconcile(
+                row["pattern_id"], row["template"], row["canonical_id"],
+            ):
+                aliases[alias] = canonical
+            if self._synced_at is None or row["updated_at"] > self._synced_at:
+                self._synced_at = row["updated_at"]
+        for alias, canonical in aliases.items():
+            cluster = self._by_id.get(canonical)
+            template = cluster.template if cluster else WILDCARD
+            await self._repo.alias_pattern(alias, canonical, template)
+
+    def _tokenize(self, message: str) -> list[str]:
+        for mask in _MASKS:
+            message = mask.sub(WILDCARD, message)
+        tokens = message.split()
+        if len(tokens) > self.MAX_TOKENS:
+            tokens = tokens[: self.MAX_TOKENS - 1] + [WILDCARD]
+        return tokens
+
+    def _leaf(self, tokens: list[str]) -> _Node:
+        """Walk (and grow) the prefix tree down to the leaf for tokens."""
+        node = self._child(self._root, str(len(tokens)))
+        for token in tokens[: self.DEPTH - 2]:
+            if any(ch.isdigit() for ch in token):
+                token = WILDCARD
+            node = self._child(node, token)
+        return node
+
+    def _child(self, node: _Node, key: str) -> _Node:
+        child = node.children.get(key)
+        if child is not None:
+            return child
+        if len(node.children) >= self.MAX_CHILDREN:
+            key = WILDCARD
+            child = node.children.get(key)
+            if child is not None:
+                return child
+        child = node.children[key] = _Node()
+        return child
+
+    def _match(self, leaf: _Node, tokens: list[str]) -> PatternCluster | None:
+        """Most similar cluster in a leaf, if above the threshold."""
+        best, best_score = None, -1.0
+        for cluster in leaf.clusters:
+            score = self._similarity(cluster.tokens, tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+        return best if best_score >= self.SIMILARITY else None
+
+    def _similarity(self, template: list[str], tokens: list[str]) -> float:
+        if not tokens:
+            return 1.0
+        same = sum(1 for t, m in zip(template, tokens) if t == m or t == WILDCARD)
+        return same / len(tokens)
+
+    def _generalize(self, cluster: PatternCluster, tokens: list[str]) -> None:
+        merged = _merge(cluster.tokens, tokens)
+        if merged != cluster.tokens:
+            cluster.tokens = merged
+            cluster.saved = False
+
+    def _add(self, leaf: _Node, cluster: PatternCluster) -> PatternCluster:
+        cluster.node = leaf
+        leaf.clusters.append(cluster)
+        self._by_id[cluster.pattern_id] = cluster
+        return cluster
+
+    def _rekey(self, cluster: PatternCluster, pattern_id: int) -> PatternCluster:
+        """Give a cluster another id, folding it into a local cluster that has it."""
+        del self._by_id[cluster.pattern_id]
+        existing = self._by_id.get(pattern_id)
+        if existing is None:
+            cluster.pattern_id = pattern_id
+            self._by_id[pattern_id] = cluster
+            return cluster
+        existing.size += cluster.size
+        self._generalize(existing, cluster.tokens)
+        cluster.node.clusters.remove(cluster)
+        # Callers still holding the old cluster now log the surviving id
+        cluster.pattern_id = pattern_id
+        return existing
+
+
+def _merge(template: list[str], tokens: list[str]) -> list[str]:
+    """Wildcard every position where the two differ."""
+    return [t if t == m else WILDCARD for t, m in zip(template, tokens)]
+
+
+def fingerprint(tokens: list[str]) -> int:
+    """63-bit id for a token sequence (identical across instances)."""
+    digest = hashlib.blake2b(" ".join(tokens).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+# Global instance
+pattern_service = PatternService()
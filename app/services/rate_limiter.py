@@ -0,0 +1,228 @@
+import hashlib
+import math
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+
+import redis.asyncio as redis
+
+from app.config import get_settings
+from app.core.redis import get_redis
+
+# Token bucket refilled at limit/window per second, holding at most limit
+# tokens. Debt carries requests the caller admitted locally since its last
+# call and is charged in full (tokens may go negative, delaying the refill).
+# KEYS[2] tracks which processes called within active_ms, so each can be
+# given its share of the bucket. Redis TIME keeps every instance on one clock.
+_TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local debt = tonumber(ARGV[3])
+local caller = ARGV[4]
+local active_ms = tonumber(ARGV[5])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or limit
+local ts = tonumber(state[2]) or now
+tokens = math.min(limit, tokens + (now - ts) * limit / window_ms) - debt
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window_ms * 2)
+
+redis.call('ZADD', KEYS[2], now, caller)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - active_ms)
+redis.call('PEXPIRE', KEYS[2], active_ms)
+local callers = redis.call('ZCARD', KEYS[2])
+
+local retry_ms = 0
+if allowed == 0 then
+    retry_ms = math.ceil((1 - tokens) * window_ms / limit)
+end
+return {allowed, math.floor(math.max(tokens, 0)), retry_ms, callers}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A budget of requests per window (seconds)."""
+    requests: int
+    window: int
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse '100/60' (requests per seconds)."""
+        requests, _, window = value.partition("/")
+        limit = cls(int(requests), int(window or 1))
+        if limit.requests <= 0 or limit.window <= 0:
+            raise ValueError(f"Invalid rate limit: {value}")
+        return limit
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0  # seconds
+
+
+@dataclass
+class _LocalBudget:
+    """Last Redis answer for a bucket plus requests admitted locally since."""
+    remaining: int
+    checked_at: float
+    share: int  # requests this process may admit before asking Redis again
+    pending: int = field(default=0)
+
+
+class RateLimiter:
+    """
+    Distributed token-bucket rate limiter (one Lua call per checked request).
+
+    Requests carrying the API key are limited per (key, client IP) with the
+    key's limit, others per client IP; routes listed in rate_limit_routes
+    get their own bucket and limit. With the local pre-check, a client far
+    below its limit is admitted in-process and the admitted count is
+    charged to Redis on the next call, so most requests skip the round
+    trip. Each process admits locally at most its share of the bucket
+    above the headroom (split between the processes that called recently),
+    so the total overshoot stays within the bucket however many workers and
+    instances there are.
+    """
+
+    PREFIX = "strym:ratelimit:"
+    LOCAL_TTL = 1.0  # seconds a Redis answer may be reused
+    LOCAL_HEADROOM = 0.5  # share of the bucket that is never admitted locally
+    LOCAL_MAX_BUCKETS = 10_000
+
+    def __init__(self):
+        self._redis: redis.Redis | None = None
+        self._script = None
+        self.ip_limit = RateLimit(100, 60)
+        self.key_limit = RateLimit(1000, 60)
+        self.route_limits: dict[str, RateLimit] = {}
+        self.local_precheck = True
+        self._api_key_id = ""
+        self._api_key = ""
+        self._caller = f"{socket.gethostname()}:{os.getpid()}"
+        self._local: dict[str, _LocalBudget] = {}
+
+        # Metrics (process lifetime)
+        self.allowed_total = 0
+        self.rejected_total = 0
+        self.local_hits = 0
+        self.redis_calls = 0
+        self.redis_errors = 0
+
+    async def init(self) -> None:
+        """Attach the shared Redis client and load limits."""
+        settings = get_settings()
+        self.ip_limit = RateLimit.parse(settings.rate_limit_per_ip)
+        self.key_limit = RateLimit.parse(settings.rate_limit_per_key)
+        self.route_limits = {
+            route: RateLimit.parse(limit) for route, limit in settings.rate_limit_routes.items()
+        }
+        self.local_precheck = settings.rate_limit_local_precheck
+        self._api_key = settings.api_key
+        self._api_key_id = hashlib.blake2b(settings.api_key.encode(), digest_size=6).hexdigest()
+        self._redis = get_redis()
+        self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        print("Rate limiter initialized")
+
+    async def close(self) -> None:
+        """Release the shared Redis client."""
+        self._redis = None
+        print("Rate limiter closed")
+
+    async def check(
+        self,
+        method: str,
+        path: str,
+        client_ip: str,
+        api_key: str | None,
+    ) -> RateLimitResult | None:
+        """Take one request from the caller's bucket (None when limiting is unavailable)."""
+        if not self._redis:
+            return None
+
+        if api_key and api_key == self._api_key:
+            identity, limit = f"key:{self._api_key_id}:{client_ip}", self.key_limit
+        else:
+            identity, limit = f"ip:{client_ip}", self.ip_limit
+
+        route = f"{method} {path}"
+        route_limit = self.route_limits.get(route)
+        if route_limit is not None:
+            bucket, limit = f"{self.PREFIX}{identity}:{route}", route_limit
+        else:
+            bucket = f"{self.PREFIX}{identity}"
+
+        now = time.monotonic()
+        local = self._local.get(bucket) if self.local_precheck else None
+        if (
+            local is not None
+            and now - local.checked_at < self.LOCAL_TTL
+            and local.pending < local.share
+        ):
+            local.pending += 1
+            self.local_hits += 1
+            self.allowed_total += 1
+            return RateLimitResult(True, limit.requests, local.remaining - local.pending)
+
+        debt = local.pending if local is not None else 0
+        try:
+            self.redis_calls += 1
+            allowed, remaining, retry_ms, callers = await self._script(
+                keys=[bucket, f"{bucket}:callers"],
+                args=[limit.requests, limit.window * 1000, debt, self._caller, int(self.LOCAL_TTL * 2000)],
+            )
+        except Exception:
+            # If Redis fails, allow request
+            self.redis_errors += 1
+            return None
+
+        if self.local_precheck:
+            if len(self._local) >= self.LOCAL_MAX_BUCKETS:
+                self._prune_local(now)
+            spare = remaining - limit.requests * self.LOCAL_HEADROOM
+            share = max(0, math.floor(spare / max(callers, 1)))
+            self._local[bucket] = _LocalBudget(remaining=remaining, checked_at=now, share=share)
+
+        if allowed:
+            self.allowed_total += 1
+            return RateLimitResult(True, limit.requests, remaining)
+
+        self.rejected_total += 1
+        return RateLimitResult(False, limit.requests, 0, retry_after=math.ceil(retry_ms / 1000))
+
+    def _prune_local(self, now: float) -> None:
+        """Forget budgets too old to reuse (their pending counts are dropped)."""
+        stale = [b for b, local in self._local.items() if now - local.checked_at >= self.LOCAL_TTL]
+        for bucket in stale:
+            del self._local[bucket]
+        if len(self._local) >= self.LOCAL_MAX_BUCKETS:
+            self._local.clear()
+
+    def get_stats(self) -> dict:
+        """Get decision and Redis round-trip counts for this process."""
+        return {
+            "allowed_total": self.allowed_total,
+            "rejected_total": self.rejected_total,
+            "local_hits": self.local_hits,
+            "redis_calls": self.redis_calls,
+            "redis_errors": self.redis_errors,
+            "local_buckets": len(self._local),
+        }
+
+
+# Global instance
+rate_limiter = RateLimiter()
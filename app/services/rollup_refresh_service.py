@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.core.time_buckets import as_utc, floor_time
+from app.repositories.stats_repository import StatsRepository
+
+
+class RollupRefreshService:
+    """
+    Rolls up logs that arrive after their minute left the refresh window.
+
+    The logs_1m refresh policy only looks back LATE_AFTER (its start_offset
+    in 002), so older client timestamps would be missing from /stats.
+    Ingest notes the minute of each late log (in memory); every
+    FLUSH_INTERVAL the touched ranges are refreshed in every rollup. Minutes
+    older than the shortest retention are skipped, because retention may
+    have trimmed their raw rows. /stats reports that limit as rollup_horizon.
+    """
+
+    LATE_AFTER = timedelta(hours=12)
+    FLUSH_INTERVAL = 10.0  # seconds
+    MERGE_GAP = timedelta(hours=1)  # late minutes closer than this share a refresh
+    MAX_RANGES = 50  # refreshes per flush; the rest wait for the next one
+
+    def __init__(self):
+        self._repo: StatsRepository | None = None
+        self._late: set[datetime] = set()
+        self._task: asyncio.Task | None = None
+        self._retention_days: int | None = None
+        self.refreshed_total = 0
+
+    async def init(self) -> None:
+        """Start the refresh loop."""
+        self._repo = StatsRepository()
+        self._task = asyncio.create_task(self._run())
+        print("Rollup refresh service initialized")
+
+    async def close(self) -> None:
+        """Refresh what is pending and stop."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._repo:
+            try:
+                await self._flush()
+            except Exception:
+                pass
+        self._repo = None
+        print("Rollup refresh service closed")
+
+    @property
+    def horizon(self) -> datetime | None:
+        """Logs timestamped before this that arrive late are not in the rollups."""
+        if self._retention_days is None:
+            return None
+        return datetime.now(timezone.utc) - timedelta(days=self._retention_days)
+
+    def record(self, timestamp: datetime | None) -> None:
+        """Note a log's minute if the refresh policy has moved past it (no I/O)."""
+        if timestamp is None:
+            return
+        timestamp = as_utc(timestamp)
+        if timestamp < datetime.now(timezone.utc) - self.LATE_AFTER:
+            self._late.add(floor_time(timestamp, timedelta(minutes=1)))
+
+    async def _run(self) -> None:
+        """Refresh late ranges every FLUSH_INTERVAL."""
+        while True:
+            try:
+                self._retention_days = await self._repo.get_shortest_retention()
+                await self._flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Rollup refresh failed: {e}")
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+
+    async def _flush(self) -> None:
+        if not self._late or self.horizon is None:
+            return
+        minutes, self._late = sorted(self._late), set()
+        for i, (start, end) in enumerate(_ranges(minutes, self.MERGE_GAP)):
+            # Past MAX_RANGES, or on failure, keep the rest for the next flush
+            if i == self.MAX_RANGES:
+                self._late.update(m for m in minutes if m >= start)
+                return
+            try:
+                await self._repo.refresh_rollups(start, end, self.horizon)
+            except BaseException:
+                self._late.update(m for m in minutes if m >= start)
+                raise
+            self.refreshed_total += 1
+
+
+def _ranges(minutes: list[datetime], gap: timedelta) -> list[tuple[datetime, datetime]]:
+    """Merge sorted minutes into [start, end) ranges, joining those within gap."""
+    ranges: list[tuple[datetime, datetime]] = []
+    for minute in minutes:
+        end = minute + timedelta(minutes=1)
+        if ranges and minute - ranges[-1][1] <= gap:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((minute, end))
+    return ranges
+
+
+# Global instance
+rollup_refresh_service = RollupRefreshService()
@@ -1,11 +1,17 @@
 from datetime import datetime
 
+from app.core.exceptions import ValidationError
+from app.core.time_buckets import as_utc, format_interval, parse_interval
+
+from app.repositories.rate_sketch_repository import RateSketchRepository
 from app.repositories.stats_repository import StatsRepository
+from app.services.rollup_refresh_service import rollup_refresh_service
 
 
 class StatsService:
-    def __init__(self, repo: StatsRepository):
+    def __init__(self, repo: StatsRepository, sketch_repo: RateSketchRepository):
         self.repo = repo
+        self.sketch_repo = sketch_repo
 
     async def get_summary(
         self,
@@ -14,11 +20,68 @@ class StatsService:
         end: datetime | None = None,
     ) -> dict:
         """Get aggregated statistics."""
-        return await self.repo.get_summary(
+        summary = await self.repo.get_summary(
+            source_app=source_app,
+            start=as_utc(start),
+            end=as_utc(end),
+        )
+
+        time_range = summary["time_range"]
+        percentiles = await self.sketch_repo.get_percentiles(
+            start=time_range["start"],
+            end=time_range["end"],
             source_app=source_app,
-            start=start,
-            end=end,
         )
+        summary["logs_per_second"]["p95"] = percentiles[0.95]
+        summary["logs_per_second"]["p99"] = percentiles[0.99]
+        summary["rollup_horizon"] = rollup_refresh_service.horizon
+
+        return summary
+
+    async def get_summaries(
+        self,
+        source_apps: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> dict:
+        """Get statistics for many apps (one scan, one sketch query)."""
+        time_range, summaries = await self.repo.get_summaries(
+            source_apps=source_apps,
+            start=as_utc(start),
+            end=as_utc(end),
+        )
+        horizon = rollup_refresh_service.horizon
+        if not summaries:
+            return {"time_range": time_range, "rollup_horizon": horizon, "summaries": {}}
+
+        percentiles = await self.sketch_repo.get_percentiles_batch(
+            start=time_range["start"],
+            end=time_range["end"],
+            source_apps=list(summaries),
+        )
+        for app, summary in summaries.items():
+            summary["logs_per_second"]["p95"] = percentiles[app][0.95]
+            summary["logs_per_second"]["p99"] = percentiles[app][0.99]
+
+        return {"time_range": time_range, "rollup_horizon": horizon, "summaries": summaries}
+
+    async def get_top_patterns(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        source_app: str | None = None,
+        severity: str | None = None,
+        limit: int = 20,
+    ) -> dict:
+        """Get the noisiest message patterns."""
+        patterns = await self.repo.get_top_patterns(
+            start=as_utc(start),
+            end=as_utc(end),
+            source_app=source_app,
+            severity=severity,
+            limit=limit,
+        )
+        return {"patterns": patterns}
 
     async def get_timeseries(
         self,
@@ -27,16 +90,26 @@ class StatsService:
         interval: str = "5m",
         group_by: str = "severity",
         source_app: str | None = None,
+        max_points: int | None = None,
+        downsample: str = "bucket",
     ) -> dict:
         """Get time-series data for charts."""
-        series = await self.repo.get_timeseries(
-            start=start,
-            end=end,
-            interval=interval,
+        try:
+            bucket_width = parse_interval(interval)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        bucket_width, series = await self.repo.get_timeseries(
+            start=as_utc(start),
+            end=as_utc(end),
+            bucket_width=bucket_width,
             group_by=group_by,
             source_app=source_app,
+            max_points=max_points,
+            downsample=downsample,
         )
         return {
-            "interval": interval,
+            "interval": format_interval(bucket_width),
+            "rollup_horizon": rollup_refresh_service.horizon,
             "series": series,
         }
@@ -0,0 +1,68 @@
+from app.core.exceptions import NotFoundError, ValidationError
+from app.repositories.storage_repository import ALL_APPS, StorageRepository
+
+
+class StorageService:
+    """
+    Compression, retention and chunk sizing for the logs hypertable.
+
+    Chunks hold every app, so whole chunks are only dropped past the
+    longest configured retention; shorter per-app retention is applied
+    by the apply_log_retention job (005 migration) deleting rows.
+    Retention is at least a day, past the rollup refresh windows, so
+    /stats keeps counts for logs that have been dropped.
+    """
+
+    def __init__(self, repo: StorageRepository):
+        self.repo = repo
+
+    async def get_overview(self) -> dict:
+        """Policies, retention and on-disk size."""
+        retention = await self.repo.get_retention()
+        return {
+            **await self.repo.get_policies(),
+            "retention": {
+                "default_days": retention.pop(ALL_APPS, None),
+                "apps": retention,
+            },
+            "size": await self.repo.get_size(),
+        }
+
+    async def set_compression(self, compress_after_days: int) -> dict:
+        """Compress chunks once they are older than compress_after_days."""
+        await self.repo.set_compress_after(compress_after_days)
+        return {"compress_after_days": compress_after_days}
+
+    async def set_chunk_interval(self, hours: int) -> dict:
+        """Size new chunks (existing chunks keep their span)."""
+        await self.repo.set_chunk_interval(hours)
+        return {"chunk_interval_hours": hours}
+
+    async def set_default_retention(self, days: int) -> dict:
+        """Retention for apps without their own."""
+        await self.repo.set_retention(ALL_APPS, days)
+        return await self._sync_drop_policy()
+
+    async def set_app_retention(self, source_app: str, days: int) -> dict:
+        """Give one app its own retention (shorter or longer than the default)."""
+        if source_app == ALL_APPS:
+            raise ValidationError("Use the default retention endpoint for '*'")
+        await self.repo.set_retention(source_app, days)
+        return await self._sync_drop_policy()
+
+    async def remove_app_retention(self, source_app: str) -> dict:
+        """Put an app back on the default retention."""
+        if source_app == ALL_APPS or not await self.repo.delete_retention(source_app):
+            raise NotFoundError("Retention override", source_app)
+        return await self._sync_drop_policy()
+
+    async def _sync_drop_policy(self) -> dict:
+        """Drop whole chunks only past the longest retention anyone needs."""
+        retention = await self.repo.get_retention()
+        drop_after = max(retention.values())
+        await self.repo.set_drop_after(drop_after)
+        return {
+            "default_days": retention.pop(ALL_APPS, None),
+            "apps": retention,
+            "drop_chunks_after_days": drop_after,
+        }
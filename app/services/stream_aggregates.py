@@ -0,0 +1,115 @@
+import asyncio
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from app.services.stream_filters import CompiledFilter
+
+GROUP_FIELDS = ("severity", "source_app", "host")
+_SOURCE_FIELDS = {"source_app": "app_id", "host": "host"}
+ERROR_SEVERITIES = frozenset({"error", "fatal"})
+
+MAX_INTERVAL = 60  # seconds
+MAX_TOP_PATTERNS = 20
+
+
+@dataclass(frozen=True)
+class AggregateSpec:
+    """What an aggregate subscription asks for; equal specs share one Aggregator."""
+    filters_key: str
+    group_by: str = "severity"
+    interval: int = 5
+    top_patterns: int = 5
+
+
+def parse_aggregate(filters: dict[str, Any], options: Any) -> AggregateSpec:
+    """Validate aggregate options ({"group_by", "interval", "top_patterns"})."""
+    options = options or {}
+    if not isinstance(options, dict):
+        raise ValueError("aggregate must be an object")
+    unknown = options.keys() - {"group_by", "interval", "top_patterns"}
+    if unknown:
+        raise ValueError(f"Unknown aggregate option: {', '.join(sorted(unknown))}")
+
+    group_by = options.get("group_by", "severity")
+    interval = options.get("interval", 5)
+    top_patterns = options.get("top_patterns", 5)
+    if group_by not in GROUP_FIELDS:
+        raise ValueError(f"aggregate.group_by must be one of: {', '.join(GROUP_FIELDS)}")
+    if not isinstance(interval, int) or not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError(f"aggregate.interval must be between 1 and {MAX_INTERVAL} seconds")
+    if not isinstance(top_patterns, int) or not 0 <= top_patterns <= MAX_TOP_PATTERNS:
+        raise ValueError(f"aggregate.top_patterns must be between 0 and {MAX_TOP_PATTERNS}")
+
+    return AggregateSpec(
+        filters_key=json.dumps(filters, sort_keys=True),
+        group_by=group_by,
+        interval=interval,
+        top_patterns=top_patterns,
+    )
+
+
+@dataclass
+class Aggregator:
+    """
+    Windowed counts for one AggregateSpec, shared by all its subscribers.
+
+    Logs are folded in as they are broadcast; every interval the window is
+    encoded once into a payload and reset.
+    """
+    spec: AggregateSpec
+    log_filter: CompiledFilter
+    subscribers: dict[Any, Any] = field(default_factory=dict)
+    shards: frozenset[int] | None = None
+    task: asyncio.Task | None = None
+    window_start: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    total: int = 0
+    errors: int = 0
+    counts: Counter = field(default_factory=Counter)
+    patterns: Counter = field(default_factory=Counter)
+
+    def add(self, log_data: dict) -> None:
+        """Fold a matching log into the current window."""
+        severity = log_data.get("severity")
+        self.total += 1
+        if severity in ERROR_SEVERITIES:
+            self.errors += 1
+
+        group_by = self.spec.group_by
+        if group_by == "severity":
+            self.counts[severity] += 1
+        else:
+            self.counts[log_data.get("source", {}).get(_SOURCE_FIELDS[group_by])] += 1
+
+        if self.spec.top_patterns:
+            pattern_id = log_data.get("pattern_id")
+            if pattern_id is not None:
+                self.patterns[pattern_id] += 1
+
+    def roll(self) -> str:
+        """Encode the closed window as JSON and start a new one."""
+        now = datetime.now(timezone.utc)
+        seconds = max((now - self.window_start).total_seconds(), 1e-9)
+        payload = {
+            "window_start": self.window_start.isoformat(),
+            "window_end": now.isoformat(),
+            "group_by": self.spec.group_by,
+            "total": self.total,
+            "logs_per_second": round(self.total / seconds, 2),
+            "error_rate": round(self.errors / self.total, 4) if self.total else 0.0,
+            "counts": {str(key): count for key, count in self.counts.items()},
+        }
+        if self.spec.top_patterns:
+            payload["top_patterns"] = [
+                {"pattern_id": pattern_id, "count": count}
+                for pattern_id, count in self.patterns.most_common(self.spec.top_patterns)
+            ]
+
+        self.window_start = now
+        self.total = 0
+        self.errors = 0
+        self.counts = Counter()
+        self.patterns = Counter()
+        return json.dumps(payload)
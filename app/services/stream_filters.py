@@ -0,0 +1,258 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import re2
+
+from app.services.subscription_index import SEVERITY_ORDER, indexed_values
+
+Predicate = Callable[[dict], bool]
+
+# Keys answered by the subscription index when they appear at the top level
+INDEXED_KEYS = frozenset({"source_app", "severity", "min_severity"})
+
+MAX_DEPTH = 8
+MAX_VALUES = 1000
+MAX_PATTERN_LENGTH = 512
+# RE2 memory budget per compiled regex; larger automata fail to compile
+MAX_PATTERN_MEMORY = 1 << 20
+
+
+class FilterError(ValueError):
+    """Raised when a subscription filter is invalid."""
+
+
+@dataclass(frozen=True)
+class CompiledFilter:
+    """
+    A subscription filter compiled once at subscribe time.
+
+    apps/severities feed the subscription index (None = any); predicate
+    checks everything the index cannot, or is None when the index alone
+    decides.
+    """
+    apps: frozenset[str] | None
+    severities: frozenset[str] | None
+    predicate: Predicate | None
+
+    def matches(self, log_data: dict) -> bool:
+        """Check a log against the whole filter (index keys included)."""
+        if self.apps is not None and log_data.get("source", {}).get("app_id") not in self.apps:
+            return False
+        if self.severities is not None and log_data.get("severity") not in self.severities:
+            return False
+        return self.predicate is None or self.predicate(log_data)
+
+
+def compile_filter(filters: Any) -> CompiledFilter:
+    """
+    Compile a subscription filter.
+
+    Top-level keys are ANDed:
+    - source_app, severity, host, instance, trace_id: a value or list of values
+    - min_severity: lowest severity to receive
+    - message: a substring, or {"contains": "...", "ignore_case": bool} or {"regex": "..."}
+    - metadata: {"key": value, "nested.key": value}, equality on each path
+    - all / any: lists of filters; not: a filter
+    """
+    if filters is None:
+        filters = {}
+    if not isinstance(filters, dict):
+        raise FilterError("filters must be an object")
+
+    checks = _compile_checks(filters, depth=0, skip=INDEXED_KEYS)
+    apps, severities = indexed_values(filters)
+    return CompiledFilter(apps=apps, severities=severities, predicate=_all(checks))
+
+
+def _compile(filters: Any, depth: int) -> Predicate:
+    if not isinstance(filters, dict):
+        raise FilterError("nested filters must be objects")
+    return _all(_compile_checks(filters, depth, skip=frozenset())) or _always
+
+
+def _compile_checks(filters: dict, depth: int, skip: frozenset[str]) -> list[Predicate]:
+    if depth > MAX_DEPTH:
+        raise FilterError(f"filters nest deeper than {MAX_DEPTH} levels")
+
+    checks: list[Predicate] = []
+    for key, value in filters.items():
+        compiler = _COMPILERS.get(key)
+        if compiler is None:
+            raise FilterError(f"Unknown filter: {key}")
+        check = compiler(value, depth)
+        if key not in skip:
+            checks.append(check)
+    return checks
+
+
+def _all(checks: list[Predicate]) -> Predicate | None:
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(log: dict) -> bool:
+        for check in checks:
+            if not check(log):
+                return False
+        return True
+
+    return check_all
+
+
+def _always(log: dict) -> bool:
+    return True
+
+
+def _values(name: str, value: Any) -> frozenset[str]:
+    values = value if isinstance(value, list) else [value]
+    if not values or len(values) > MAX_VALUES:
+        raise FilterError(f"{name} must have between 1 and {MAX_VALUES} values")
+    if not all(isinstance(v, str) for v in values):
+        raise FilterError(f"{name} values must be strings")
+    return frozenset(values)
+
+
+def _compile_source_app(value: Any, depth: int) -> Predicate:
+    apps = _values("source_app", value)
+    return lambda log: log.get("source", {}).get("app_id") in apps
+
+
+def _compile_host(value: Any, depth: int) -> Predicate:
+    hosts = _values("host", value)
+    return lambda log: log.get("source", {}).get("host") in hosts
+
+
+def _compile_instance(value: Any, depth: int) -> Predicate:
+    instances = _values("instance", value)
+    return lambda log: log.get("source", {}).get("instance_id") in instances
+
+
+def _compile_trace_id(value: Any, depth: int) -> Predicate:
+    trace_ids = _values("trace_id", value)
+    return lambda log: log.get("trace_id") in trace_ids
+
+
+def _compile_severity(value: Any, depth: int) -> Predicate:
+    severities = _values("severity", value)
+    unknown = severities - SEVERITY_ORDER.keys()
+    if unknown:
+        raise FilterError(f"Unknown severity: {', '.join(sorted(unknown))}")
+    return lambda log: log.get("severity") in severities
+
+
+def _compile_min_severity(value: Any, depth: int) -> Predicate:
+    if value not in SEVERITY_ORDER:
+        raise FilterError(f"Unknown severity: {value}")
+    min_level = SEVERITY_ORDER[value]
+    allowed = frozenset(s for s, level in SEVERITY_ORDER.items() if level >= min_level)
+    return lambda log: log.get("severity") in allowed
+
+
+def _compile_message(value: Any, depth: int) -> Predicate:
+    if isinstance(value, str):
+        value = {"contains": value}
+    if not isinstance(value, dict) or len(value.keys() & {"contains", "regex"}) != 1:
+        raise FilterError("message must be a string, {\"contains\": ...} or {\"regex\": ...}")
+    if value.keys() - {"contains", "regex", "ignore_case"}:
+        raise FilterError("message accepts only contains, regex and ignore_case")
+
+    ignore_case = bool(value.get("ignore_case", False))
+
+    if "regex" in value:
+        pattern = value["regex"]
+        if not isinstance(pattern, str) or len(pattern) > MAX_PATTERN_LENGTH:
+            raise FilterError(f"message.regex must be a string of at most {MAX_PATTERN_LENGTH} characters")
+        search = _regex_search(pattern, ignore_case)
+        return lambda log: search(log.get("message") or "") is not None
+
+    needle = value["contains"]
+    if not isinstance(needle, str) or not needle:
+        raise FilterError("message.contains must be a non-empty string")
+    if ignore_case:
+        needle = needle.casefold()
+        return lambda log: needle in (log.get("message") or "").casefold()
+    return lambda log: needle in (log.get("message") or "")
+
+
+def _regex_search(pattern: str, ignore_case: bool) -> Callable[[str], Any]:
+    # Predicates run inline in the pub/sub listener, so a backtracking engine
+    # would let one pattern like (a+)+$ stall every subscriber. RE2 matches in
+    # linear time (no backreferences or lookaround).
+    options = re2.Options()
+    options.case_sensitive = not ignore_case
+    options.max_mem = MAX_PATTERN_MEMORY
+    options.never_capture = True
+    options.log_errors = False
+    try:
+        return re2.compile(pattern, options).search
+    except re2.error as e:
+        reason = e.args[0].decode() if e.args and isinstance(e.args[0], bytes) else e
+        raise FilterError(f"Invalid message.regex: {reason}") from None
+
+
+_MISSING = object()
+
+
+def _compile_metadata(value: Any, depth: int) -> Predicate:
+    if not isinstance(value, dict) or not value:
+        raise FilterError("metadata must be a non-empty object of path: value")
+
+    paths = [(tuple(path.split(".")), expected) for path, expected in value.items()]
+
+    def check_metadata(log: dict) -> bool:
+        metadata = log.get("metadata")
+        if not metadata:
+            return False
+        for path, expected in paths:
+            current: Any = metadata
+            for part in path:
+                if not isinstance(current, dict):
+                    return False
+                current = current.get(part, _MISSING)
+            if current != expected:
+                return False
+        return True
+
+    return check_metadata
+
+
+def _compile_all(value: Any, depth: int) -> Predicate:
+    if not isinstance(value, list) or not value:
+        raise FilterError("all must be a non-empty list of filters")
+    return _all([_compile(f, depth + 1) for f in value]) or _always
+
+
+def _compile_any(value: Any, depth: int) -> Predicate:
+    if not isinstance(value, list) or not value:
+        raise FilterError("any must be a non-empty list of filters")
+    checks = [_compile(f, depth + 1) for f in value]
+
+    def check_any(log: dict) -> bool:
+        for check in checks:
+            if check(log):
+                return True
+        return False
+
+    return check_any
+
+
+def _compile_not(value: Any, depth: int) -> Predicate:
+    check = _compile(value, depth + 1)
+    return lambda log: not check(log)
+
+
+_COMPILERS: dict[str, Callable[[Any, int], Predicate]] = {
+    "source_app": _compile_source_app,
+    "severity": _compile_severity,
+    "min_severity": _compile_min_severity,
+    "host": _compile_host,
+    "instance": _compile_instance,
+    "trace_id": _compile_trace_id,
+    "message": _compile_message,
+    "metadata": _compile_metadata,
+    "all": _compile_all,
+    "any": _compile_any,
+    "not": _compile_not,
+}
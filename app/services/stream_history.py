@@ -0,0 +1,250 @@
+import asyncio
+import json
+import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import redis.asyncio as redis
+
+from app.models.log import LogEntry
+from app.repositories.log_repository import LogRepository
+from app.services.stream_filters import CompiledFilter
+
+# (milliseconds, sequence) of a Redis Stream id; sequence -1 sorts before any entry in that ms
+Cursor = tuple[int, int]
+
+_CURSOR_RE = re.compile(r"^(\d+)-(\d+)$")
+_CURSOR_HEAD = '{"cursor":"'
+
+# Append to the capped stream and publish in one step, so every published
+# log is also replayable. The stream id becomes the log's cursor.
+_APPEND_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'd', ARGV[2])
+redis.call('PUBLISH', ARGV[3], '{"cursor":"' .. id .. '",' .. string.sub(ARGV[2], 2))
+return id
+"""
+
+
+def parse_since(value: Any) -> Cursor:
+    """Parse a subscription's since: a log cursor ('<ms>-<seq>') or an ISO timestamp."""
+    if isinstance(value, str):
+        match = _CURSOR_RE.match(value)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+        try:
+            ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+        else:
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            return int(ts.timestamp() * 1000), -1
+    raise ValueError("since must be a log cursor or an ISO 8601 timestamp")
+
+
+def cursor_of(encoded: str) -> Cursor:
+    """Read the cursor spliced into the head of an encoded log."""
+    end = encoded.index('"', len(_CURSOR_HEAD))
+    ms, seq = encoded[len(_CURSOR_HEAD):end].split("-")
+    return int(ms), int(seq)
+
+
+def with_cursor(cursor: str, encoded: str) -> str:
+    return _CURSOR_HEAD + cursor + '",' + encoded[1:]
+
+
+@dataclass
+class HistoryRead:
+    """Outcome of one read_after, filled in as its pages are consumed."""
+    truncated: bool = False
+
+
+class StreamHistory:
+    """
+    Recent logs kept for resuming streams.
+
+    Every broadcast log is appended to a capped Redis Stream and published
+    in one script, so stream ids double as cursors. Reads older than the
+    stream fall back to the database, matched on created_at: like the
+    stream id it is set by the server when the log arrives, whereas the
+    log timestamp is whatever the client sent. A semaphore bounds
+    concurrent backfills so a reconnect storm queues up instead of
+    flooding Redis and the database.
+    """
+
+    KEY = "strym:logs:recent"
+    MAXLEN = 100_000  # approximate number of logs kept in the stream
+    MAX_LOGS = 10_000  # per backfill
+    MAX_SCANNED = 100_000  # database rows examined per backfill
+    CONCURRENCY = 4
+    PAGE_SIZE = 500
+
+    def __init__(self):
+        self._redis: redis.Redis | None = None
+        self._append: Any = None
+        self.maxlen = self.MAXLEN
+        self.max_logs = self.MAX_LOGS
+        self._semaphore = asyncio.Semaphore(self.CONCURRENCY)
+
+    def init(self, redis_client: redis.Redis, maxlen: int, max_logs: int, concurrency: int) -> None:
+        """Bind to the stream service's Redis client."""
+        self._redis = redis_client
+        self._append = redis_client.register_script(_APPEND_SCRIPT)
+        self.maxlen = maxlen
+        self.max_logs = max_logs
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None
+
+    async def publish(self, channel: str, encoded: str) -> str:
+        """Append a log to the stream and publish it with its cursor."""
+        cursor = await self._append(keys=[self.KEY], args=[self.maxlen, encoded, channel])
+        return cursor.decode() if isinstance(cursor, bytes) else cursor
+
+    async def read_after(
+        self,
+        after: Cursor,
+        log_filter: CompiledFilter,
+        read: HistoryRead,
+    ) -> AsyncIterator[list[str]]:
+        """
+        Yield pages of matching encoded logs (with cursors) newer than after,
+        oldest first. read.truncated is set when the read stops before the end.
+        """
+        remaining = self.max_logs
+
+        async with self._semaphore:
+            oldest = await self._redis.xrange(self.KEY, "-", "+", count=1)
+            oldest_ms = _parse_id(oldest[0][0])[0] if oldest else None
+
+            # Gap older than the stream: page through it in the database.
+            # A cursor already handed out for a log excludes its millisecond.
+            sent_ids: set[str] = set()
+            if oldest_ms is None or oldest_ms > after[0]:
+                start_ms = after[0] if after[1] < 0 else after[0] + 1
+                end_ms = oldest_ms if oldest_ms is not None else _now_ms()
+                async for page in self._read_database(start_ms, end_ms, log_filter, read, sent_ids):
+                    remaining -= len(page)
+                    yield page
+                if read.truncated:
+                    return
+
+            ms, seq = after
+            start = f"{ms}-0" if seq < 0 else f"({ms}-{seq}"
+            while remaining > 0:
+                rows = await self._redis.xrange(self.KEY, start, "+", count=self.PAGE_SIZE)
+                if not rows:
+                    break
+
+                page = []
+                for entry_id, fields in rows:
+                    encoded = fields[b"d"].decode()
+                    log_data = json.loads(encoded)
+                    if not log_filter.matches(log_data):
+                        continue
+                    # Inserted just before the oldest stream entry but published after it
+                    if sent_ids and log_data.get("id") in sent_ids:
+                        continue
+                    page.append(with_cursor(entry_id.decode(), encoded))
+                if len(page) > remaining:
+                    page = page[:remaining]
+                    read.truncated = True
+                remaining -= len(page)
+                if page:
+                    yield page
+
+                start = "(" + rows[-1][0].decode()
+                if len(rows) < self.PAGE_SIZE:
+                    break
+            else:
+                read.truncated = True
+
+    async def _read_database(
+        self,
+        start_ms: int,
+        end_ms: int,
+        log_filter: CompiledFilter,
+        read: HistoryRead,
+        sent_ids: set[str],
+    ) -> AsyncIterator[list[str]]:
+        """
+        Page logs ingested in [start_ms, end_ms) out of the database, up to
+        max_logs. Only apps/severities are filtered in SQL, so a page can
+        match few rows; paging continues until the range is exhausted or
+        MAX_SCANNED rows have been examined.
+        """
+        apps, severities = log_filter.apps, log_filter.severities
+        repo = LogRepository()
+        remaining = self.max_logs
+        scanned = 0
+        last = None
+
+        while True:
+            if remaining <= 0 or scanned >= self.MAX_SCANNED:
+                read.truncated = True
+                return
+
+            entries = await repo.get_ingested_range(
+                _from_ms(start_ms),
+                _from_ms(end_ms),
+                sorted(apps) if apps is not None else None,
+                sorted(severities) if severities is not None else None,
+                after=last,
+                limit=self.PAGE_SIZE,
+            )
+            scanned += len(entries)
+
+            page = []
+            for entry in entries:
+                log_data = _entry_payload(entry)
+                if log_filter.matches(log_data):
+                    page.append(_encode_entry(entry, log_data))
+                    sent_ids.add(entry.id)
+            if len(page) > remaining:
+                page = page[:remaining]
+                read.truncated = True
+            remaining -= len(page)
+            if page:
+                yield page
+
+            if len(entries) < self.PAGE_SIZE or read.truncated:
+                return
+            last = (entries[-1].created_at, int(entries[-1].id))
+
+
+def _parse_id(entry_id: bytes) -> Cursor:
+    ms, seq = entry_id.decode().split("-")
+    return int(ms), int(seq)
+
+
+def _from_ms(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _now_ms() -> int:
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def _entry_payload(entry: LogEntry) -> dict:
+    """Shape a stored log like a live broadcast."""
+    return {
+        "id": entry.id,
+        "timestamp": entry.timestamp.isoformat(),
+        "source": entry.source.model_dump(),
+        "severity": entry.severity,
+        "message": entry.message,
+        "metadata": entry.metadata,
+        "trace_id": entry.trace_id,
+        "span_id": entry.span_id,
+        "pattern_id": entry.pattern_id,
+    }
+
+
+def _encode_entry(entry: LogEntry, log_data: dict) -> str:
+    """Encode a stored log; its cursor is when it was ingested."""
+    cursor = f"{int(entry.created_at.timestamp() * 1000)}-0"
+    return with_cursor(cursor, json.dumps(log_data))
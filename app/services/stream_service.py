@@ -1,5 +1,9 @@
 import asyncio
 import json
+import random
+import time
+import zlib
+from collections import Counter, deque
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -7,6 +11,14 @@ from fastapi import WebSocket
 import redis.asyncio as redis
 
 from app.config import get_settings
+from app.core.redis import get_redis
+from app.core.metrics import STREAM_FANOUT, STREAM_PUBSUB_LAG
+from app.services.stream_aggregates import AggregateSpec, Aggregator, parse_aggregate
+from app.services.stream_filters import CompiledFilter, compile_filter
+from app.services.stream_history import Cursor, HistoryRead, StreamHistory, cursor_of, parse_since
+from app.services.subscription_index import SubscriptionIndex
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "coalesce", "disconnect")
 
 
 @dataclass
@@ -14,7 +26,68 @@ class Subscription:
     """Represents a client subscription to log events."""
     subscription_id: str
     filters: dict[str, Any] = field(default_factory=dict)
+    compiled: CompiledFilter = field(default_factory=lambda: compile_filter({}))
     paused: bool = False
+    overflow: str = "drop_oldest"
+    dropped: int = 0
+    # Batch mode: up to batch_size logs or batch_ms milliseconds per frame (0 = off)
+    batch_size: int = 0
+    batch_ms: int = 0
+    pending: list[str] = field(default_factory=list)
+    flush_handle: asyncio.TimerHandle | None = None
+    # Logs buffered while paused (oldest evicted first), sized in bytes
+    paused_buffer: deque[str] = field(default_factory=deque)
+    paused_bytes: int = 0
+    paused_dropped: int = 0
+    # Set while history since this cursor is sent; live logs are buffered meanwhile
+    since: Cursor | None = None
+    backfilling: bool = False
+    # Channel shards this subscription needs (None = all, e.g. no source_app filter)
+    shards: frozenset[int] | None = None
+    # Set for aggregate subscriptions, which receive windowed counts instead of logs
+    aggregate: AggregateSpec | None = None
+    # Egress caps: keep a sample fraction of logs, then at most max_rate per second (0 = off)
+    sample: float = 1.0
+    max_rate: float = 0.0
+    tokens: float = 0.0
+    refilled_at: float = 0.0
+    sampled_out: int = 0
+    rate_limited: int = 0
+    # Frame heads spliced around pre-encoded log payloads
+    log_prefix: str = field(init=False, repr=False)
+    batch_prefix: str = field(init=False, repr=False)
+    aggregate_prefix: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        sub_id = json.dumps(self.subscription_id)
+        self.log_prefix = '{"type":"log","subscription_id":' + sub_id + ',"data":'
+        self.batch_prefix = '{"type":"logs","subscription_id":' + sub_id + ',"data":['
+        self.aggregate_prefix = '{"type":"aggregate","subscription_id":' + sub_id + ',"data":'
+
+    @property
+    def throttled(self) -> bool:
+        return self.sample < 1.0 or self.max_rate > 0
+
+    def admit(self) -> bool:
+        """Apply sampling and the token bucket (burst of one second's worth)."""
+        if self.sample < 1.0 and random.random() >= self.sample:
+            self.sampled_out += 1
+            return False
+        if self.max_rate:
+            now = time.monotonic()
+            capacity = max(self.max_rate, 1.0)
+            self.tokens = min(capacity, self.tokens + (now - self.refilled_at) * self.max_rate)
+            self.refilled_at = now
+            if self.tokens < 1.0:
+                self.rate_limited += 1
+                return False
+            self.tokens -= 1.0
+        return True
+
+    def cancel_flush(self) -> None:
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
 
 
 @dataclass
@@ -23,34 +96,111 @@ class ConnectionState:
     websocket: WebSocket
     session_id: str
     subscriptions: dict[str, Subscription] = field(default_factory=dict)
+    # Outgoing text frames: (subscription or None for control frames, frame, log count)
+    queue: deque[tuple[Subscription | None, str, int]] = field(default_factory=deque)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    writer_task: asyncio.Task | None = None
+    backfill_tasks: set[asyncio.Task] = field(default_factory=set)
+    max_queue_depth: int = 0
+    closing: bool = False
 
 
 class StreamService:
     """
     Manages WebSocket connections and message distribution.
-    Uses Redis pub/sub for multi-instance support.
+    Uses Redis pub/sub for multi-instance support, and a capped Redis
+    Stream of recent logs so subscriptions can resume from a cursor.
+
+    Logs are published on one of CHANNEL_SHARDS channels chosen by
+    source_app, and each instance subscribes only to the shards its local
+    subscriptions need. Subscriptions without a source_app filter switch
+    the instance to a single pattern subscription over all shards.
     """
     
     CHANNEL = "strym:logs"
+    CHANNEL_SHARDS = 64
+    QUEUE_SIZE = 1000  # outgoing frames per connection
+    SEND_TIMEOUT = 5.0  # seconds before a stalled socket is dropped
+    MAX_BATCH_LOGS = 1000
+    MAX_BATCH_MS = 10_000
+    PAUSE_BUFFER_BYTES = 1_048_576  # per paused subscription
+    PAUSE_TOTAL_BYTES = 64 * 1_048_576  # all paused subscriptions in this process
+    REPLAY_BATCH_LOGS = 100  # logs per frame when draining a pause buffer
+    MAX_RATE = 100_000  # highest max_rate a subscription may ask for, logs/sec
+    SUPPRESSED_INTERVAL = 5.0  # seconds between suppressed-log reports
 
     def __init__(self):
         self.connections: dict[str, ConnectionState] = {}
+        self._index = SubscriptionIndex()
         self._lock = asyncio.Lock()
         self._redis: redis.Redis | None = None
         self._pubsub: redis.client.PubSub | None = None
         self._listener_task: asyncio.Task | None = None
+        self.history = StreamHistory()
+
+        # Channel interest: shard -> subscriptions needing it, plus all-shard subscriptions
+        self.channel_shards = self.CHANNEL_SHARDS
+        self._shard_refs: Counter[int] = Counter()
+        self._wildcard_refs = 0
+        self._subscribed_shards: set[int] = set()
+        self._pattern_subscribed = False
+        self._pattern_active = False  # as seen by the listener
+        self._channels_lock = asyncio.Lock()
+        self._channels_changed = asyncio.Event()
+
+        # Aggregate subscriptions: one Aggregator per distinct spec, indexed like subscriptions
+        self._aggregators: dict[AggregateSpec, Aggregator] = {}
+        self._aggregate_index = SubscriptionIndex()
+
+        # Sampled or rate-capped subscriptions, reported on periodically
+        self._throttled: dict[tuple[str, str], tuple[ConnectionState, Subscription]] = {}
+        self._report_task: asyncio.Task | None = None
+
+        # Fire-and-forget tasks, referenced until done
+        self._background: set[asyncio.Task] = set()
+
+        self.queue_size = self.QUEUE_SIZE
+        self.send_timeout = self.SEND_TIMEOUT
+        self.default_overflow = OVERFLOW_POLICIES[0]
+        self.pause_buffer_bytes = self.PAUSE_BUFFER_BYTES
+        self.pause_total_bytes = self.PAUSE_TOTAL_BYTES
+        self.paused_bytes_total = 0
+
+        # Metrics (process lifetime)
+        self.dropped_total = 0
+        self.slow_disconnects = 0
+        self.paused_dropped_total = 0
+        self.backfilled_total = 0
+        self.suppressed_total = 0
 
     async def init(self) -> None:
-        """Initialize Redis connection and start listener."""
+        """Attach the shared Redis client and start listener."""
         settings = get_settings()
-        self._redis = redis.from_url(settings.redis_url)
+        self.queue_size = settings.stream_queue_size
+        self.send_timeout = settings.stream_send_timeout
+        self.default_overflow = settings.stream_overflow_policy
+        self.pause_buffer_bytes = settings.stream_pause_buffer_bytes
+        self.pause_total_bytes = settings.stream_pause_total_bytes
+        self.channel_shards = settings.stream_channel_shards
+        self._redis = get_redis()
+        self.history.init(
+            self._redis,
+            maxlen=settings.stream_history_maxlen,
+            max_logs=settings.stream_backfill_max_logs,
+            concurrency=settings.stream_backfill_concurrency,
+        )
         self._pubsub = self._redis.pubsub()
-        await self._pubsub.subscribe(self.CHANNEL)
         self._listener_task = asyncio.create_task(self._listen_for_messages())
-        print(f"Redis pub/sub initialized on channel: {self.CHANNEL}")
+        await self._update_channels()
+        print(f"Redis pub/sub initialized on {self.channel_shards} channels: {self.CHANNEL}:*")
 
     async def close(self) -> None:
-        """Close Redis connection."""
+        """Stop the pub/sub listener and release the shared Redis client."""
+        for aggregator in self._aggregators.values():
+            if aggregator.task:
+                aggregator.task.cancel()
+        if self._report_task:
+            self._report_task.cancel()
         if self._listener_task:
             self._listener_task.cancel()
             try:
@@ -58,119 +208,642 @@ class StreamService:
             except asyncio.CancelledError:
                 pass
         if self._pubsub:
-            await self._pubsub.unsubscribe(self.CHANNEL)
+            await self._pubsub.unsubscribe()
+            await self._pubsub.punsubscribe()
             await self._pubsub.close()
-        if self._redis:
-            await self._redis.close()
+        self._redis = None
         print("Redis pub/sub closed")
 
     async def _listen_for_messages(self) -> None:
         """Listen for messages from Redis and broadcast to local connections."""
         try:
-            async for message in self._pubsub.listen():
-                if message["type"] == "message":
-                    data = json.loads(message["data"])
-                    await self._broadcast_to_local(data)
+            while True:
+                if not self._pubsub.subscribed:
+                    # listen() returns when nothing is subscribed; wait for interest
+                    await self._channels_changed.wait()
+                    self._channels_changed.clear()
+                    continue
+
+                async for message in self._pubsub.listen():
+                    kind = message["type"]
+                    # While the pattern is active a shard log may also arrive on
+                    # a channel subscription being phased out; take one copy only
+                    if kind == "psubscribe":
+                        self._pattern_active = True
+                    elif kind == "punsubscribe":
+                        self._pattern_active = False
+                    elif kind in ("message", "pmessage"):
+                        if (kind == "pmessage") != self._pattern_active:
+                            continue
+                        encoded = message["data"].decode()
+                        # Cursor ids are Redis clock milliseconds at publish time
+                        lag = time.time() - cursor_of(encoded)[0] / 1000
+                        STREAM_PUBSUB_LAG.observe(max(lag, 0.0))
+                        start = time.perf_counter()
+                        await self._broadcast_to_local(json.loads(encoded), encoded)
+                        STREAM_FANOUT.observe(time.perf_counter() - start)
+                        # Let connection writers drain between buffered messages
+                        await asyncio.sleep(0)
         except asyncio.CancelledError:
             pass
 
+    def _shard(self, source_app: str) -> int:
+        return zlib.crc32(source_app.encode()) % self.channel_shards
+
+    def _channel(self, shard: int) -> str:
+        return f"{self.CHANNEL}:{shard}"
+
+    def _add_interest(self, apps: frozenset[str] | None) -> frozenset[int] | None:
+        """Count interest in the shards of apps; returns them (None = all)."""
+        if apps is None:
+            self._wildcard_refs += 1
+            return None
+        shards = frozenset(self._shard(app) for app in apps)
+        self._shard_refs.update(shards)
+        return shards
+
+    def _remove_interest(self, shards: frozenset[int] | None) -> None:
+        if shards is None:
+            self._wildcard_refs -= 1
+        else:
+            self._shard_refs.subtract(shards)
+
+    def _release(self, conn: ConnectionState, sub: Subscription) -> None:
+        """Drop a removed subscription's timers, pause buffer and channel interest."""
+        key = (conn.session_id, sub.subscription_id)
+        if sub.aggregate is not None:
+            self._leave_aggregate(key, sub.aggregate)
+            return
+        self._index.remove(key)
+        if self._throttled.pop(key, None) and not self._throttled and self._report_task:
+            self._report_task.cancel()
+            self._report_task = None
+        sub.cancel_flush()
+        self._clear_paused(sub)
+        self._remove_interest(sub.shards)
+
+    async def _update_channels(self) -> None:
+        """Subscribe to newly needed shards and drop unneeded ones."""
+        if not self._pubsub:
+            return
+
+        pattern = f"{self.CHANNEL}:*"
+        async with self._channels_lock:
+            if self._wildcard_refs:
+                wanted: set[int] = set()
+                if not self._pattern_subscribed:
+                    await self._pubsub.psubscribe(pattern)
+                    self._pattern_subscribed = True
+            else:
+                wanted = {shard for shard, refs in self._shard_refs.items() if refs > 0}
+
+            # Subscribe before unsubscribing, so a switch never leaves a gap
+            added = wanted - self._subscribed_shards
+            removed = self._subscribed_shards - wanted
+            if added:
+                await self._pubsub.subscribe(*(self._channel(shard) for shard in added))
+            if not self._wildcard_refs and self._pattern_subscribed:
+                await self._pubsub.punsubscribe(pattern)
+                self._pattern_subscribed = False
+            if removed:
+                await self._pubsub.unsubscribe(*(self._channel(shard) for shard in removed))
+
+            self._subscribed_shards = wanted
+            self._shard_refs = +self._shard_refs
+            self._channels_changed.set()
+
     async def connect(self, websocket: WebSocket, session_id: str) -> None:
         """Register new WebSocket connection."""
         await websocket.accept()
+        conn = ConnectionState(websocket=websocket, session_id=session_id)
+        conn.writer_task = asyncio.create_task(self._write_loop(conn))
         async with self._lock:
-            self.connections[session_id] = ConnectionState(
-                websocket=websocket,
-                session_id=session_id,
-            )
+            self.connections[session_id] = conn
 
     async def disconnect(self, session_id: str) -> None:
-        """Remove WebSocket connection."""
+        """Remove WebSocket connection and stop its writer."""
         async with self._lock:
-            if session_id in self.connections:
-                del self.connections[session_id]
+            conn = self.connections.pop(session_id, None)
+            if conn:
+                for sub in conn.subscriptions.values():
+                    self._release(conn, sub)
+
+        if conn and conn.writer_task and conn.writer_task is not asyncio.current_task():
+            conn.writer_task.cancel()
+        if conn:
+            for task in conn.backfill_tasks:
+                task.cancel()
+        if conn and conn.subscriptions:
+            await self._update_channels()
+
+    async def send(self, session_id: str, message: dict) -> None:
+        """Queue a control frame (never dropped by overflow policies)."""
+        conn = self.connections.get(session_id)
+        if conn:
+            conn.queue.append((None, json.dumps(message), 0))
+            conn.ready.set()
 
     async def subscribe(
         self,
         session_id: str,
         subscription_id: str,
         filters: dict[str, Any],
+        overflow: str | None = None,
+        batch: dict[str, Any] | None = None,
+        since: Any = None,
+        max_rate: float | None = None,
+        sample: float | None = None,
     ) -> None:
-        """Subscribe connection to log events with filters."""
+        """
+        Subscribe connection to log events with filters.
+        With since, live logs are held until backfill() has sent the history.
+        """
+        overflow = overflow or self.default_overflow
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        compiled = compile_filter(filters)
+        batch_size, batch_ms = self._parse_batch(batch)
+        max_rate, sample = self._parse_limits(max_rate, sample)
+        if since is not None:
+            if not self.history.enabled:
+                raise ValueError("since is not available without Redis")
+            since = parse_since(since)
+
         async with self._lock:
-            if session_id in self.connections:
-                self.connections[session_id].subscriptions[subscription_id] = Subscription(
+            conn = self.connections.get(session_id)
+            if conn:
+                sub = Subscription(
                     subscription_id=subscription_id,
                     filters=filters,
+                    compiled=compiled,
+                    overflow=overflow,
+                    batch_size=batch_size,
+                    batch_ms=batch_ms,
+                    since=since,
+                    backfilling=since is not None,
+                    sample=sample,
+                    max_rate=max_rate,
+                    tokens=max(max_rate, 1.0),
+                    refilled_at=time.monotonic(),
+                )
+                previous = conn.subscriptions.get(subscription_id)
+                if previous:
+                    self._release(conn, previous)
+                conn.subscriptions[subscription_id] = sub
+                self._index.add(
+                    (session_id, subscription_id), (conn, sub), compiled.apps, compiled.severities,
                 )
+                sub.shards = self._add_interest(compiled.apps)
+                if sub.throttled:
+                    self._throttled[(session_id, subscription_id)] = (conn, sub)
+                    if self._report_task is None:
+                        self._report_task = asyncio.create_task(self._report_suppressed())
+
+        await self._update_channels()
 
     async def unsubscribe(self, session_id: str, subscription_id: str) -> None:
         """Remove subscription."""
         async with self._lock:
             if session_id in self.connections:
-                self.connections[session_id].subscriptions.pop(subscription_id, None)
+                conn = self.connections[session_id]
+                sub = conn.subscriptions.pop(subscription_id, None)
+                if sub:
+                    self._release(conn, sub)
+
+        await self._update_channels()
+
+    async def subscribe_aggregate(
+        self,
+        session_id: str,
+        subscription_id: str,
+        filters: dict[str, Any],
+        options: dict[str, Any] | None = None,
+    ) -> AggregateSpec | None:
+        """Subscribe connection to windowed aggregates, shared with identical subscriptions."""
+        compiled = compile_filter(filters)
+        spec = parse_aggregate(filters, options)
+
+        async with self._lock:
+            conn = self.connections.get(session_id)
+            if not conn:
+                return None
+
+            sub = Subscription(
+                subscription_id=subscription_id,
+                filters=filters,
+                compiled=compiled,
+                overflow=self.default_overflow,
+                aggregate=spec,
+            )
+            previous = conn.subscriptions.get(subscription_id)
+            if previous:
+                self._release(conn, previous)
+            conn.subscriptions[subscription_id] = sub
+
+            aggregator = self._aggregators.get(spec)
+            if aggregator is None:
+                aggregator = self._aggregators[spec] = Aggregator(spec=spec, log_filter=compiled)
+                self._aggregate_index.add(spec, aggregator, compiled.apps, compiled.severities)
+                aggregator.shards = self._add_interest(compiled.apps)
+                aggregator.task = asyncio.create_task(self._aggregate_loop(aggregator))
+            aggregator.subscribers[(session_id, subscription_id)] = (conn, sub)
+
+        await self._update_channels()
+        return spec
+
+    def _leave_aggregate(self, key: tuple[str, str], spec: AggregateSpec) -> None:
+        """Detach a subscriber; the last one stops the aggregator."""
+        aggregator = self._aggregators.get(spec)
+        if aggregator is None:
+            return
+        aggregator.subscribers.pop(key, None)
+        if not aggregator.subscribers:
+            del self._aggregators[spec]
+            self._aggregate_index.remove(spec)
+            self._remove_interest(aggregator.shards)
+            if aggregator.task:
+                aggregator.task.cancel()
+
+    async def _aggregate_loop(self, aggregator: Aggregator) -> None:
+        """Every interval, encode the window once and queue it for each subscriber."""
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        try:
+            while True:
+                next_at += aggregator.spec.interval
+                await asyncio.sleep(max(next_at - loop.time(), 0))
+                payload = aggregator.roll()
+                for conn, sub in list(aggregator.subscribers.values()):
+                    if sub.paused or conn.closing:
+                        continue
+                    self._enqueue(conn, sub, sub.aggregate_prefix + payload + "}", 1)
+        except asyncio.CancelledError:
+            pass
+
+    async def pause(self, session_id: str, subscription_id: str) -> bool:
+        """Buffer a subscription's logs server-side until resumed."""
+        conn = self.connections.get(session_id)
+        sub = conn.subscriptions.get(subscription_id) if conn else None
+        if sub is None:
+            return False
+        if not sub.paused:
+            # Deliver what is already batched before holding new logs back
+            self._flush_batch(conn, sub)
+            sub.paused = True
+        return True
+
+    async def resume(self, session_id: str, subscription_id: str) -> dict | None:
+        """
+        Replay the pause buffer in batched frames and resume live delivery.
+        Runs without yielding, so no live log can interleave with the replay.
+        """
+        conn = self.connections.get(session_id)
+        sub = conn.subscriptions.get(subscription_id) if conn else None
+        if sub is None:
+            return None
+
+        sub.paused = False
+        if sub.backfilling:
+            # The buffer is replayed once the backfill completes
+            return {"replayed": 0, "dropped": 0}
+        return self._replay_paused(conn, sub)
+
+    def start_backfill(self, session_id: str, subscription_id: str) -> None:
+        """
+        Run backfill() in the background and report it with a "backfilled"
+        (or BACKFILL_FAILED error) frame, so the socket keeps reading
+        pong/pause/unsubscribe meanwhile.
+        """
+        conn = self.connections.get(session_id)
+        if conn is None:
+            return
+        task = asyncio.create_task(self._run_backfill(session_id, subscription_id))
+        conn.backfill_tasks.add(task)
+        task.add_done_callback(conn.backfill_tasks.discard)
+
+    async def _run_backfill(self, session_id: str, subscription_id: str) -> None:
+        try:
+            result = await self.backfill(session_id, subscription_id)
+        except Exception as e:
+            await self.send(session_id, {
+                "type": "error",
+                "code": "BACKFILL_FAILED",
+                "message": str(e),
+            })
+            return
+        if result is not None:
+            await self.send(session_id, {
+                "type": "backfilled",
+                "subscription_id": subscription_id,
+                **result,
+            })
+
+    async def backfill(self, session_id: str, subscription_id: str) -> dict | None:
+        """
+        Send logs newer than the subscription's since cursor, then switch to live.
+
+        History comes from the recent-log stream (or the database for older
+        gaps). Live logs buffered meanwhile are replayed after it, skipping
+        any the history already covered, so nothing is sent twice.
+        """
+        conn = self.connections.get(session_id)
+        sub = conn.subscriptions.get(subscription_id) if conn else None
+        if sub is None or not sub.backfilling:
+            return None
+
+        last = sub.since
+        sent = 0
+        read = HistoryRead()
+        try:
+            async for page in self.history.read_after(sub.since, sub.compiled, read):
+                if conn.subscriptions.get(subscription_id) is not sub or conn.closing:
+                    return None
+                for i in range(0, len(page), self.REPLAY_BATCH_LOGS):
+                    chunk = page[i:i + self.REPLAY_BATCH_LOGS]
+                    self._enqueue(conn, sub, sub.batch_prefix + ",".join(chunk) + "]}", len(chunk))
+                last = cursor_of(page[-1])
+                sent += len(page)
+        except Exception:
+            # Go live anyway with what was buffered; the caller reports the failure
+            sub.backfilling = False
+            if not sub.paused:
+                self._replay_paused(conn, sub, after=last)
+            raise
+        sub.backfilling = False
+        self.backfilled_total += sent
+
+        result = {"backfilled": sent, "truncated": read.truncated}
+        if sub.paused:
+            result.update(replayed=0, dropped=0)
+        else:
+            result.update(self._replay_paused(conn, sub, after=last))
+        return result
+
+    def _replay_paused(
+        self,
+        conn: ConnectionState,
+        sub: Subscription,
+        after: Cursor | None = None,
+    ) -> dict:
+        """Send the pause buffer in batched frames (runs without yielding)."""
+        buffered = list(sub.paused_buffer)
+        dropped = sub.paused_dropped
+        self._clear_paused(sub)
+        if after is not None:
+            buffered = [encoded for encoded in buffered if cursor_of(encoded) > after]
+
+        size = sub.batch_size or self.REPLAY_BATCH_LOGS
+        for i in range(0, len(buffered), size):
+            chunk = buffered[i:i + size]
+            self._enqueue(conn, sub, sub.batch_prefix + ",".join(chunk) + "]}", len(chunk))
+
+        return {"replayed": len(buffered), "dropped": dropped}
+
+    def _buffer_paused(self, sub: Subscription, encoded: str) -> None:
+        """Keep a log for a paused subscription, evicting its oldest past the byte caps."""
+        size = len(encoded)  # json.dumps output is ASCII, so chars == bytes
+        if size > self.pause_buffer_bytes:
+            self._count_paused_drop(sub)
+            return
+
+        buffer = sub.paused_buffer
+        while buffer and (
+            sub.paused_bytes + size > self.pause_buffer_bytes
+            or self.paused_bytes_total + size > self.pause_total_bytes
+        ):
+            evicted = len(buffer.popleft())
+            sub.paused_bytes -= evicted
+            self.paused_bytes_total -= evicted
+            self._count_paused_drop(sub)
+
+        if self.paused_bytes_total + size > self.pause_total_bytes:
+            # Process-wide cap reached by other subscriptions' buffers
+            self._count_paused_drop(sub)
+            return
+
+        buffer.append(encoded)
+        sub.paused_bytes += size
+        self.paused_bytes_total += size
+
+    def _count_paused_drop(self, sub: Subscription) -> None:
+        sub.paused_dropped += 1
+        self.paused_dropped_total += 1
+
+    def _clear_paused(self, sub: Subscription) -> None:
+        """Release a subscription's pause buffer from the process-wide total."""
+        self.paused_bytes_total -= sub.paused_bytes
+        sub.paused_buffer.clear()
+        sub.paused_bytes = 0
+        sub.paused_dropped = 0
+
+    def _parse_limits(self, max_rate: Any, sample: Any) -> tuple[float, float]:
+        """Validate max_rate (logs/sec, 0 = unlimited) and sample (fraction kept)."""
+        max_rate = 0.0 if max_rate is None else max_rate
+        sample = 1.0 if sample is None else sample
+        if not _is_number(max_rate) or not 0 <= max_rate <= self.MAX_RATE:
+            raise ValueError(f"max_rate must be between 0 and {self.MAX_RATE} logs per second")
+        if not _is_number(sample) or not 0 < sample <= 1:
+            raise ValueError("sample must be greater than 0 and at most 1")
+        return float(max_rate), float(sample)
+
+    async def _report_suppressed(self) -> None:
+        """Tell throttled subscribers how many logs they did not receive."""
+        try:
+            while True:
+                await asyncio.sleep(self.SUPPRESSED_INTERVAL)
+                for conn, sub in list(self._throttled.values()):
+                    suppressed = sub.sampled_out + sub.rate_limited
+                    if not suppressed or conn.closing:
+                        continue
+                    await self.send(conn.session_id, {
+                        "type": "suppressed",
+                        "subscription_id": sub.subscription_id,
+                        "sampled_out": sub.sampled_out,
+                        "rate_limited": sub.rate_limited,
+                        "interval_seconds": self.SUPPRESSED_INTERVAL,
+                    })
+                    self.suppressed_total += suppressed
+                    sub.sampled_out = 0
+                    sub.rate_limited = 0
+        except asyncio.CancelledError:
+            pass
+
+    def _parse_batch(self, batch: dict[str, Any] | None) -> tuple[int, int]:
+        """Validate a subscription's batch option into (max_logs, max_ms)."""
+        if not batch:
+            return 0, 0
+        if not isinstance(batch, dict):
+            raise ValueError("batch must be an object with max_logs and/or max_ms")
+
+        max_logs = batch.get("max_logs", 100)
+        max_ms = batch.get("max_ms", 100)
+        if not isinstance(max_logs, int) or not 1 <= max_logs <= self.MAX_BATCH_LOGS:
+            raise ValueError(f"batch.max_logs must be between 1 and {self.MAX_BATCH_LOGS}")
+        if not isinstance(max_ms, int) or not 1 <= max_ms <= self.MAX_BATCH_MS:
+            raise ValueError(f"batch.max_ms must be between 1 and {self.MAX_BATCH_MS}")
+        return max_logs, max_ms
 
     async def broadcast_log(self, log_data: dict) -> None:
         """Publish log to Redis channel (all instances will receive it)."""
+        encoded = json.dumps(log_data)
         if self._redis:
-            await self._redis.publish(self.CHANNEL, json.dumps(log_data))
+            app = log_data.get("source", {}).get("app_id") or ""
+            await self.history.publish(self._channel(self._shard(app)), encoded)
         else:
             # Fallback to local broadcast if Redis not available
-            await self._broadcast_to_local(log_data)
+            await self._broadcast_to_local(log_data, encoded)
 
-    async def _broadcast_to_local(self, log_data: dict) -> None:
-        """Broadcast log to local WebSocket connections."""
-        async with self._lock:
-            connections = list(self.connections.values())
+    async def _broadcast_to_local(self, log_data: dict, encoded: str | None = None) -> None:
+        """Queue log for matching local subscriptions (index, then compiled predicates)."""
+        app = log_data.get("source", {}).get("app_id")
+        severity = log_data.get("severity")
 
-        for conn in connections:
-            for sub in conn.subscriptions.values():
-                if sub.paused:
-                    continue
-                
-                if self._matches_filters(log_data, sub.filters):
-                    try:
-                        await conn.websocket.send_json({
-                            "type": "log",
-                            "subscription_id": sub.subscription_id,
-                            "data": log_data,
-                        })
-                    except Exception:
-                        # Connection might be closed
-                        await self.disconnect(conn.session_id)
-                        break
-
-    def _matches_filters(self, log_data: dict, filters: dict) -> bool:
-        """Check if log matches subscription filters."""
-        if not filters:
-            return True
-
-        # Filter by source_app
-        if "source_app" in filters:
-            apps = filters["source_app"]
-            if isinstance(apps, list):
-                if log_data.get("source", {}).get("app_id") not in apps:
-                    return False
-            elif log_data.get("source", {}).get("app_id") != apps:
-                return False
+        if self._aggregators:
+            for aggregator in self._aggregate_index.match(app, severity):
+                predicate = aggregator.log_filter.predicate
+                if predicate is None or predicate(log_data):
+                    aggregator.add(log_data)
 
-        # Filter by severity
-        if "severity" in filters:
-            severities = filters["severity"]
-            if isinstance(severities, list):
-                if log_data.get("severity") not in severities:
-                    return False
-            elif log_data.get("severity") != severities:
-                return False
+        matches = self._index.match(app, severity)
+        if not matches:
+            return
 
-        # Filter by min_severity
-        if "min_severity" in filters:
-            severity_order = {"debug": 0, "info": 1, "warn": 2, "error": 3, "fatal": 4}
-            min_level = severity_order.get(filters["min_severity"], 0)
-            log_level = severity_order.get(log_data.get("severity", "debug"), 0)
-            if log_level < min_level:
-                return False
+        # Serialized once; every subscriber's frame is spliced around it
+        if encoded is None:
+            encoded = json.dumps(log_data)
 
-        return True
+        for conn, sub in matches:
+            if conn.closing:
+                continue
+            predicate = sub.compiled.predicate
+            if predicate is not None and not predicate(log_data):
+                continue
+            if sub.throttled and not sub.admit():
+                continue
+            if sub.paused or sub.backfilling:
+                self._buffer_paused(sub, encoded)
+            elif sub.batch_size:
+                self._add_to_batch(conn, sub, encoded)
+            else:
+                self._enqueue(conn, sub, sub.log_prefix + encoded + "}", 1)
+
+    def _add_to_batch(self, conn: ConnectionState, sub: Subscription, encoded: str) -> None:
+        """Buffer a log; flush when the batch is full or its first log is max_ms old."""
+        sub.pending.append(encoded)
+        if len(sub.pending) >= sub.batch_size:
+            self._flush_batch(conn, sub)
+        elif sub.flush_handle is None:
+            sub.flush_handle = asyncio.get_running_loop().call_later(
+                sub.batch_ms / 1000, self._flush_batch, conn, sub,
+            )
+
+    def _flush_batch(self, conn: ConnectionState, sub: Subscription) -> None:
+        sub.cancel_flush()
+        if not sub.pending or conn.closing:
+            sub.pending.clear()
+            return
+        frame = sub.batch_prefix + ",".join(sub.pending) + "]}"
+        count = len(sub.pending)
+        sub.pending = []
+        self._enqueue(conn, sub, frame, count)
+
+    def _enqueue(self, conn: ConnectionState, sub: Subscription, frame: str, count: int) -> None:
+        """Append a frame, applying the subscription's overflow policy when full."""
+        queue = conn.queue
+        if len(queue) >= self.queue_size:
+            if sub.overflow == "drop_newest":
+                self._count_drop(sub, count)
+                return
+
+            if sub.overflow == "disconnect":
+                conn.closing = True
+                self.slow_disconnects += 1
+                task = asyncio.create_task(self._close_slow_consumer(conn))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+                return
+
+            if sub.overflow == "coalesce":
+                # Replace this subscription's newest queued frame
+                for i in range(len(queue) - 1, -1, -1):
+                    if queue[i][0] is sub:
+                        self._count_drop(sub, queue[i][2])
+                        queue[i] = (sub, frame, count)
+                        return
+
+            # drop_oldest (and coalesce with nothing to replace): evict the oldest
+            # data frame of a drop_oldest subscription, else drop this frame
+            for i, (queued_sub, _, queued_count) in enumerate(queue):
+                if queued_sub is not None and queued_sub.overflow == "drop_oldest":
+                    del queue[i]
+                    self._count_drop(queued_sub, queued_count)
+                    break
+            else:
+                self._count_drop(sub, count)
+                return
+
+        queue.append((sub, frame, count))
+        conn.max_queue_depth = max(conn.max_queue_depth, len(queue))
+        conn.ready.set()
+
+    def _count_drop(self, sub: Subscription, count: int) -> None:
+        sub.dropped += count
+        self.dropped_total += count
+
+    async def _write_loop(self, conn: ConnectionState) -> None:
+        """Drain a connection's queue; only this task writes to its socket."""
+        try:
+            while True:
+                await conn.ready.wait()
+                while conn.queue:
+                    _, frame, _ = conn.queue.popleft()
+                    # Per-send deadline: a stalled socket trips it
+                    async with asyncio.timeout(self.send_timeout):
+                        await conn.websocket.send_text(frame)
+                conn.ready.clear()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Connection closed or stalled past the send timeout
+            await self.disconnect(conn.session_id)
+
+    async def _close_slow_consumer(self, conn: ConnectionState) -> None:
+        """Drop a connection whose queue overflowed under the disconnect policy."""
+        await self.disconnect(conn.session_id)
+        try:
+            await conn.websocket.close(code=1013, reason="Slow consumer")
+        except Exception:
+            pass
+
+    def get_stats(self) -> dict:
+        """Get connection, queue depth and drop metrics for this process."""
+        connections = list(self.connections.values())
+        depths = [len(conn.queue) for conn in connections]
+        return {
+            "connections": len(connections),
+            "subscriptions": len(self._index),
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": max((c.max_queue_depth for c in connections), default=0),
+            "dropped_total": self.dropped_total,
+            "slow_disconnects": self.slow_disconnects,
+            "paused_subscriptions": sum(
+                1 for c in connections for s in c.subscriptions.values() if s.paused
+            ),
+            "paused_buffer_bytes": self.paused_bytes_total,
+            "paused_dropped_total": self.paused_dropped_total,
+            "aggregators": len(self._aggregators),
+            "throttled_subscriptions": len(self._throttled),
+            "suppressed_total": self.suppressed_total,
+            "backfilled_total": self.backfilled_total,
+            "channel_shards": self.channel_shards,
+            "subscribed_shards": len(self._subscribed_shards),
+            "pattern_subscribed": self._pattern_subscribed,
+        }
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
 
 
 # Global instance
@@ -0,0 +1,86 @@
+from collections.abc import Iterable
+from typing import Any
+
+SEVERITY_ORDER = {"debug": 0, "info": 1, "warn": 2, "error": 3, "fatal": 4}
+
+_Key = tuple[str | None, str | None]
+
+
+def indexed_values(filters: dict[str, Any]) -> tuple[frozenset[str] | None, frozenset[str] | None]:
+    """
+    Get (apps, severities) a subscription is restricted to (None = any).
+    min_severity is folded into the severity set.
+    """
+    apps = _as_set(filters.get("source_app"))
+
+    severities = _as_set(filters.get("severity"))
+    if "min_severity" in filters:
+        min_level = SEVERITY_ORDER.get(filters["min_severity"], 0)
+        allowed = frozenset(s for s, level in SEVERITY_ORDER.items() if level >= min_level)
+        severities = allowed if severities is None else severities & allowed
+
+    return apps, severities
+
+
+def _as_set(value: Any) -> frozenset[str] | None:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return frozenset(value)
+    return frozenset([value])
+
+
+class SubscriptionIndex:
+    """
+    Inverted index of subscriptions keyed by (source_app, severity).
+
+    A subscription is registered under every (app, severity) combination
+    it accepts, with None standing for "any". A log only probes its four
+    buckets - (app, sev), (app, *), (*, sev), (*, *) - so matching costs
+    O(matches) instead of O(subscriptions). Each subscription lands in
+    exactly one of those buckets, so results never contain duplicates.
+    """
+
+    def __init__(self):
+        self._buckets: dict[_Key, dict[Any, Any]] = {}
+        self._keys: dict[Any, list[_Key]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(
+        self,
+        key: Any,
+        value: Any,
+        apps: frozenset[str] | None,
+        severities: frozenset[str] | None,
+    ) -> None:
+        """Register value under key (replaces an existing entry)."""
+        self.remove(key)
+
+        app_keys: Iterable[str | None] = apps if apps is not None else (None,)
+        sev_keys: Iterable[str | None] = severities if severities is not None else (None,)
+        bucket_keys = [(app, sev) for app in app_keys for sev in sev_keys]
+
+        for bucket_key in bucket_keys:
+            self._buckets.setdefault(bucket_key, {})[key] = value
+        self._keys[key] = bucket_keys
+
+    def remove(self, key: Any) -> None:
+        """Unregister key if present."""
+        for bucket_key in self._keys.pop(key, ()):
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def match(self, app: str | None, severity: str | None) -> list[Any]:
+        """Get values whose (app, severity) restrictions accept the log."""
+        matches: list[Any] = []
+        probes = dict.fromkeys(((app, severity), (app, None), (None, severity), (None, None)))
+        for bucket_key in probes:
+            bucket = self._buckets.get(bucket_key)
+            if bucket:
+                matches.extend(bucket.values())
+        return matches
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import redis.asyncio as redis
+
+from app.core.redis import get_redis
+from app.core.sketch import DDSketch
+from app.repositories.rate_sketch_repository import ALL_APPS, RateSketchRepository
+
+
+class ThroughputService:
+    """
+    Tracks per-second ingest throughput for p95/p99 logs-per-second.
+
+    Each instance counts locally and flushes once per second into shared
+    per-minute Redis hashes, so counts from all instances add up per second.
+    Closed minutes are claimed by exactly one instance, turned into a
+    DDSketch of the 60 per-second totals and stored in Postgres.
+    """
+
+    PREFIX = "strym:rate:"
+    PENDING_KEY = "strym:rate:pending"
+    FLUSH_INTERVAL = 1.0  # seconds
+    FOLD_GRACE = 5  # seconds after a minute ends before it is folded
+    KEY_TTL = 3600  # seconds
+
+    def __init__(self):
+        self._redis: redis.Redis | None = None
+        self._counts: dict[tuple[int, str], int] = defaultdict(int)
+        self._task: asyncio.Task | None = None
+        self.dropped_late = 0
+
+    async def init(self) -> None:
+        """Attach the shared Redis client and start flush loop."""
+        self._redis = get_redis()
+        self._task = asyncio.create_task(self._run())
+        print("Throughput service initialized")
+
+    async def close(self) -> None:
+        """Flush pending counts and release the shared Redis client."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._redis:
+            try:
+                await self._flush()
+            except Exception:
+                pass
+        self._redis = None
+        print("Throughput service closed")
+
+    def record(self, source_app: str, count: int = 1) -> None:
+        """Count ingested logs (in-memory, no I/O)."""
+        second = int(time.time())
+        self._counts[(second, source_app)] += count
+        self._counts[(second, ALL_APPS)] += count
+
+    async def _run(self) -> None:
+        """Flush counts every second and fold closed minutes."""
+        while True:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            try:
+                await self._flush()
+                await self._fold_closed_minutes()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Throughput flush failed: {e}")
+
+    async def _flush(self) -> None:
+        """Push local per-second counts to Redis in one pipeline."""
+        if not self._counts:
+            return
+
+        counts, self._counts = self._counts, defaultdict(int)
+        horizon = int(time.time()) - 60 - self.FOLD_GRACE
+
+        pipe = self._redis.pipeline(transaction=False)
+        for (second, app), count in counts.items():
+            minute = second - second % 60
+            if minute < horizon:
+                # Minute may already be folded - re-opening it would skew it
+                self.dropped_late += count
+                continue
+            key = f"{self.PREFIX}{app}:{minute}"
+            pipe.hincrby(key, str(second - minute), count)
+            pipe.expire(key, self.KEY_TTL)
+            pipe.zadd(self.PENDING_KEY, {key: minute})
+        await pipe.execute()
+
+    async def _fold_closed_minutes(self) -> None:
+        """Claim closed minutes and persist their sketches."""
+        cutoff = int(time.time()) - 60 - self.FOLD_GRACE
+        keys = await self._redis.zrangebyscore(self.PENDING_KEY, "-inf", cutoff)
+
+        for key in keys:
+            # ZREM is atomic: only one instance wins each minute
+            if not await self._redis.zrem(self.PENDING_KEY, key):
+                continue
+            try:
+                await self._fold_minute(key)
+            except BaseException:
+                # Hand the minute back (its counts are still in Redis) so it is
+                # folded on a later pass, here or by another instance
+                minute = int(key.decode().rsplit(":", 1)[1])
+                await self._redis.zadd(self.PENDING_KEY, {key: minute})
+                raise
+
+    async def _fold_minute(self, key: bytes) -> None:
+        """Store a claimed minute's sketch; its counts are deleted only once saved."""
+        seconds = await self._redis.hgetall(key)
+        if not seconds:
+            return  # expired (KEY_TTL) before it could be folded
+
+        sketch = DDSketch()
+        for offset in range(60):
+            sketch.add(int(seconds.get(str(offset).encode(), 0)))
+
+        app, minute = key.decode()[len(self.PREFIX):].rsplit(":", 1)
+        bucket = datetime.fromtimestamp(int(minute), tz=timezone.utc)
+        await RateSketchRepository().save_minute(app, bucket, sketch)
+        await self._redis.delete(key)
+
+
+# Global instance
+throughput_service = ThroughputService()
@@ -0,0 +1,265 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime, timezone
+
+import redis.asyncio as redis
+
+from app.core.access_log import access_log
+from app.core.metrics import HOT_PATH_METRICS, Counter, Gauge, Metric, merge
+from app.core.redis import get_redis
+from app.core.slow_query_log import slow_query_log
+from app.db.connection import get_pool
+from app.services.cache_service import CacheStats, cache_service
+from app.services.rate_limiter import rate_limiter
+from app.services.stream_service import stream_service
+
+
+class WorkerStatsService:
+    """
+    Instance-wide view of metrics each worker process keeps for itself.
+
+    Once a second every worker writes a snapshot of its Prometheus metrics,
+    cache counters and slow query log to one Redis hash per instance
+    (hostname), a field per worker. /metrics, /health/cache and
+    /admin/slow-queries merge the fields, so whichever worker answers,
+    the result covers the instance. A worker that stopped publishing keeps
+    contributing its counters and histograms (so totals never go back)
+    but not its gauges or slow queries; the hash expires with the instance.
+    """
+
+    PREFIX = "strym:workers:"
+    PUBLISH_INTERVAL = 1.0  # seconds
+    STALE_SECONDS = 10
+    KEY_TTL = 3600  # seconds, refreshed on every publish
+
+    def __init__(self):
+        self._redis: redis.Redis | None = None
+        self._task: asyncio.Task | None = None
+        self._key = f"{self.PREFIX}{socket.gethostname()}"
+        self._cleared_key = f"{self._key}:slow-cleared"
+        self._worker = str(os.getpid())
+
+    async def init(self) -> None:
+        """Attach the shared Redis client and start publishing."""
+        self._redis = get_redis()
+        self._task = asyncio.create_task(self._run())
+        print(f"Worker stats service initialized (worker {self._worker})")
+
+    async def close(self) -> None:
+        """Publish a last snapshot and stop."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._redis:
+            try:
+                await self._publish()
+            except Exception:
+                pass
+        self._redis = None
+        print("Worker stats service closed")
+
+    async def metrics(self) -> list[Metric]:
+        """Prometheus metrics summed over this instance's workers."""
+        local, others = self._snapshot(), await self._others()
+        return merge([local["metrics"]] + [
+            [m for m in other["metrics"] if not other["stale"] or m["kind"] != Gauge.kind]
+            for other in others
+        ])
+
+    async def cache_stats(self) -> dict[str, dict]:
+        """Per-prefix cache metrics summed over this instance's workers."""
+        merged: dict[str, CacheStats] = {}
+        for snapshot in [self._snapshot()] + await self._others():
+            for prefix, values in snapshot["cache"].items():
+                stats = merged.setdefault(prefix, CacheStats())
+                for name, value in values.items():
+                    setattr(stats, name, getattr(stats, name) + value)
+        return {prefix: stats.to_dict() for prefix, stats in merged.items()}
+
+    async def slow_queries(self, limit: int) -> dict:
+        """Slow queries of this instance's live workers, newest first."""
+        local = self._snapshot()
+        stats = dict(local["slow_queries"]["stats"])
+        entries = list(local["slow_queries"]["entries"])
+        for other in await self._others():
+            if other["stale"]:
+                continue
+            for name in ("slow_total", "explained_total", "explains_running"):
+                stats[name] += other["slow_queries"]["stats"][name]
+            entries.extend(other["slow_queries"]["entries"])
+        cleared_at = await self._cleared_at()
+        if cleared_at:
+            entries = [e for e in entries if datetime.fromisoformat(e["recorded_at"]) > cleared_at]
+        entries.sort(key=lambda e: e["recorded_at"], reverse=True)
+        return {**stats, "queries": entries[:limit]}
+
+    async def clear_slow_queries(self) -> int:
+        """Clear the slow query log here and hide older entries of other workers."""
+        cleared = slow_query_log.clear()
+        if self._redis:
+            now = datetime.now(timezone.utc).isoformat()
+            await self._redis.set(self._cleared_key, now, ex=self.KEY_TTL)
+        return cleared
+
+    async def _run(self) -> None:
+        """Publish this worker's snapshot every PUBLISH_INTERVAL."""
+        while True:
+            await asyncio.sleep(self.PUBLISH_INTERVAL)
+            try:
+                await self._publish()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Worker stats publish failed: {e}")
+
+    async def _publish(self) -> None:
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hset(self._key, self._worker, json.dumps(self._snapshot(), default=str))
+        pipe.expire(self._key, self.KEY_TTL)
+        await pipe.execute()
+
+    async def _others(self) -> list[dict]:
+        """Snapshots of the other workers on this instance (empty without Redis)."""
+        if not self._redis:
+            return []
+        try:
+            fields = await self._redis.hgetall(self._key)
+        except Exception:
+            return []
+        now = time.time()
+        others = []
+        for worker, raw in fields.items():
+            if worker.decode() == self._worker:
+                continue
+            snapshot = json.loads(raw)
+            snapshot["stale"] = now - snapshot["at"] > self.STALE_SECONDS
+            others.append(snapshot)
+        return others
+
+    async def _cleared_at(self) -> datetime | None:
+        if not self._redis:
+            return None
+        try:
+            value = await self._redis.get(self._cleared_key)
+        except Exception:
+            return None
+        return datetime.fromisoformat(value.decode()) if value else None
+
+    def _snapshot(self) -> dict:
+        """This worker's current state, JSON-safe."""
+        return {
+            "at": time.time(),
+            "metrics": [metric.dump() for metric in collect()],
+            "cache": cache_service.get_counters(),
+            "slow_queries": {
+                "stats": slow_query_log.get_stats(),
+                "entries": slow_query_log.get_entries(),
+            },
+        }
+
+
+def collect() -> list[Metric]:
+    """This process's metrics: hot-path ones plus state read from their owners."""
+    return [
+        *HOT_PATH_METRICS,
+        *_pool_metrics(),
+        *_cache_metrics(),
+        *_rate_limit_metrics(),
+        *_stream_metrics(),
+        *_access_log_metrics(),
+        *_slow_query_metrics(),
+    ]
+
+
+def _pool_metrics() -> list[Metric]:
+    size = Gauge("strym_db_pool_size", "Open database pool connections.")
+    in_use = Gauge("strym_db_pool_in_use", "Database pool connections checked out.")
+    max_size = Gauge("strym_db_pool_max_size", "Database pool size limit.")
+    try:
+        pool = get_pool()
+    except RuntimeError:
+        return [size, in_use, max_size]
+    size.set(pool.get_size())
+    in_use.set(pool.get_size() - pool.get_idle_size())
+    max_size.set(pool.get_max_size())
+    return [size, in_use, max_size]
+
+
+def _cache_metrics() -> list[Metric]:
+    hits = Counter("strym_cache_hits_total", "Cache hits by key prefix.", labels=("prefix",))
+    misses = Counter("strym_cache_misses_total", "Cache misses by key prefix.", labels=("prefix",))
+    invalidations = Counter(
+        "strym_cache_invalidations_total", "Cache entries invalidated by key prefix.", labels=("prefix",),
+    )
+    for prefix, stats in cache_service.get_stats().items():
+        hits.inc(prefix, amount=stats["hits"])
+        misses.inc(prefix, amount=stats["misses"])
+        invalidations.inc(prefix, amount=stats["invalidations"])
+    return [hits, misses, invalidations]
+
+
+def _rate_limit_metrics() -> list[Metric]:
+    stats = rate_limiter.get_stats()
+    decisions = Counter(
+        "strym_rate_limit_decisions_total", "Rate limit decisions by result.", labels=("result",),
+    )
+    decisions.inc("allowed", amount=stats["allowed_total"])
+    decisions.inc("rejected", amount=stats["rejected_total"])
+    local_hits = Counter(
+        "strym_rate_limit_local_hits_total", "Requests admitted by the local pre-check.",
+    )
+    local_hits.inc(amount=stats["local_hits"])
+    redis_errors = Counter(
+        "strym_rate_limit_redis_errors_total", "Rate limit checks failed open on Redis errors.",
+    )
+    redis_errors.inc(amount=stats["redis_errors"])
+    return [decisions, local_hits, redis_errors]
+
+
+def _stream_metrics() -> list[Metric]:
+    stats = stream_service.get_stats()
+    gauges = [
+        ("connections", "Open WebSocket stream connections."),
+        ("subscriptions", "Active stream subscriptions."),
+        ("queued_frames", "Frames waiting in connection send queues."),
+        ("paused_subscriptions", "Paused stream subscriptions."),
+        ("throttled_subscriptions", "Stream subscriptions currently rate limited."),
+    ]
+    counters = [
+        ("dropped_total", "Stream frames dropped on full send queues."),
+        ("slow_disconnects", "Connections closed as slow consumers."),
+        ("suppressed_total", "Stream logs suppressed by max_rate or sample."),
+    ]
+    metrics: list[Metric] = []
+    for key, documentation in gauges:
+        gauge = Gauge(f"strym_stream_{key}", documentation)
+        gauge.set(stats[key])
+        metrics.append(gauge)
+    for key, documentation in counters:
+        name = key if key.endswith("_total") else f"{key}_total"
+        counter = Counter(f"strym_stream_{name}", documentation)
+        counter.inc(amount=stats[key])
+        metrics.append(counter)
+    return metrics
+
+
+def _access_log_metrics() -> list[Metric]:
+    dropped = Counter("strym_access_log_dropped_total", "Access log records dropped on a full queue.")
+    dropped.inc(amount=access_log.dropped)
+    return [dropped]
+
+
+def _slow_query_metrics() -> list[Metric]:
+    slow = Counter("strym_slow_queries_total", "Repository queries over the slow query threshold.")
+    slow.inc(amount=slow_query_log.slow_total)
+    return [slow]
+
+
+# Global instance
+worker_stats_service = WorkerStatsService()
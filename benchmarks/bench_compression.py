@@ -0,0 +1,178 @@
+"""
+Benchmark native compression of the logs hypertable: on-disk size and scan speed.
+
+Builds a scratch copy of the logs table (bench_logs, same columns, indexes
+and compression settings as the 005 migration), seeds it with the synthetic
+e2e dataset, times the LogRepository/StatsRepository query shapes, compresses
+every chunk and times them again. The scratch table is dropped afterwards.
+
+Needs a TimescaleDB with the app's migrations applied.
+
+Usage: python -m benchmarks.bench_compression [--days 7] [--logs-per-day 200000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+from benchmarks.e2e.seed import APPS, BATCH_ROWS, COLUMNS, _rows
+
+TABLE = "bench_logs"
+
+
+def queries(start: datetime, end: datetime) -> dict[str, tuple[str, tuple]]:
+    """Query shapes the API runs, over the last day and the whole range."""
+    day = end - timedelta(days=1)
+    app = APPS[0]
+    return {
+        "page_by_app_1d": (
+            f"SELECT * FROM {TABLE} WHERE source_app = $1 AND timestamp >= $2 "
+            "ORDER BY timestamp DESC LIMIT 100",
+            (app, day),
+        ),
+        "count_by_app_all": (
+            f"SELECT COUNT(*) FROM {TABLE} WHERE source_app = $1 AND timestamp >= $2",
+            (app, start),
+        ),
+        "severity_counts_all": (
+            f"SELECT severity, COUNT(*) FROM {TABLE} WHERE timestamp >= $1 GROUP BY severity",
+            (start,),
+        ),
+        "errors_by_app_all": (
+            f"SELECT source_app, COUNT(*) FROM {TABLE} "
+            "WHERE timestamp >= $1 AND severity IN ('error', 'fatal') GROUP BY source_app",
+            (start,),
+        ),
+        "search_1d": (
+            f"SELECT * FROM {TABLE} WHERE timestamp >= $1 "
+            "AND message_search @@ plainto_tsquery('english', $2) "
+            "ORDER BY timestamp DESC LIMIT 100",
+            (day, "payment declined"),
+        ),
+        "id_lookup": (
+            f"SELECT * FROM {TABLE} WHERE id = (SELECT MIN(id) + 1000 FROM {TABLE})",
+            (),
+        ),
+    }
+
+
+async def create_table(conn: asyncpg.Connection, chunk_hours: int) -> None:
+    await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    await conn.execute(f"CREATE TABLE {TABLE} (LIKE logs INCLUDING ALL)")
+    # Own id sequence so the benchmark doesn't consume ids from logs
+    await conn.execute(f"CREATE SEQUENCE IF NOT EXISTS {TABLE}_id_seq OWNED BY {TABLE}.id")
+    await conn.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+    await conn.execute(
+        "SELECT create_hypertable($1::REGCLASS, 'timestamp', "
+        "chunk_time_interval => make_interval(hours => $2))",
+        TABLE,
+        chunk_hours,
+    )
+    await conn.execute(
+        f"""
+        ALTER TABLE {TABLE} SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'source_app',
+            timescaledb.compress_orderby = 'timestamp DESC, id DESC'
+        )
+        """
+    )
+
+
+async def seed(conn: asyncpg.Connection, start: datetime, days: int, logs_per_day: int) -> int:
+    rng = random.Random(42)
+    written = 0
+    for day in range(days):
+        batch = []
+        for row in _rows(rng, start + timedelta(days=day), logs_per_day, timedelta(days=1)):
+            batch.append(row)
+            if len(batch) == BATCH_ROWS:
+                await conn.copy_records_to_table(TABLE, records=batch, columns=COLUMNS)
+                written += len(batch)
+                batch = []
+        if batch:
+            await conn.copy_records_to_table(TABLE, records=batch, columns=COLUMNS)
+            written += len(batch)
+    await conn.execute(f"ANALYZE {TABLE}")
+    return written
+
+
+async def table_bytes(conn: asyncpg.Connection) -> int:
+    return await conn.fetchval("SELECT hypertable_size($1::REGCLASS)", TABLE)
+
+
+async def time_queries(conn: asyncpg.Connection, shapes: dict, runs: int) -> dict[str, float]:
+    """Median milliseconds per query shape (one untimed warm-up run)."""
+    results = {}
+    for name, (sql, args) in shapes.items():
+        await conn.fetch(sql, *args)
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await conn.fetch(sql, *args)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(samples)
+    return results
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=args.days)
+    shapes = queries(start, end)
+
+    conn = await asyncpg.connect(args.database_url)
+    try:
+        await create_table(conn, args.chunk_hours)
+        print(f"Seeding {args.days} days x {args.logs_per_day:,} logs into {TABLE}...")
+        rows = await seed(conn, start, args.days, args.logs_per_day)
+
+        before_bytes = await table_bytes(conn)
+        before = await time_queries(conn, shapes, args.runs)
+
+        print("Compressing chunks...")
+        started = time.perf_counter()
+        chunks = await conn.fetch("SELECT show_chunks($1::REGCLASS) AS chunk", TABLE)
+        for chunk in chunks:
+            await conn.execute("SELECT compress_chunk($1::REGCLASS)", chunk["chunk"])
+        compress_seconds = time.perf_counter() - started
+        await conn.execute(f"ANALYZE {TABLE}")
+
+        after_bytes = await table_bytes(conn)
+        after = await time_queries(conn, shapes, args.runs)
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.close()
+
+    print(f"\n{rows:,} rows in {len(chunks)} chunks, compressed in {compress_seconds:.1f}s")
+    print(f"{'size':<22} {before_bytes / 2**20:>10.1f} MB -> {after_bytes / 2**20:>8.1f} MB"
+          f"  ({before_bytes / max(1, after_bytes):.1f}x smaller)")
+    print(f"\n{'query (median ms)':<22} {'uncompressed':>13} {'compressed':>11} {'speedup':>8}")
+    for name in shapes:
+        print(f"{name:<22} {before[name]:>13.2f} {after[name]:>11.2f} "
+              f"{before[name] / max(after[name], 1e-6):>7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--logs-per-day", type=int, default=200_000)
+    parser.add_argument("--chunk-hours", type=int, default=24)
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--keep", action="store_true", help=f"leave {TABLE} in place afterwards")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+End-to-end load benchmark against a running server (HTTP + WebSocket).
+
+Seeds a deterministic multi-day dataset (apps named bench-*) into
+TimescaleDB, then drives each scenario from a closed-loop asyncio load
+generator and reports throughput and p50/p95/p99 latency:
+
+  ingest_single, ingest_bulk          POST /logs, POST /logs/bulk (100 logs)
+  query_filtered, query_search,       GET /logs, /logs/search with filters,
+  query_paginated                     deep offsets over the seeded days
+  stats_summary, stats_timeseries,    GET /stats/* over the seeded window
+  stats_patterns
+  stream_fanout                       N WebSocket subscribers, bulk ingest,
+                                      publish-to-delivery latency per log
+
+Results can be saved as a JSON baseline and later runs diffed against it;
+the run exits non-zero if any scenario regresses beyond the tolerance.
+
+Start Postgres/TimescaleDB and redis-server (docker compose up db redis),
+run the migrations, and start the API with limits that won't throttle
+the load generator, e.g.:
+
+  RATE_LIMIT_PER_KEY=100000000/60 uv run uvicorn app.main:app --port 8000
+
+Usage:
+  python -m benchmarks.bench_e2e --seed --save benchmarks/baselines/main.json
+  python -m benchmarks.bench_e2e --compare benchmarks/baselines/main.json
+  python -m benchmarks.bench_e2e --scenarios ingest_bulk,stream_fanout --subscribers 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.e2e.scenarios import SCENARIOS, Target, run_scenario
+from benchmarks.e2e.seed import seed
+
+# Metric -> True when higher is better
+COMPARED = {"throughput": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> list[str]:
+    """Print per-metric changes against baseline; returns regressed 'scenario.metric's."""
+    regressions = []
+    print(f"\nCompared with baseline {baseline.get('git_commit') or ''} ({baseline['created_at']}):")
+    for name, summary in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"  {name:18s} (not in baseline)")
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before.get(metric), summary.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            if flag:
+                regressions.append(f"{name}.{metric}")
+            print(f"  {name:18s} {metric:10s} {old:>10} -> {new:>10}  {change:+7.1%}{flag}")
+    return regressions
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    if args.seed:
+        print(f"Seeding {args.days} days x {args.logs_per_day:,} logs...")
+        written = await seed(args.database_url, args.days, args.logs_per_day)
+        print(f"Seeded {written:,} logs")
+
+    target = Target(
+        base_url=args.base_url.rstrip("/"),
+        api_key=args.api_key,
+        days=args.days,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        subscribers=args.subscribers,
+    )
+    names = args.scenarios.split(",") if args.scenarios else SCENARIOS
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    results = {}
+    for name in names:
+        summary = await run_scenario(name, target)
+        results[name] = summary
+        print(
+            f"{name:18s} {summary['throughput']:>10,.1f}/s  p50 {summary['p50_ms']:>8.2f}ms  "
+            f"p95 {summary['p95_ms']:>8.2f}ms  p99 {summary['p99_ms']:>8.2f}ms  "
+            f"errors {summary.get('errors', 0)}"
+        )
+
+    run = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": {
+            "days": args.days,
+            "logs_per_day": args.logs_per_day,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "subscribers": args.subscribers,
+        },
+        "results": results,
+    }
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(run, indent=2) + "\n")
+        print(f"\nBaseline written to {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("config") != run["config"]:
+            print("Warning: baseline was recorded with a different config", file=sys.stderr)
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY", "strym-dev-key-change-in-production"))
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--seed", action="store_true", help="(re)seed the bench-* dataset first")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--logs-per-day", type=int, default=200_000)
+    parser.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per scenario")
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="diff results against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+    if args.seed and not args.database_url:
+        parser.error("--seed needs --database-url or DATABASE_URL")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark WebSocket fan-out: legacy per-subscription scan vs subscription index.
+
+Registers N subscriptions on fake WebSockets (no network) and broadcasts a
+second's worth of logs through StreamService._broadcast_to_local. The fake
+socket serializes like Starlette, so per-subscriber send_json costs show up.
+
+Usage: python -m benchmarks.bench_fanout [--subscriptions 10000] [--logs 5000] [--batch 100]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.services.stream_service import StreamService
+
+APPS = [f"app-{i}" for i in range(200)]
+SEVERITIES = ["debug", "info", "warn", "error", "fatal"]
+SEVERITY_ORDER = {"debug": 0, "info": 1, "warn": 2, "error": 3, "fatal": 4}
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = 0
+        self.frames = 0
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        self.frames += 1
+        # A batch frame delivers several logs
+        self.sent += data.count('"source":') if data.startswith('{"type":"logs"') else 1
+
+    async def send_json(self, data: dict) -> None:
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        self.frames += 1
+        self.sent += 1
+
+
+def legacy_matches(log_data: dict, filters: dict) -> bool:
+    """The interpreted matcher StreamService used before the index."""
+    if not filters:
+        return True
+    if "source_app" in filters:
+        apps = filters["source_app"]
+        if isinstance(apps, list):
+            if log_data.get("source", {}).get("app_id") not in apps:
+                return False
+        elif log_data.get("source", {}).get("app_id") != apps:
+            return False
+    if "severity" in filters:
+        severities = filters["severity"]
+        if isinstance(severities, list):
+            if log_data.get("severity") not in severities:
+                return False
+        elif log_data.get("severity") != severities:
+            return False
+    if "min_severity" in filters:
+        min_level = SEVERITY_ORDER.get(filters["min_severity"], 0)
+        log_level = SEVERITY_ORDER.get(log_data.get("severity", "debug"), 0)
+        if log_level < min_level:
+            return False
+    return True
+
+
+def random_filters() -> dict:
+    roll = random.random()
+    if roll < 0.02:
+        return {}
+    if roll < 0.1:
+        return {"min_severity": random.choice(["warn", "error"])}
+    filters: dict = {"source_app": random.choice(APPS)}
+    if random.random() < 0.5:
+        filters["severity"] = random.sample(SEVERITIES, 2)
+    return filters
+
+
+def random_log() -> dict:
+    return {
+        "source": {"app_id": random.choice(APPS)},
+        "severity": random.choices(SEVERITIES, weights=[30, 50, 10, 8, 2])[0],
+        "message": "benchmark",
+    }
+
+
+async def legacy_broadcast(service: StreamService, log_data: dict) -> None:
+    for conn in list(service.connections.values()):
+        for sub in conn.subscriptions.values():
+            if legacy_matches(log_data, sub.filters):
+                await conn.websocket.send_json({
+                    "type": "log",
+                    "subscription_id": sub.subscription_id,
+                    "data": log_data,
+                })
+
+
+async def run(args: argparse.Namespace) -> None:
+    random.seed(42)
+    filters = [random_filters() for _ in range(args.subscriptions)]
+    logs = [random_log() for _ in range(args.logs)]
+
+    async def setup(batch: dict | None) -> tuple[StreamService, list[FakeWebSocket]]:
+        service = StreamService()
+        service.queue_size = args.logs * args.subs_per_connection  # no overflow drops
+        sockets = []
+        for i in range(args.subscriptions // args.subs_per_connection):
+            ws = FakeWebSocket()
+            sockets.append(ws)
+            await service.connect(ws, f"session-{i}")
+            for j in range(args.subs_per_connection):
+                await service.subscribe(
+                    f"session-{i}", f"sub-{j}",
+                    filters[i * args.subs_per_connection + j], batch=batch,
+                )
+        return service, sockets
+
+    batch = {"max_logs": args.batch, "max_ms": 50}
+    for name, batch_option, legacy in (
+        ("legacy scan", None, True),
+        ("index", None, False),
+        (f"batch {args.batch}", batch, False),
+    ):
+        service, sockets = await setup(batch_option)
+        start = time.perf_counter()
+        for log in logs:
+            if legacy:
+                await legacy_broadcast(service, log)
+            else:
+                await service._broadcast_to_local(log)
+        # Flush partial batches, then wait for connection writers to drain
+        for conn in service.connections.values():
+            for sub in conn.subscriptions.values():
+                service._flush_batch(conn, sub)
+        while any(conn.queue for conn in service.connections.values()):
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        sent = sum(ws.sent for ws in sockets)
+        frames = sum(ws.frames for ws in sockets)
+        print(
+            f"{name:12s} {elapsed:8.3f}s for {args.logs} logs "
+            f"({args.logs / elapsed:,.0f} logs/sec, {sent:,} deliveries in {frames:,} frames)"
+        )
+        for session_id in list(service.connections):
+            await service.disconnect(session_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscriptions", type=int, default=10_000)
+    parser.add_argument("--subs-per-connection", type=int, default=2)
+    parser.add_argument("--logs", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=100, help="max_logs for batch mode")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
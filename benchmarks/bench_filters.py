@@ -0,0 +1,159 @@
+"""
+Benchmark stream filter matching: interpreted matchers vs compiled predicates.
+
+Simple filters (source_app/severity/min_severity) compare the matcher
+StreamService used before filters were compiled. Rich filters compare an
+interpreter that walks the filter dict per log with compile_filter().
+
+Usage: python -m benchmarks.bench_filters [--filters 1000] [--logs 2000]
+"""
+import argparse
+import random
+import re
+import time
+
+from app.services.stream_filters import compile_filter
+
+APPS = [f"app-{i}" for i in range(50)]
+HOSTS = [f"host-{i}" for i in range(20)]
+SEVERITIES = ["debug", "info", "warn", "error", "fatal"]
+WORDS = ["request", "timeout", "user", "payment", "cache", "retry", "failed", "ok"]
+
+
+def legacy_matches(log_data: dict, filters: dict) -> bool:
+    """StreamService._matches_filters before filters were compiled."""
+    if not filters:
+        return True
+    if "source_app" in filters:
+        apps = filters["source_app"]
+        if isinstance(apps, list):
+            if log_data.get("source", {}).get("app_id") not in apps:
+                return False
+        elif log_data.get("source", {}).get("app_id") != apps:
+            return False
+    if "severity" in filters:
+        severities = filters["severity"]
+        if isinstance(severities, list):
+            if log_data.get("severity") not in severities:
+                return False
+        elif log_data.get("severity") != severities:
+            return False
+    if "min_severity" in filters:
+        severity_order = {"debug": 0, "info": 1, "warn": 2, "error": 3, "fatal": 4}
+        min_level = severity_order.get(filters["min_severity"], 0)
+        log_level = severity_order.get(log_data.get("severity", "debug"), 0)
+        if log_level < min_level:
+            return False
+    return True
+
+
+def interpret(filters: dict, log: dict) -> bool:
+    """Evaluate a rich filter by walking the dict for every log."""
+    order = {"debug": 0, "info": 1, "warn": 2, "error": 3, "fatal": 4}
+    source = log.get("source", {})
+    for key, value in filters.items():
+        values = value if isinstance(value, list) else [value]
+        if key == "source_app" and source.get("app_id") not in values:
+            return False
+        if key == "severity" and log.get("severity") not in values:
+            return False
+        if key == "min_severity" and order.get(log.get("severity"), 0) < order[value]:
+            return False
+        if key == "host" and source.get("host") not in values:
+            return False
+        if key == "trace_id" and log.get("trace_id") not in values:
+            return False
+        if key == "message":
+            spec = {"contains": value} if isinstance(value, str) else value
+            flags = re.IGNORECASE if spec.get("ignore_case") else 0
+            if "regex" in spec and not re.search(spec["regex"], log.get("message") or "", flags):
+                return False
+            if "contains" in spec and spec["contains"] not in (log.get("message") or ""):
+                return False
+        if key == "metadata":
+            for path, expected in value.items():
+                current = log.get("metadata") or {}
+                for part in path.split("."):
+                    current = current.get(part) if isinstance(current, dict) else None
+                if current != expected:
+                    return False
+        if key == "all" and not all(interpret(f, log) for f in value):
+            return False
+        if key == "any" and not any(interpret(f, log) for f in value):
+            return False
+        if key == "not" and interpret(value, log):
+            return False
+    return True
+
+
+def random_log() -> dict:
+    return {
+        "source": {"app_id": random.choice(APPS), "host": random.choice(HOSTS)},
+        "severity": random.choices(SEVERITIES, weights=[30, 50, 10, 8, 2])[0],
+        "message": " ".join(random.choices(WORDS, k=8)),
+        "metadata": {"region": random.choice(["eu", "us"]), "http": {"status": random.choice([200, 404, 500])}},
+        "trace_id": f"trace-{random.randrange(1000)}",
+    }
+
+
+def simple_filter() -> dict:
+    filters: dict = {"source_app": random.sample(APPS, 3)}
+    if random.random() < 0.5:
+        filters["min_severity"] = random.choice(["warn", "error"])
+    else:
+        filters["severity"] = random.sample(SEVERITIES, 2)
+    return filters
+
+
+def rich_filter() -> dict:
+    return {
+        "min_severity": "info",
+        "message": {"regex": f"{random.choice(WORDS)}\\s+{random.choice(WORDS)}"},
+        "any": [
+            {"host": random.sample(HOSTS, 3)},
+            {"metadata": {"http.status": 500, "region": random.choice(["eu", "us"])}},
+        ],
+        "not": {"message": {"contains": random.choice(WORDS)}},
+    }
+
+
+def bench(name: str, check, filters: list, logs: list[dict]) -> None:
+    start = time.perf_counter()
+    matched = 0
+    for log in logs:
+        for f in filters:
+            if check(f, log):
+                matched += 1
+    elapsed = time.perf_counter() - start
+    evaluations = len(logs) * len(filters)
+    print(
+        f"{name:28s} {elapsed:7.3f}s  {evaluations / elapsed / 1e6:6.2f}M checks/sec  "
+        f"({matched:,} matches)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filters", type=int, default=1000)
+    parser.add_argument("--logs", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    logs = [random_log() for _ in range(args.logs)]
+
+    simple = [simple_filter() for _ in range(args.filters)]
+    compiled_simple = [compile_filter(f) for f in simple]
+    bench("simple, interpreted (legacy)", lambda f, log: legacy_matches(log, f), simple, logs)
+    bench("simple, compiled", lambda f, log: f.matches(log), compiled_simple, logs)
+
+    rich = [rich_filter() for _ in range(args.filters)]
+    start = time.perf_counter()
+    compiled_rich = [compile_filter(f) for f in rich]
+    compile_ms = (time.perf_counter() - start) * 1000
+    bench("rich, interpreted", interpret, rich, logs)
+    bench("rich, compiled", lambda f, log: f.matches(log), compiled_rich, logs)
+    print(f"compiled {args.filters} rich filters in {compile_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
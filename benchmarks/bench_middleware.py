@@ -0,0 +1,182 @@
+"""
+Benchmark the HTTP middleware stack: BaseHTTPMiddleware (before) vs pure ASGI (after).
+
+Requests are driven in-process through the ASGI interface (no sockets), so
+the numbers isolate framework and middleware overhead. GET /health and a
+DB-free POST /logs (body validated as LogCreate) run behind each stack.
+The rate limiter runs without Redis in both, and log output goes to
+/dev/null: the legacy stack print()s each line, the new one queues JSON
+records for a writer thread.
+
+Usage: python -m benchmarks.bench_middleware [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.access_log import access_log
+from app.middleware import RateLimitMiddleware, RequestLoggingMiddleware
+from app.models.log import LogCreate
+from app.services.rate_limiter import rate_limiter
+
+legacy_logger = logging.getLogger("bench.legacy")
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """RequestLoggingMiddleware before the ASGI rewrite."""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if request.url.path.startswith("/health"):
+            return await call_next(request)
+        start_time = time.time()
+        client_ip = request.client.host if request.client else "unknown"
+        response = await call_next(request)
+        duration_ms = round((time.time() - start_time) * 1000, 2)
+        log_message = (
+            f"{request.method} {request.url.path} "
+            f"{response.status_code} {duration_ms}ms {client_ip}"
+        )
+        legacy_logger.info(log_message)
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {log_message}")
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """RateLimitMiddleware before the ASGI rewrite."""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if request.url.path.startswith("/health"):
+            return await call_next(request)
+        client_ip = request.client.host if request.client else "unknown"
+        result = await rate_limiter.check(
+            request.method, request.url.path, client_ip, request.headers.get("x-api-key"),
+        )
+        response = await call_next(request)
+        if result is not None:
+            response.headers["X-RateLimit-Limit"] = str(result.limit)
+            response.headers["X-RateLimit-Remaining"] = str(max(0, result.remaining))
+        return response
+
+
+def build_app(logging_middleware, rate_limit_middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(logging_middleware)
+    app.add_middleware(rate_limit_middleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "version": "0.1.0"}
+
+    @app.post("/logs", status_code=201)
+    async def ingest(log: LogCreate):
+        return {"id": "1", "timestamp": (log.timestamp or datetime.now(timezone.utc)).isoformat()}
+
+    return app
+
+
+LOG_BODY = json.dumps({
+    "source": {"app_id": "bench", "host": "host-1"},
+    "severity": "info",
+    "message": "user 42 logged in from 10.0.0.1",
+    "metadata": {"region": "eu"},
+}).encode()
+
+
+async def call(app, method: str, path: str, body: bytes = b"") -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-api-key", b"bench-key"),
+        ],
+        "client": ("10.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    body_sent = False
+    status = 0
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # client never disconnects
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run(app, method: str, path: str, body: bytes, requests: int, concurrency: int) -> float:
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            status = await call(app, method, path, body)
+            assert status < 300, status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    devnull = open(os.devnull, "w")
+    access_log.init(stream=devnull)
+    access_log.enabled = True
+
+    stacks = {
+        "BaseHTTPMiddleware": build_app(LegacyRequestLoggingMiddleware, LegacyRateLimitMiddleware),
+        "pure ASGI": build_app(RequestLoggingMiddleware, RateLimitMiddleware),
+    }
+    endpoints = [("GET", "/health", b""), ("POST", "/logs", LOG_BODY)]
+
+    with contextlib.redirect_stdout(devnull):
+        results = {}
+        for name, app in stacks.items():
+            for method, path, body in endpoints:
+                await run(app, method, path, body, args.requests // 10, args.concurrency)  # warm up
+                results[(name, method, path)] = await run(
+                    app, method, path, body, args.requests, args.concurrency,
+                )
+
+    access_log.close()
+    for (name, method, path), rps in results.items():
+        print(f"{name:20s} {method:4s} {path:8s} {rps:10,.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Closed-loop asyncio load generator and latency summaries."""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+@dataclass
+class LoadResult:
+    latencies: list[float] = field(default_factory=list)  # seconds, successful calls
+    errors: int = 0
+    elapsed: float = 0.0
+    items: int = 0  # work units (e.g. logs) when a call carries more than one
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        elapsed = self.elapsed or 1e-9
+        result = {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+        if self.items:
+            result["items_per_second"] = round(self.items / elapsed, 1)
+        return result
+
+
+async def run_load(
+    call: Callable[[int], Awaitable[int | None]],
+    concurrency: int,
+    duration: float,
+    warmup: float = 1.0,
+) -> LoadResult:
+    """
+    Run call(i) back to back from `concurrency` workers for `duration` seconds.
+
+    call may return the number of work units it carried. Calls that raise
+    count as errors. The warm-up period is run but not measured.
+    """
+    result = LoadResult()
+    counter = 0
+    measuring = False
+    deadline = 0.0
+
+    async def worker() -> None:
+        nonlocal counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            start = time.perf_counter()
+            try:
+                items = await call(counter)
+            except Exception:
+                if measuring:
+                    result.errors += 1
+                continue
+            if measuring:
+                result.latencies.append(time.perf_counter() - start)
+                result.items += items or 0
+
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    measuring = True
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - start
+    return result
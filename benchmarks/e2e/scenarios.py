@@ -0,0 +1,200 @@
+"""End-to-end scenarios run against a live server over HTTP and WebSocket."""
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import httpx
+import websockets
+
+from benchmarks.e2e.loadgen import LoadResult, percentile, run_load
+from benchmarks.e2e.seed import APPS, HOSTS, SEVERITIES
+
+SEARCH_TERMS = ["timeout", "declined", "logged", "upstream", "retries"]
+BULK_SIZE = 100
+FANOUT_APP = "bench-fanout"
+
+
+@dataclass
+class Target:
+    base_url: str
+    api_key: str
+    days: int
+    concurrency: int
+    duration: float
+    subscribers: int
+
+    @property
+    def ws_url(self) -> str:
+        scheme, rest = self.base_url.split("://", 1)
+        return f"{'wss' if scheme == 'https' else 'ws'}://{rest}/stream?api_key={self.api_key}"
+
+
+def _log(rng: random.Random, app: str | None = None, **metadata) -> dict:
+    return {
+        "source": {"app_id": app or rng.choice(APPS), "host": rng.choice(HOSTS)},
+        "severity": rng.choice(SEVERITIES),
+        "message": f"user {rng.randrange(1_000_000)} logged in from 10.0.{rng.randrange(256)}.1",
+        "metadata": {"region": "eu", **metadata},
+    }
+
+
+async def _check(response: Awaitable[httpx.Response]) -> httpx.Response:
+    response = await response
+    response.raise_for_status()
+    return response
+
+
+def http_scenarios(client: httpx.AsyncClient, target: Target) -> dict[str, Callable[[int], Awaitable]]:
+    """Request factories per scenario name; each takes the call number."""
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    window_start = (now - timedelta(days=target.days)).isoformat()
+
+    async def ingest_single(i: int) -> int:
+        await _check(client.post("/logs", json=_log(rng)))
+        return 1
+
+    async def ingest_bulk(i: int) -> int:
+        await _check(client.post("/logs/bulk", json=[_log(rng) for _ in range(BULK_SIZE)]))
+        return BULK_SIZE
+
+    async def query_filtered(i: int) -> None:
+        await _check(client.get("/logs", params={
+            "source_app": rng.choice(APPS), "severity": "error,fatal", "limit": 100,
+        }))
+
+    async def query_search(i: int) -> None:
+        await _check(client.get("/logs/search", params={
+            "q": rng.choice(SEARCH_TERMS), "source_app": rng.choice(APPS), "limit": 50,
+        }))
+
+    async def query_paginated(i: int) -> None:
+        # Deep offsets spread over the dataset so most pages miss the cache
+        await _check(client.get("/logs", params={
+            "source_app": rng.choice(APPS), "limit": 100, "offset": rng.randrange(0, 10_000, 100),
+        }))
+
+    async def stats_summary(i: int) -> None:
+        await _check(client.get("/stats/summary", params={
+            "source_app": rng.choice(APPS), "start": window_start,
+        }))
+
+    async def stats_timeseries(i: int) -> None:
+        await _check(client.get("/stats/timeseries", params={
+            "start": window_start, "interval": rng.choice(["5m", "1h"]), "group_by": "severity",
+        }))
+
+    async def stats_patterns(i: int) -> None:
+        await _check(client.get("/stats/patterns", params={"start": window_start}))
+
+    return {
+        "ingest_single": ingest_single,
+        "ingest_bulk": ingest_bulk,
+        "query_filtered": query_filtered,
+        "query_search": query_search,
+        "query_paginated": query_paginated,
+        "stats_summary": stats_summary,
+        "stats_timeseries": stats_timeseries,
+        "stats_patterns": stats_patterns,
+    }
+
+
+async def run_http(name: str, target: Target) -> dict:
+    limits = httpx.Limits(max_connections=target.concurrency)
+    async with httpx.AsyncClient(
+        base_url=target.base_url,
+        headers={"X-API-Key": target.api_key},
+        limits=limits,
+        timeout=30.0,
+    ) as client:
+        call = http_scenarios(client, target)[name]
+        result = await run_load(call, target.concurrency, target.duration)
+    return result.summary()
+
+
+async def _subscriber(target: Target, ready: asyncio.Event, stop: asyncio.Event, latencies: list[float]) -> None:
+    async with websockets.connect(target.ws_url, max_queue=None) as ws:
+        await ws.recv()  # connected
+        await ws.send(json.dumps({
+            "type": "subscribe", "subscription_id": "bench", "filters": {"source_app": FANOUT_APP},
+        }))
+        while json.loads(await ws.recv())["type"] != "subscribed":
+            pass
+        ready.set()
+
+        while not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            received = time.time()
+            frame = json.loads(raw)
+            if frame["type"] == "log":
+                logs = [frame["data"]]
+            elif frame["type"] == "logs":
+                logs = frame["data"]
+            elif frame["type"] == "ping":
+                await ws.send(json.dumps({"type": "pong", "timestamp": frame.get("timestamp")}))
+                continue
+            else:
+                continue
+            for log in logs:
+                latencies.append(received - log["metadata"]["sent_at"])
+
+
+async def run_fanout(target: Target) -> dict:
+    """N subscribers on one app; bulk ingest for `duration`; delivery latency per log."""
+    latencies: list[float] = []
+    stop = asyncio.Event()
+    readies = [asyncio.Event() for _ in range(target.subscribers)]
+    subscribers = [
+        asyncio.create_task(_subscriber(target, ready, stop, latencies)) for ready in readies
+    ]
+    await asyncio.wait_for(asyncio.gather(*(ready.wait() for ready in readies)), timeout=60)
+
+    rng = random.Random(11)
+    async with httpx.AsyncClient(
+        base_url=target.base_url, headers={"X-API-Key": target.api_key}, timeout=30.0,
+    ) as client:
+        async def publish(i: int) -> int:
+            logs = [_log(rng, FANOUT_APP, sent_at=time.time()) for _ in range(BULK_SIZE)]
+            await _check(client.post("/logs/bulk", json=logs))
+            return BULK_SIZE
+
+        published: LoadResult = await run_load(publish, 1, target.duration, warmup=0)
+
+    await asyncio.sleep(2.0)  # let in-flight frames land
+    stop.set()
+    await asyncio.gather(*subscribers, return_exceptions=True)
+
+    latencies.sort()
+    expected = published.items * target.subscribers
+    return {
+        "subscribers": target.subscribers,
+        "published": published.items,
+        "delivered": len(latencies),
+        "delivery_ratio": round(len(latencies) / expected, 4) if expected else 0.0,
+        "throughput": round(len(latencies) / published.elapsed, 1) if published.elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+SCENARIOS = [
+    "ingest_single", "ingest_bulk",
+    "query_filtered", "query_search", "query_paginated",
+    "stats_summary", "stats_timeseries", "stats_patterns",
+    "stream_fanout",
+]
+
+
+async def run_scenario(name: str, target: Target) -> dict:
+    if name == "stream_fanout":
+        return await run_fanout(target)
+    return await run_http(name, target)
@@ -0,0 +1,98 @@
+"""Seed a deterministic multi-day dataset straight into TimescaleDB."""
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+from app.services.pattern_service import WILDCARD, fingerprint
+
+APP_PREFIX = "bench-"
+APPS = [f"{APP_PREFIX}app-{i}" for i in range(20)]
+HOSTS = [f"host-{i}" for i in range(50)]
+SEVERITIES = ["debug", "info", "warn", "error", "fatal"]
+SEVERITY_WEIGHTS = [30, 55, 10, 4, 1]
+TEMPLATES = [
+    "user {n} logged in from 10.0.{a}.{b}",
+    "GET /api/orders/{n} completed in {a}ms",
+    "payment {n} declined: insufficient funds",
+    "cache miss for key session:{n}",
+    "connection timeout after {a}ms to db-{b}",
+    "job {n} finished with {a} retries",
+    "disk usage at {a}% on volume {b}",
+    "upstream returned 503 for request {n}",
+]
+# Seeded templates as PatternService stores them, with ids from the same fingerprint
+PATTERNS = [t.format(n=WILDCARD, a=WILDCARD, b=WILDCARD) for t in TEMPLATES]
+PATTERN_IDS = [fingerprint(template.split()) for template in PATTERNS]
+
+COLUMNS = [
+    "timestamp", "source_app", "source_host", "source_instance", "severity",
+    "message", "metadata", "trace_id", "span_id", "created_at", "pattern_id",
+]
+BATCH_ROWS = 50_000
+
+
+def _rows(rng: random.Random, start: datetime, count: int, span: timedelta):
+    step = span / count
+    for i in range(count):
+        timestamp = start + step * i
+        template_id = rng.randrange(len(TEMPLATES))
+        message = TEMPLATES[template_id].format(
+            n=rng.randrange(1_000_000), a=rng.randrange(1000), b=rng.randrange(256),
+        )
+        host = rng.choice(HOSTS)
+        yield (
+            timestamp,
+            rng.choice(APPS),
+            host,
+            f"{host}-{rng.randrange(4)}",
+            rng.choices(SEVERITIES, SEVERITY_WEIGHTS)[0],
+            message,
+            json.dumps({"region": rng.choice(["eu", "us", "ap"]), "user_id": rng.randrange(10_000)}),
+            f"{rng.getrandbits(64):016x}" if rng.random() < 0.3 else None,
+            None,
+            timestamp,
+            PATTERN_IDS[template_id],
+        )
+
+
+async def seed(database_url: str, days: int, logs_per_day: int, seed_value: int = 42) -> int:
+    """Replace the bench-* dataset with `days` days of logs ending now; returns rows written."""
+    rng = random.Random(seed_value)
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=days)
+
+    conn = await asyncpg.connect(database_url)
+    try:
+        await conn.execute("DELETE FROM logs WHERE source_app LIKE $1", APP_PREFIX + "%")
+        await conn.executemany(
+            """
+            INSERT INTO log_patterns (pattern_id, template) VALUES ($1, $2)
+            ON CONFLICT (pattern_id) DO UPDATE SET template = EXCLUDED.template
+            """,
+            list(zip(PATTERN_IDS, PATTERNS)),
+        )
+
+        written = 0
+        for day in range(days):
+            rows = _rows(rng, start + timedelta(days=day), logs_per_day, timedelta(days=1))
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == BATCH_ROWS:
+                    await conn.copy_records_to_table("logs", records=batch, columns=COLUMNS)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                await conn.copy_records_to_table("logs", records=batch, columns=COLUMNS)
+                written += len(batch)
+            print(f"  seeded day {day + 1}/{days} ({written:,} logs)")
+
+        # Materialize the rollups so stats read them like a long-running deployment
+        for view in ("logs_1m", "logs_1h", "logs_1d"):
+            await conn.execute("CALL refresh_continuous_aggregate($1, $2, $3)", view, start, end)
+        await conn.execute("ANALYZE logs")
+        return written
+    finally:
+        await conn.close()
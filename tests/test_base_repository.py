@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from app.core.slow_query_log import slow_query_log
+from app.repositories.base import BaseRepository
+
+
+class FakeConnection:
+    async def execute(self, query, *args):
+        return "UPDATE 3"
+
+    async def fetchrow(self, query, *args):
+        raise asyncio.TimeoutError("canceling statement due to statement timeout")
+
+
+@pytest.fixture
+def slow_log(monkeypatch):
+    monkeypatch.setattr(slow_query_log, "enabled", True)
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+    monkeypatch.setattr(slow_query_log, "explain_sample_rate", 1.0)
+    slow_query_log.clear()
+    yield slow_query_log
+    slow_query_log.clear()
+
+
+@pytest.mark.asyncio
+async def test_run_on_records_queries_on_a_given_connection(slow_log):
+    repo = BaseRepository()
+    assert await repo._run_on(FakeConnection(), "execute", "UPDATE t SET x = $1", 1) == "UPDATE 3"
+    [entry] = slow_log.get_entries()
+    assert entry["repository"] == "BaseRepository"
+    assert entry["rows"] == 3
+    assert entry["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_failed_queries_are_recorded_without_explain(slow_log):
+    repo = BaseRepository(FakeConnection())
+    with pytest.raises(asyncio.TimeoutError):
+        await repo._fetchrow("SELECT * FROM logs WHERE id = $1", 7)
+    [entry] = slow_log.get_entries()
+    assert entry["rows"] is None
+    assert entry["error"].startswith("TimeoutError")
+    assert entry["duration_ms"] >= 0
+    assert not slow_log._explains
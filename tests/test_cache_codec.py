@@ -0,0 +1,46 @@
+import zlib
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.cache_codec import CODECS, MarshalCodec, get_codec, pack, unpack
+
+VALUE = {
+    "logs": [{"id": "1", "message": "x" * 5000, "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc)}],
+    "pagination": {"total": 1, "has_more": False},
+}
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+@pytest.mark.parametrize("threshold", [0, 1024])
+def test_round_trip(name, threshold):
+    payload, raw_size = pack(get_codec(name), VALUE, threshold)
+    assert (len(payload) < raw_size) is bool(threshold)
+    decoded = unpack(payload)
+    assert decoded["pagination"] == VALUE["pagination"]
+    assert decoded["logs"][0]["message"] == VALUE["logs"][0]["message"]
+    assert decoded["logs"][0]["timestamp"].startswith("2024-01-01")
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"",
+        bytes((0x7F,)) + b"{}",
+        bytes((0x81,)) + b"not zlib",
+        bytes((0x01,)) + b"{truncated",
+        bytes((0x01,)) + b"\xff\xfe",
+        bytes((0x82,)) + zlib.compress(MarshalCodec.VERSION + b"\x00garbage"),
+        bytes((0x02,)) + MarshalCodec.VERSION,
+    ],
+)
+def test_corrupt_payloads_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        unpack(payload)
+
+
+def test_marshal_from_another_python_is_rejected():
+    payload, _ = pack(get_codec("marshal"), {"a": 1}, 0)
+    other = payload[:1] + bytes((2, 7)) + payload[3:]
+    with pytest.raises(ValueError):
+        unpack(other)
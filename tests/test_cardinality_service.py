@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.services.cardinality_service import CardinalityService
+
+
+class FakePipeline:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def pfcount(self, *keys):
+        self.calls.append(keys)
+
+    async def execute(self):
+        return [len(keys) for keys in self.calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.calls = []
+
+    def pipeline(self, transaction=False):
+        self.calls.clear()
+        return FakePipeline(self.calls)
+
+
+def service(retention_hours=8 * 24):
+    svc = CardinalityService()
+    svc._redis = FakeRedis()
+    svc._hour_ttl = retention_hours * 3600
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_recent_window_counts_minute_keys():
+    svc = service()
+    end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    result = await svc.estimate(start=end - timedelta(minutes=5), end=end, fields=("host",))
+    assert result["estimates"] == {"host": 5}
+    assert result["time_range"] == {"start": end - timedelta(minutes=5), "end": end}
+    assert result["time_basis"] == "ingest"
+
+
+@pytest.mark.asyncio
+async def test_old_minute_edges_report_widened_range():
+    svc = service()
+    now = datetime.now(timezone.utc)
+    start = (now - timedelta(hours=6)).replace(minute=10, second=0, microsecond=0)
+    end = start + timedelta(minutes=20)
+    result = await svc.estimate(start=start, end=end, fields=("host",))
+    assert result["estimates"] == {"host": 1}
+    assert result["time_range"] == {
+        "start": start.replace(minute=0),
+        "end": start.replace(minute=0) + timedelta(hours=1),
+    }
+    assert result["requested_range"] == {"start": start, "end": end}
+
+
+@pytest.mark.asyncio
+async def test_window_clamped_to_retention():
+    svc = service(retention_hours=24)
+    now = datetime.now(timezone.utc)
+    result = await svc.estimate(start=now - timedelta(days=30), end=now, fields=("host",))
+    assert result["time_range"]["start"] >= now - timedelta(hours=25)
+
+
+@pytest.mark.asyncio
+async def test_rejects_windows_over_max_keys():
+    svc = service(retention_hours=24 * 365)
+    now = datetime.now(timezone.utc)
+    with pytest.raises(ValidationError):
+        await svc.estimate(start=now - timedelta(days=90), end=now)
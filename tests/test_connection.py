@@ -0,0 +1,14 @@
+import pytest
+
+from app.db.connection import worker_pool_size
+
+
+def test_budget_is_split_without_exceeding_it():
+    assert worker_pool_size(20, 4) == 5
+    assert worker_pool_size(20, 3) * 3 <= 20
+    assert worker_pool_size(20, 0) == 20
+
+
+def test_budget_too_small_for_workers_fails():
+    with pytest.raises(RuntimeError, match="WEB_CONCURRENCY"):
+        worker_pool_size(20, 16)
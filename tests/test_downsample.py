@@ -0,0 +1,85 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.downsample import lttb_indices
+from app.core.time_buckets import (
+    BUCKET_ORIGIN,
+    bucket_starts,
+    format_interval,
+    parse_interval,
+    widen_interval,
+)
+from app.repositories.stats_repository import MAX_BUCKETS, StatsRepository
+
+UTC = timezone.utc
+
+
+def test_lttb_keeps_endpoints_and_size():
+    values = [math.sin(i / 10) * 100 for i in range(1000)]
+    indices = lttb_indices(values, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert indices == sorted(set(indices))
+
+
+def test_lttb_keeps_spikes():
+    values = [1.0] * 1000
+    values[437] = 500.0
+    assert 437 in lttb_indices(values, 20)
+
+
+@pytest.mark.parametrize(("size", "threshold", "expected"), [(5, 10, 5), (5, 2, 2), (5, 1, 1)])
+def test_lttb_small_inputs(size, threshold, expected):
+    assert len(lttb_indices(list(range(size)), threshold)) == expected
+
+
+@pytest.mark.parametrize(("value", "seconds"), [("90s", 90), ("5m", 300), ("6h", 21600), ("1d", 86400)])
+def test_parse_interval(value, seconds):
+    assert parse_interval(value) == timedelta(seconds=seconds)
+
+
+@pytest.mark.parametrize("value", ["", "5", "0m", "-5m", "5w", "1.5h", "99999999999d", "3651d"])
+def test_parse_interval_rejects(value):
+    with pytest.raises(ValueError):
+        parse_interval(value)
+
+
+def test_format_interval():
+    assert format_interval(timedelta(seconds=300)) == "5m"
+    assert format_interval(timedelta(seconds=90)) == "90s"
+    assert format_interval(timedelta(days=7)) == "7d"
+
+
+@pytest.mark.parametrize("max_points", [2, 10, 100, 1000, MAX_BUCKETS])
+@pytest.mark.parametrize("span", [timedelta(hours=1), timedelta(days=30), timedelta(days=3650)])
+def test_widen_interval_bounds_points(max_points, span):
+    start = datetime(2024, 1, 1, 0, 0, 17, tzinfo=UTC)
+    end = start + span
+    width = widen_interval(timedelta(minutes=1), start, end, max_points)
+    assert width >= timedelta(minutes=1)
+    assert len(bucket_starts(start, end, width)) <= max_points
+
+
+def test_bucket_starts_follow_time_bucket_origin():
+    start = datetime(2024, 1, 1, 5, tzinfo=UTC)
+    starts = bucket_starts(start, start + timedelta(days=20), timedelta(days=7))
+    assert all((s - BUCKET_ORIGIN) % timedelta(days=7) == timedelta(0) for s in starts)
+    assert starts[0] <= start < starts[0] + timedelta(days=7)
+
+
+@pytest.mark.asyncio
+async def test_lttb_accepts_long_windows():
+    async def no_rows(query, *args):
+        return []
+
+    repo = StatsRepository()
+    repo._fetch = no_rows
+    start = datetime(2020, 1, 1, tzinfo=UTC)
+    width, series = await repo.get_timeseries(
+        start=start, end=start + timedelta(days=365), bucket_width=timedelta(seconds=10),
+        max_points=500, downsample="lttb",
+    )
+    assert width > timedelta(seconds=10)
+    assert len(series) == 500
@@ -0,0 +1,37 @@
+from app.services import live_stats_service as module
+from app.services.live_stats_service import LiveStatsService
+
+
+def test_by_app_matches_series(monkeypatch):
+    now = 1_700_000_000
+    monkeypatch.setattr(module.time, "time", lambda: now + 0.5)
+    service = LiveStatsService()
+    service._apply_second(now - 2, {("api", "info"): 3, ("web", "error"): 1})
+    service._apply_second(now - 1, {("api", "warn"): 2})
+    # The current second is still filling and is not part of the window
+    service._apply_second(now, {("api", "info"): 50, ("worker", "info"): 7})
+
+    snapshot = service.snapshot()
+
+    assert snapshot["total_logs"] == 6
+    assert snapshot["by_app"] == {"api": 5, "web": 1}
+    assert sum(sum(point["values"].values()) for point in snapshot["series"]) == 6
+    assert service.snapshot("api")["total_logs"] == 5
+
+
+def test_by_app_totals_follow_overwritten_and_stale_slots(monkeypatch):
+    now = 1_700_000_000
+    monkeypatch.setattr(module.time, "time", lambda: now + 0.5)
+    service = LiveStatsService()
+    # Outside the window: left in the ring by a stalled refresh
+    service._apply_second(now - service.WINDOW - 5, {("old", "info"): 9})
+    service._apply_second(now - 3, {("api", "info"): 4})
+    # A later read of the same second replaces it
+    service._apply_second(now - 3, {("api", "info"): 1, ("web", "warn"): 2})
+
+    assert service.snapshot()["by_app"] == {"api": 1, "web": 2}
+    assert service._app_totals == {"old": 9, "api": 1, "web": 2}
+
+    # Its slot is reused 60 seconds later
+    service._apply_second(now - 3 + service.WINDOW, {})
+    assert service._app_totals == {"old": 9}
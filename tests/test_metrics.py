@@ -0,0 +1,108 @@
+import json
+import time
+
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, merge, render
+from app.services.worker_stats_service import WorkerStatsService
+
+
+def test_exposition_format():
+    requests = Counter("app_requests_total", "Requests.", labels=("route",))
+    requests.inc("/logs")
+    requests.inc("/logs", amount=2)
+    requests.inc('/a"b')
+    pool = Gauge("app_pool_size", "Pool size.")
+    pool.set(5)
+    latency = Histogram("app_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3.0)
+
+    assert render([requests, pool, latency]) == "\n".join([
+        "# HELP app_requests_total Requests.",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{route="/logs"} 3',
+        'app_requests_total{route="/a\\"b"} 1',
+        "# HELP app_pool_size Pool size.",
+        "# TYPE app_pool_size gauge",
+        "app_pool_size 5",
+        "# HELP app_latency_seconds Latency.",
+        "# TYPE app_latency_seconds histogram",
+        'app_latency_seconds_bucket{le="0.1"} 1',
+        'app_latency_seconds_bucket{le="1"} 2',
+        'app_latency_seconds_bucket{le="+Inf"} 3',
+        "app_latency_seconds_sum 3.55",
+        "app_latency_seconds_count 3",
+    ]) + "\n"
+
+
+def worker_metrics(requests: int, pool_size: int, observations: list[float]) -> list[dict]:
+    counter = Counter("app_requests_total", "Requests.", labels=("route",))
+    counter.inc("/logs", amount=requests)
+    gauge = Gauge("app_pool_size", "Pool size.")
+    gauge.set(pool_size)
+    histogram = Histogram("app_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in observations:
+        histogram.observe(value)
+    return [counter.dump(), gauge.dump(), histogram.dump()]
+
+
+def test_merge_sums_workers():
+    merged = {m.name: m for m in merge([
+        json.loads(json.dumps(worker_metrics(3, 5, [0.05]))),
+        json.loads(json.dumps(worker_metrics(4, 5, [0.5, 2.0]))),
+    ])}
+    assert merged["app_requests_total"].values == {("/logs",): 7}
+    assert merged["app_pool_size"].values == {(): 10}
+    counts, total = merged["app_latency_seconds"].series[()]
+    assert counts == [1, 1, 1]
+    assert total == pytest.approx(2.55)
+
+
+class FakeRedis:
+    def __init__(self, fields):
+        self.fields = fields
+
+    async def hgetall(self, key):
+        return self.fields
+
+    async def get(self, key):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_stale_workers_keep_counters_but_not_gauges(monkeypatch):
+    service = WorkerStatsService()
+    monkeypatch.setattr(
+        "app.services.worker_stats_service.collect",
+        lambda: [],
+    )
+    now = time.time()
+    snapshot = {"cache": {}, "slow_queries": {"stats": {}, "entries": []}}
+    service._redis = FakeRedis({
+        b"101": json.dumps({**snapshot, "at": now, "metrics": worker_metrics(3, 5, [0.05])}),
+        b"102": json.dumps({**snapshot, "at": now - 60, "metrics": worker_metrics(4, 5, [])}),
+    })
+
+    merged = {m.name: m for m in await service.metrics()}
+
+    assert merged["app_requests_total"].values == {("/logs",): 7}
+    assert merged["app_pool_size"].values == {(): 5}
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_sum_workers():
+    service = WorkerStatsService()
+    counters = {"hits": 3, "misses": 1, "sets": 1, "oversize_skips": 0,
+                "invalidations": 0, "bytes_stored": 100, "bytes_raw": 200}
+    snapshot = {"at": time.time(), "metrics": [], "slow_queries": {}}
+    service._redis = FakeRedis({
+        b"101": json.dumps({**snapshot, "cache": {"logs": counters}}),
+        b"102": json.dumps({**snapshot, "cache": {"logs": counters}}),
+    })
+
+    stats = await service.cache_stats()
+
+    assert stats["logs"]["hits"] >= 6
+    assert stats["logs"]["misses"] >= 2
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.log import LogCreate
+from app.services import log_service as log_service_module
+from app.services.log_service import LogService
+from app.services.pattern_service import WILDCARD, PatternService
+
+
+def test_masks_variable_parts():
+    service = PatternService()
+    cluster = service.assign("user 42 logged in from 10.0.0.1:443")
+    assert cluster.template == f"user {WILDCARD} logged in from {WILDCARD}"
+
+
+def test_generalizes_differing_tokens():
+    service = PatternService()
+    first = service.assign("payment declined for alice")
+    second = service.assign("payment declined for bob")
+    assert second is first
+    assert first.size == 2
+    assert first.template == f"payment declined for {WILDCARD}"
+    assert not first.saved
+
+
+def test_dissimilar_messages_in_one_leaf_stay_apart():
+    service = PatternService()
+    a = service.assign("worker pool started with eight threads")
+    b = service.assign("worker pool disk quota exceeded on volume")
+    c = service.assign("worker pool started with four threads")
+    assert a is c
+    assert a is not b
+    assert a.template == f"worker pool started with {WILDCARD} threads"
+    assert b.template == "worker pool disk quota exceeded on volume"
+
+
+def test_processes_converge_on_the_smaller_id():
+    messages = ["cache miss for key users", "cache miss for key orders"]
+    forward, backward = PatternService(), PatternService()
+    mine = forward.assign(messages[0])
+    theirs = backward.assign(messages[1])
+    assert mine.pattern_id != theirs.pattern_id
+    winner = min(mine.pattern_id, theirs.pattern_id)
+    loser = max(mine.pattern_id, theirs.pattern_id)
+
+    # Each process reads the other's stored pattern
+    aliases = forward.reconcile(theirs.pattern_id, theirs.template)
+    assert aliases == [(loser, winner)]
+    backward.reconcile(mine.pattern_id, mine.template)
+
+    assert forward.assign(messages[1]).pattern_id == winner
+    assert backward.assign(messages[0]).pattern_id == winner
+    assert forward.assign(messages[0]).template == f"cache miss for key {WILDCARD}"
+
+
+def test_stored_alias_is_followed():
+    service = PatternService()
+    cluster = service.assign("disk full on volume data")
+    service.reconcile(cluster.pattern_id, cluster.template, canonical_id=7)
+    assert service.assign("disk full on volume logs").pattern_id == 7
+
+
+def test_stored_pattern_seeds_the_tree():
+    service = PatternService()
+    assert service.reconcile(42, f"payment declined for {WILDCARD}") == []
+    cluster = service.assign("payment declined for carol")
+    assert cluster.pattern_id == 42
+    assert cluster.saved
+
+
+def test_overflow_reuses_one_saved_cluster(monkeypatch):
+    monkeypatch.setattr(PatternService, "MAX_CLUSTERS", 2)
+    service = PatternService()
+    service.assign("alpha job one")
+    service.assign("beta two")
+
+    overflow = service.assign("gamma three")
+    assert overflow.template == WILDCARD
+    overflow.saved = True
+    again = service.assign("delta four")
+    assert again is overflow
+    assert again.saved
+    # Known templates keep their own clusters
+    assert service.assign("alpha job five").template == f"alpha job {WILDCARD}"
+
+
+class FakePatternRepository:
+    def __init__(self, rows):
+        self.rows = rows
+        self.aliases = []
+
+    async def get_patterns(self, updated_after=None, limit=10_000):
+        return [r for r in self.rows if updated_after is None or r["updated_at"] > updated_after]
+
+    async def alias_pattern(self, pattern_id, canonical_id, template):
+        self.aliases.append((pattern_id, canonical_id, template))
+
+
+@pytest.mark.asyncio
+async def test_sync_stores_aliases_and_advances():
+    service = PatternService()
+    local = service.assign("queue backlog above limit on shard")
+    other = local.pattern_id + 1 if local.pattern_id % 2 == 0 else local.pattern_id - 1
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    service._repo = FakePatternRepository([
+        {"pattern_id": other, "template": "queue backlog above limit on replica",
+         "canonical_id": None, "updated_at": at},
+    ])
+
+    winner, loser = sorted([local.pattern_id, other])  # smaller id wins
+    await service._sync()
+
+    assert service._repo.aliases == [
+        (loser, winner, f"queue backlog above limit on {WILDCARD}"),
+    ]
+    assert service._synced_at == at
+    assert not service.assign("queue backlog above limit on shard").saved
+
+    service._repo.rows = []
+    await service._sync()
+    assert service._synced_at == at
+
+
+class FakeLogRepository:
+    def __init__(self):
+        self.upserts = []
+
+    async def insert(self, log, pattern_id=None):
+        await asyncio.sleep(0)
+        return {"id": "1", "pattern_id": pattern_id}
+
+    async def upsert_pattern(self, pattern_id, template):
+        await asyncio.sleep(0.01)
+        self.upserts.append((pattern_id, template))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_inserts_upsert_a_template_once(monkeypatch):
+    monkeypatch.setattr(log_service_module, "pattern_service", PatternService())
+    repo = FakeLogRepository()
+    service = LogService(repo)
+    log = LogCreate.model_validate({
+        "timestamp": datetime.now(timezone.utc) - timedelta(seconds=1),
+        "severity": "info",
+        "message": "checkout completed",
+        "source": {"app_id": "shop"},
+    })
+    await asyncio.gather(*(service._insert(log) for _ in range(5)))
+    assert len(repo.upserts) == 1
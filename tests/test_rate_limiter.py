@@ -0,0 +1,123 @@
+"""
+Local pre-check against a fake script; with TEST_REDIS_URL set, the token
+bucket script also runs against Redis.
+"""
+import os
+import uuid
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+from app.services.rate_limiter import _TOKEN_BUCKET_SCRIPT, RateLimit, RateLimiter
+
+
+class FakeScript:
+    """Token bucket without refill; `callers` processes share each bucket."""
+
+    def __init__(self, callers=1):
+        self.callers = callers
+        self.tokens: dict[str, float] = {}
+        self.calls: list[tuple[list, list]] = []
+
+    async def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        limit, _, debt = args[:3]
+        tokens = self.tokens.get(keys[0], limit) - debt
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.tokens[keys[0]] = tokens
+        return [int(allowed), max(int(tokens), 0), 0 if allowed else 1000, self.callers]
+
+
+def limiter(script, precheck=True) -> RateLimiter:
+    rl = RateLimiter()
+    rl._redis = object()
+    rl._script = script
+    rl.local_precheck = precheck
+    rl.ip_limit = RateLimit(100, 60)
+    rl.key_limit = RateLimit(1000, 60)
+    rl._api_key = "secret"
+    rl._api_key_id = "k"
+    return rl
+
+
+@pytest.mark.asyncio
+async def test_api_key_buckets_are_per_client():
+    script = FakeScript()
+    rl = limiter(script, precheck=False)
+    await rl.check("GET", "/logs", "10.0.0.1", "secret")
+    await rl.check("GET", "/logs", "10.0.0.2", "secret")
+    await rl.check("GET", "/logs", "10.0.0.3", "wrong")
+    assert [keys[0] for keys, _ in script.calls] == [
+        "strym:ratelimit:key:k:10.0.0.1",
+        "strym:ratelimit:key:k:10.0.0.2",
+        "strym:ratelimit:ip:10.0.0.3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_precheck_admits_at_most_the_process_share():
+    script = FakeScript(callers=5)
+    rl = limiter(script)
+    for _ in range(30):
+        assert (await rl.check("GET", "/logs", "10.0.0.1", None)).allowed
+
+    # 99 left after the first call: 49 above the headroom, 9 for each of 5 processes
+    assert [args[2] for _, args in script.calls] == [0, 9, 7, 6]  # local admissions charged as debt
+    assert rl.local_hits == 9 + 7 + 6 + 4
+
+
+@pytest.mark.asyncio
+async def test_precheck_stops_near_the_limit():
+    script = FakeScript()
+    rl = limiter(script)
+    results = [await rl.check("GET", "/logs", "10.0.0.1", None) for _ in range(120)]
+    assert sum(r.allowed for r in results) == 100
+    assert script.tokens["strym:ratelimit:ip:10.0.0.1"] == 0
+    assert results[-1].retry_after == 1
+
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL")
+
+
+@pytest_asyncio.fixture
+async def bucket():
+    if not REDIS_URL:
+        pytest.skip("TEST_REDIS_URL not set")
+    client = redis.from_url(REDIS_URL)
+    key = f"strym:test:ratelimit:{uuid.uuid4().hex}"
+    script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def take(debt=0, caller="a", limit=10, window_ms=60_000):
+        return await script(keys=[key, f"{key}:callers"], args=[limit, window_ms, debt, caller, 2000])
+
+    yield take
+    await client.delete(key, f"{key}:callers")
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_lua_bucket_rejects_past_the_limit(bucket):
+    results = [await bucket() for _ in range(11)]
+    assert [r[0] for r in results] == [1] * 10 + [0]
+    assert results[9][1] == 0
+    assert results[10][2] > 0
+
+
+@pytest.mark.asyncio
+async def test_lua_bucket_charges_debt_in_full(bucket):
+    await bucket()
+    allowed, remaining, retry_ms, _ = await bucket(debt=25)
+    assert (allowed, remaining) == (0, 0)
+    # 9 - 25 leaves 16 tokens owed, so one token is 17 refills away
+    assert retry_ms > 16 * 6000
+
+
+@pytest.mark.asyncio
+async def test_lua_bucket_counts_active_callers(bucket):
+    await bucket(caller="a")
+    await bucket(caller="b")
+    *_, callers = await bucket(caller="a")
+    assert callers == 2
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.rollup_refresh_service import RollupRefreshService, _ranges
+
+MINUTE = timedelta(minutes=1)
+
+
+class FakeRepository:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.refreshed = []
+
+    async def refresh_rollups(self, start, end, horizon):
+        if self.fail:
+            raise RuntimeError("refresh failed")
+        self.refreshed.append((start, end))
+
+
+def service(repo) -> RollupRefreshService:
+    svc = RollupRefreshService()
+    svc._repo = repo
+    svc._retention_days = 30
+    return svc
+
+
+def test_only_late_logs_are_noted():
+    svc = service(FakeRepository())
+    now = datetime.now(timezone.utc)
+    minute = (now - timedelta(days=2)).replace(second=0, microsecond=0)
+    svc.record(None)
+    svc.record(now - timedelta(hours=1))
+    svc.record((minute + timedelta(seconds=10)).replace(tzinfo=None))  # naive means UTC
+    svc.record(minute + timedelta(seconds=50))
+    assert svc._late == {minute}
+
+
+def test_ranges_join_nearby_minutes():
+    t = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    minutes = [t, t + MINUTE, t + timedelta(minutes=30), t + timedelta(hours=5)]
+    assert _ranges(minutes, timedelta(hours=1)) == [
+        (t, t + timedelta(minutes=31)),
+        (t + timedelta(hours=5), t + timedelta(hours=5) + MINUTE),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_flush_refreshes_and_defers_past_max_ranges(monkeypatch):
+    monkeypatch.setattr(RollupRefreshService, "MAX_RANGES", 2)
+    repo = FakeRepository()
+    svc = service(repo)
+    t = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    svc._late = {t + timedelta(hours=3 * i) for i in range(3)}
+
+    await svc._flush()
+    assert repo.refreshed == [(t, t + MINUTE), (t + timedelta(hours=3), t + timedelta(hours=3) + MINUTE)]
+    assert svc._late == {t + timedelta(hours=6)}
+
+    await svc._flush()
+    assert svc._late == set()
+    assert svc.refreshed_total == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_minutes():
+    svc = service(FakeRepository(fail=True))
+    t = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    svc._late = {t, t + MINUTE}
+    with pytest.raises(RuntimeError):
+        await svc._flush()
+    assert svc._late == {t, t + MINUTE}
+
+
+def test_no_horizon_before_retention_is_known():
+    svc = RollupRefreshService()
+    assert svc.horizon is None
+    svc._retention_days = 7
+    assert svc.horizon < datetime.now(timezone.utc) - timedelta(days=6)
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from app.core.sketch import DDSketch
+
+
+def exact_quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(10_000)]
+    sketch = DDSketch(0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        expected = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.01)
+
+
+def test_zeros_and_empty():
+    assert DDSketch().quantile(0.99) == 0.0
+    sketch = DDSketch()
+    sketch.add(0, count=95)
+    sketch.add(10, count=5)
+    assert sketch.count == 100
+    assert sketch.quantile(0.9) == 0.0
+    assert sketch.quantile(0.99) == pytest.approx(10, rel=0.01)
+
+
+def test_merge_equals_single_sketch():
+    rng = random.Random(4)
+    values = [rng.randrange(1, 5000) for _ in range(3000)]
+    whole, left, right = DDSketch(), DDSketch(), DDSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+    left.merge(right)
+    assert left.bins == whole.bins
+    assert left.quantile(0.95) == whole.quantile(0.95)
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(0.01).merge(DDSketch(0.02))
+
+
+def test_bytes_round_trip():
+    sketch = DDSketch(0.02)
+    for value in (0, 0, 1, 7, 7, 1000):
+        sketch.add(value)
+    restored = DDSketch.from_bytes(sketch.to_bytes())
+    assert restored.relative_accuracy == 0.02
+    assert restored.zero_count == 2
+    assert restored.bins == sketch.bins
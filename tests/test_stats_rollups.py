@@ -0,0 +1,251 @@
+"""
+Rollup vs raw parity for StatsRepository.
+
+The in-memory tests evaluate the UNION ALL that _counts_source builds
+against simulated logs and continuous aggregates, so they check the
+planner and the SQL bounds exactly. With TEST_DATABASE_URL set (a
+migrated TimescaleDB), the same comparisons also run against the
+database through get_summary/get_timeseries.
+"""
+import os
+import random
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.core.time_buckets import BUCKET_ORIGIN, floor_time
+from app.repositories.stats_repository import ROLLUPS, StatsRepository
+
+UTC = timezone.utc
+T0 = datetime(2024, 3, 4, tzinfo=UTC)
+APPS = ["api", "worker", "web"]
+SEVERITIES = ["debug", "info", "warn", "error", "fatal"]
+
+_PART = re.compile(
+    r"FROM (?P<table>\w+) WHERE (?:timestamp|bucket) >= \$(?P<lo>\d+) "
+    r"AND (?:timestamp|bucket) (?P<op><=?) \$(?P<hi>\d+)"
+    r"(?: AND source_app = ANY\(\$(?P<apps>\d+)::TEXT\[\]\))?"
+)
+
+
+def make_events(rng: random.Random, count: int, span: timedelta) -> list[tuple[datetime, str, str]]:
+    micros = int(span.total_seconds() * 1_000_000)
+    return [
+        (T0 + timedelta(microseconds=rng.randrange(micros)), rng.choice(APPS), rng.choice(SEVERITIES))
+        for _ in range(count)
+    ]
+
+
+def rollup_tables(events) -> dict[str, Counter]:
+    """Fully materialized continuous aggregates."""
+    return {
+        rollup.name: Counter((floor_time(ts, rollup.width), app, sev) for ts, app, sev in events)
+        for rollup in ROLLUPS
+    }
+
+
+def evaluate(sql: str, params: list, events, tables) -> list[tuple[datetime, str, str, int]]:
+    """Run a _counts_source UNION ALL against in-memory logs and rollups."""
+    rows = []
+    for part in sql.split("UNION ALL"):
+        match = _PART.search(part)
+        assert match, part
+        lo, hi = params[int(match["lo"]) - 1], params[int(match["hi"]) - 1]
+        apps = params[int(match["apps"]) - 1] if match["apps"] else None
+        inclusive = match["op"] == "<="
+
+        if match["table"] == "logs":
+            source = [(ts, app, sev, 1) for ts, app, sev in events]
+        else:
+            source = [(b, app, sev, n) for (b, app, sev), n in tables[match["table"]].items()]
+        rows.extend(
+            row for row in source
+            if lo <= row[0] and (row[0] <= hi if inclusive else row[0] < hi)
+            and (apps is None or row[1] in apps)
+        )
+    return rows
+
+
+def counts(repo: StatsRepository, start, end, events, tables, rollups=ROLLUPS, apps=None):
+    params: list = []
+    sql = repo._counts_source(start, end, rollups, apps, params)
+    return evaluate(sql, params, events, tables)
+
+
+def by_severity(rows) -> Counter:
+    totals = Counter()
+    for _, _, sev, n in rows:
+        totals[sev] += n
+    return totals
+
+
+def by_bucket(rows, width: timedelta) -> Counter:
+    """time_bucket(width, ts) with TimescaleDB's default origin."""
+    totals = Counter()
+    for ts, _, sev, n in rows:
+        totals[(BUCKET_ORIGIN + ((ts - BUCKET_ORIGIN) // width) * width, sev)] += n
+    return totals
+
+
+RAW = StatsRepository(use_rollups=False)
+ROLLED = StatsRepository(use_rollups=True)
+
+
+def ranges(rng: random.Random, span: timedelta, count: int, events=()):
+    """Random ranges, ones on and just off bucket edges, and ones ending on a log."""
+    for _ in range(min(count, len(events))):
+        a, b = sorted(rng.sample(events, 2))
+        yield a[0], b[0]
+    yield T0, T0 + span
+    yield T0 + timedelta(hours=1), T0 + timedelta(days=2)
+    yield T0 + timedelta(minutes=1, microseconds=-1), T0 + timedelta(days=1, microseconds=1)
+    yield T0 + timedelta(seconds=10), T0 + timedelta(seconds=50)
+    micros = int(span.total_seconds() * 1_000_000)
+    for _ in range(count):
+        a, b = sorted(rng.randrange(micros) for _ in range(2))
+        yield T0 + timedelta(microseconds=a), T0 + timedelta(microseconds=b)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = random.Random(7)
+    events = make_events(rng, 2000, timedelta(days=4))
+    return events, rollup_tables(events)
+
+
+def test_summary_parity(dataset):
+    events, tables = dataset
+    rng = random.Random(1)
+    for start, end in ranges(rng, timedelta(days=4), 60, events):
+        raw = by_severity(counts(RAW, start, end, events, tables))
+        rolled = by_severity(counts(ROLLED, start, end, events, tables))
+        assert rolled == raw, (start, end)
+
+
+def test_summary_parity_with_app_filter(dataset):
+    events, tables = dataset
+    rng = random.Random(2)
+    for start, end in ranges(rng, timedelta(days=4), 20, events):
+        for apps in (["api"], ["worker", "web"]):
+            raw = counts(RAW, start, end, events, tables, apps=apps)
+            rolled = counts(ROLLED, start, end, events, tables, apps=apps)
+            assert by_severity(rolled) == by_severity(raw), (start, end, apps)
+            assert {row[1] for row in rolled} <= set(apps)
+
+
+@pytest.mark.parametrize(
+    "width",
+    [timedelta(seconds=30), timedelta(minutes=1), timedelta(minutes=5), timedelta(hours=1),
+     timedelta(hours=6), timedelta(days=1), timedelta(days=7)],
+)
+def test_timeseries_parity(dataset, width):
+    events, tables = dataset
+    rollups = [r for r in ROLLUPS if width % r.width == timedelta(0)]
+    rng = random.Random(3)
+    for start, end in ranges(rng, timedelta(days=4), 20, events):
+        raw = by_bucket(counts(RAW, start, end, events, tables, rollups), width)
+        rolled = by_bucket(counts(ROLLED, start, end, events, tables, rollups), width)
+        assert rolled == raw, (start, end, width)
+
+
+def test_partial_edge_buckets_come_from_raw_rows(dataset):
+    events, tables = dataset
+    start, end = T0 + timedelta(minutes=30, seconds=5), T0 + timedelta(hours=5, seconds=59)
+    params: list = []
+    sql = ROLLED._counts_source(start, end, ROLLUPS, None, params)
+    parts = [_PART.search(part)["table"] for part in sql.split("UNION ALL")]
+    assert parts.count("logs") == 2
+    assert "logs_1h" in parts and "logs_1m" in parts and "logs_1d" not in parts
+
+
+# --- Against a migrated TimescaleDB -------------------------------------------
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+db = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL not set")
+DB_APP = "parity-test"
+
+
+@pytest_asyncio.fixture
+async def conn():
+    import asyncpg
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    rng = random.Random(11)
+    end = datetime.now(UTC).replace(microsecond=0)
+    start = end - timedelta(days=3)
+    rows = [
+        (start + timedelta(microseconds=rng.randrange(3 * 86400 * 1_000_000)), f"{DB_APP}-{app}", sev, "m")
+        for _, app, sev in make_events(rng, 3000, timedelta(days=3))
+    ]
+    await conn.execute("DELETE FROM logs WHERE source_app LIKE $1", DB_APP + "-%")
+    await conn.copy_records_to_table(
+        "logs", records=rows, columns=["timestamp", "source_app", "severity", "message"],
+    )
+    # Materialize all but the last hours, so the real-time tail is exercised too
+    for view in ("logs_1m", "logs_1h", "logs_1d"):
+        await conn.execute(
+            "CALL refresh_continuous_aggregate($1, $2, $3)", view, start - timedelta(days=1),
+            end - timedelta(hours=6),
+        )
+    try:
+        yield conn, start, end
+    finally:
+        await conn.execute("DELETE FROM logs WHERE source_app LIKE $1", DB_APP + "-%")
+        await conn.close()
+
+
+@db
+@pytest.mark.asyncio
+async def test_database_summary_parity(conn):
+    conn, start, end = conn
+    rng = random.Random(5)
+    raw, rolled = StatsRepository(conn, use_rollups=False), StatsRepository(conn, use_rollups=True)
+    for lo, hi in [(start, end)] + [
+        tuple(sorted(start + (end - start) * rng.random() for _ in range(2))) for _ in range(20)
+    ]:
+        app = f"{DB_APP}-api"
+        expected = await raw.get_summary(source_app=app, start=lo, end=hi)
+        assert await rolled.get_summary(source_app=app, start=lo, end=hi) == expected, (lo, hi)
+
+        # Other apps may log meanwhile; compare this test's apps only
+        apps = [f"{DB_APP}-{a}" for a in APPS]
+        expected = await raw.get_summaries(source_apps=apps, start=lo, end=hi)
+        assert await rolled.get_summaries(source_apps=apps, start=lo, end=hi) == expected, (lo, hi)
+
+
+@db
+@pytest.mark.asyncio
+@pytest.mark.parametrize("width", [timedelta(minutes=1), timedelta(minutes=15), timedelta(hours=1), timedelta(days=1)])
+async def test_database_timeseries_parity(conn, width):
+    conn, start, end = conn
+    raw, rolled = StatsRepository(conn, use_rollups=False), StatsRepository(conn, use_rollups=True)
+    lo, hi = start + timedelta(seconds=17), end - timedelta(minutes=3, seconds=2)
+    for app in [f"{DB_APP}-{a}" for a in APPS]:
+        expected = await raw.get_timeseries(start=lo, end=hi, bucket_width=width, source_app=app)
+        actual = await rolled.get_timeseries(start=lo, end=hi, bucket_width=width, source_app=app)
+        assert actual == expected, (width, app)
+
+
+@db
+@pytest.mark.asyncio
+async def test_database_late_rows_are_counted_after_refresh(conn):
+    conn, start, end = conn
+    raw, rolled = StatsRepository(conn, use_rollups=False), StatsRepository(conn, use_rollups=True)
+    app = f"{DB_APP}-api"
+    late = start + timedelta(days=1, minutes=7, seconds=3)  # well inside the materialized range
+    await conn.execute(
+        "INSERT INTO logs (timestamp, source_app, severity, message) VALUES ($1, $2, 'error', 'late')",
+        late,
+        app,
+    )
+    before = await rolled.get_summary(source_app=app, start=start, end=end)
+    assert before != await raw.get_summary(source_app=app, start=start, end=end)
+
+    await rolled.refresh_rollups(late, late + timedelta(minutes=1), horizon=start)
+
+    assert await rolled.get_summary(source_app=app, start=start, end=end) == (
+        await raw.get_summary(source_app=app, start=start, end=end)
+    )
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from app.services.stream_aggregates import Aggregator, parse_aggregate
+from app.services.stream_filters import compile_filter
+
+
+def log(app="api", severity="info", pattern_id=None) -> dict:
+    return {"severity": severity, "source": {"app_id": app, "host": "h1"}, "pattern_id": pattern_id}
+
+
+def test_equal_filters_share_a_spec():
+    assert parse_aggregate({"a": 1, "b": 2}, None) == parse_aggregate({"b": 2, "a": 1}, {})
+    assert parse_aggregate({}, {"interval": 10}) != parse_aggregate({}, {})
+
+
+@pytest.mark.parametrize("options", [
+    {"group_by": "message"},
+    {"interval": 0},
+    {"top_patterns": 21},
+    {"window": 5},
+    "severity",
+])
+def test_invalid_options_are_rejected(options):
+    with pytest.raises(ValueError):
+        parse_aggregate({}, options)
+
+
+def test_roll_encodes_window_and_resets():
+    spec = parse_aggregate({}, {"group_by": "source_app", "top_patterns": 1})
+    aggregator = Aggregator(spec=spec, log_filter=compile_filter({}))
+    for entry in [log("api", "error", 7), log("api", "info", 7), log("web", "info", 8), log("web", "fatal")]:
+        aggregator.add(entry)
+
+    payload = json.loads(aggregator.roll())
+    assert payload["total"] == 4
+    assert payload["error_rate"] == 0.5
+    assert payload["counts"] == {"api": 2, "web": 2}
+    assert payload["top_patterns"] == [{"pattern_id": 7, "count": 2}]
+
+    empty = json.loads(aggregator.roll())
+    assert (empty["total"], empty["counts"], empty["error_rate"]) == (0, {}, 0.0)
+    assert empty["window_start"] == payload["window_end"]
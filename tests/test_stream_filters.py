@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from app.services.stream_filters import FilterError, compile_filter
+
+
+def log(**overrides) -> dict:
+    data = {
+        "severity": "error",
+        "message": "payment 42 declined: insufficient funds",
+        "source": {"app_id": "billing", "host": "host-1", "instance_id": "host-1-0"},
+        "trace_id": "abc",
+        "metadata": {"region": "eu", "user": {"tier": "gold"}},
+    }
+    data.update(overrides)
+    return data
+
+
+def test_empty_filter_matches_everything():
+    compiled = compile_filter(None)
+    assert compiled.predicate is None
+    assert compiled.matches(log())
+
+
+def test_indexed_keys_are_left_to_the_index():
+    compiled = compile_filter({"source_app": "billing", "min_severity": "warn"})
+    assert compiled.predicate is None
+    assert compiled.apps == {"billing"}
+    assert compiled.severities == {"warn", "error", "fatal"}
+    assert compiled.matches(log())
+    assert not compiled.matches(log(severity="info"))
+
+
+@pytest.mark.parametrize(
+    ("filters", "expected"),
+    [
+        ({"host": ["host-1", "host-2"]}, True),
+        ({"instance": "host-1-1"}, False),
+        ({"trace_id": "abc"}, True),
+        ({"message": "declined"}, True),
+        ({"message": {"contains": "DECLINED", "ignore_case": True}}, True),
+        ({"message": {"contains": "DECLINED"}}, False),
+        ({"message": {"regex": r"payment \d+ declined"}}, True),
+        ({"message": {"regex": "PAYMENT", "ignore_case": True}}, True),
+        ({"metadata": {"region": "eu", "user.tier": "gold"}}, True),
+        ({"metadata": {"user.tier.level": "gold"}}, False),
+        ({"any": [{"host": "host-9"}, {"trace_id": "abc"}]}, True),
+        ({"all": [{"host": "host-1"}, {"not": {"trace_id": "abc"}}]}, False),
+    ],
+)
+def test_predicates(filters, expected):
+    assert compile_filter(filters).matches(log()) is expected
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        [],
+        {"unknown": 1},
+        {"severity": "loud"},
+        {"host": []},
+        {"message": {"contains": "a", "regex": "b"}},
+        {"message": {"regex": r"(a)\1"}},
+        {"message": {"regex": "(?=a)b"}},
+        {"message": {"regex": "("}},
+        {"message": {"regex": "a" * 513}},
+        {"not": {"not": {"not": {"not": {"not": {"not": {"not": {"not": {"not": {"host": "h"}}}}}}}}}},
+    ],
+)
+def test_invalid_filters_are_rejected(filters):
+    with pytest.raises(FilterError):
+        compile_filter(filters)
+
+
+def test_regex_runs_in_linear_time():
+    compiled = compile_filter({"message": {"regex": "(a+)+$"}})
+    started = time.perf_counter()
+    assert not compiled.matches(log(message="a" * 100_000 + "!"))
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,181 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.log import LogEntry, LogSource
+from app.services import stream_history
+from app.services.stream_filters import compile_filter
+from app.services.stream_history import HistoryRead, StreamHistory, cursor_of, parse_since
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def ms(ts: datetime) -> int:
+    return int(ts.timestamp() * 1000)
+
+
+def entry(i: int, message: str = "ok", app: str = "api", timestamp: datetime | None = None) -> LogEntry:
+    created_at = T0 + timedelta(seconds=i)
+    return LogEntry(
+        id=str(i + 1),
+        timestamp=timestamp or created_at,
+        created_at=created_at,
+        source=LogSource(app_id=app),
+        severity="info",
+        message=message,
+    )
+
+
+class FakeRepository:
+    """LogRepository.get_ingested_range over an in-memory table."""
+
+    def __init__(self, rows: list[LogEntry]):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        return self
+
+    async def get_ingested_range(self, start, end, source_apps=None, severities=None, after=None, limit=1000):
+        self.calls += 1
+        rows = [
+            row for row in self.rows
+            if start <= row.created_at < end
+            and (source_apps is None or row.source.app_id in source_apps)
+            and (after is None or (row.created_at, int(row.id)) > after)
+        ]
+        return rows[:limit]
+
+
+class FakeRedis:
+    """XRANGE over a list of (ms, seq, log) stream entries."""
+
+    def __init__(self, entries: list[tuple[int, int, dict]]):
+        self.entries = [
+            (f"{m}-{s}".encode(), {b"d": json.dumps(log).encode()}) for m, s, log in entries
+        ]
+
+    async def xrange(self, key, start, end, count):
+        if start == "-":
+            low, exclusive = (0, 0), False
+        else:
+            exclusive = start.startswith("(")
+            low = tuple(int(part) for part in start.lstrip("(").split("-"))
+        rows = []
+        for entry_id, fields in self.entries:
+            cursor = tuple(int(part) for part in entry_id.decode().split("-"))
+            if cursor > low or (cursor == low and not exclusive):
+                rows.append((entry_id, fields))
+        return rows[:count]
+
+
+def history(redis_entries=(), max_logs=1000) -> StreamHistory:
+    history = StreamHistory()
+    history._redis = FakeRedis(list(redis_entries))
+    history.max_logs = max_logs
+    history.PAGE_SIZE = 10
+    return history
+
+
+async def read_all(history: StreamHistory, after, filters=None) -> tuple[list[str], HistoryRead]:
+    read = HistoryRead()
+    logs = []
+    async for page in history.read_after(after, compile_filter(filters), read):
+        logs.extend(page)
+    return logs, read
+
+
+def test_parse_since():
+    assert parse_since("1700000000000-3") == (1700000000000, 3)
+    assert parse_since("2024-01-01T00:00:00Z") == (ms(T0), -1)
+    assert parse_since("2024-01-01T00:00:00") == (ms(T0), -1)
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
+
+
+@pytest.mark.asyncio
+async def test_database_gap_is_paged_past_sparse_matches(monkeypatch):
+    # 95 rows, every 20th matches: each 10-row page holds at most one match
+    rows = [entry(i, "needle" if i % 20 == 0 else "hay") for i in range(95)]
+    repo = FakeRepository(rows)
+    monkeypatch.setattr(stream_history, "LogRepository", repo)
+
+    logs, read = await read_all(history(), (ms(T0), -1), {"message": "needle"})
+
+    assert [json.loads(log)["id"] for log in logs] == ["1", "21", "41", "61", "81"]
+    assert not read.truncated
+    assert repo.calls == 10
+
+
+@pytest.mark.asyncio
+async def test_database_gap_reports_truncation_at_max_logs(monkeypatch):
+    monkeypatch.setattr(stream_history, "LogRepository", FakeRepository([entry(i) for i in range(30)]))
+
+    logs, read = await read_all(history(max_logs=25), (ms(T0), -1))
+
+    assert len(logs) == 25
+    assert read.truncated
+
+
+@pytest.mark.asyncio
+async def test_database_gap_then_stream(monkeypatch):
+    monkeypatch.setattr(stream_history, "LogRepository", FakeRepository([entry(i) for i in range(5)]))
+    stream_start = ms(T0 + timedelta(seconds=5))
+    redis_entries = [(stream_start + i, 0, {"id": str(100 + i), "message": "live"}) for i in range(3)]
+
+    logs, read = await read_all(history(redis_entries), (ms(T0), -1))
+
+    assert [json.loads(log)["id"] for log in logs] == ["1", "2", "3", "4", "5", "100", "101", "102"]
+    assert cursor_of(logs[-1]) == (stream_start + 2, 0)
+    assert not read.truncated
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_cursor():
+    redis_entries = [(1000 + i, 0, {"id": str(i), "message": "live"}) for i in range(5)]
+
+    logs, read = await read_all(history(redis_entries), (1002, 0))
+
+    assert [json.loads(log)["id"] for log in logs] == ["3", "4"]
+    assert not read.truncated
+
+
+@pytest.mark.asyncio
+async def test_database_gap_is_keyed_on_ingest_time(monkeypatch):
+    # Client timestamps far in the past or future must not move logs out of the gap
+    rows = [
+        entry(0, timestamp=T0 - timedelta(days=30)),
+        entry(1, timestamp=T0 + timedelta(days=30)),
+        entry(2),
+    ]
+    monkeypatch.setattr(stream_history, "LogRepository", FakeRepository(rows))
+
+    logs, _ = await read_all(history(), (ms(T0), -1))
+
+    assert [json.loads(log)["id"] for log in logs] == ["1", "2", "3"]
+    assert [cursor_of(log) for log in logs] == [(ms(T0) + i * 1000, 0) for i in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_database_cursor_resumes_after_its_millisecond(monkeypatch):
+    monkeypatch.setattr(stream_history, "LogRepository", FakeRepository([entry(i) for i in range(3)]))
+
+    logs, _ = await read_all(history(), (ms(T0), 0))
+
+    assert [json.loads(log)["id"] for log in logs] == ["2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_log_in_database_and_stream_is_sent_once(monkeypatch):
+    # Log 3 was stored before the oldest stream entry's time but published after it
+    monkeypatch.setattr(stream_history, "LogRepository", FakeRepository([entry(i) for i in range(3)]))
+    stream_start = ms(T0 + timedelta(seconds=2, milliseconds=500))
+    redis_entries = [
+        (stream_start, 0, {"id": "4", "message": "ok"}),
+        (stream_start + 1, 0, {"id": "3", "message": "ok"}),
+    ]
+
+    logs, _ = await read_all(history(redis_entries), (ms(T0), -1))
+
+    assert [json.loads(log)["id"] for log in logs] == ["1", "2", "3", "4"]
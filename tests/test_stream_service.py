@@ -0,0 +1,346 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.stream_service import StreamService
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent: list[str] = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        self.sent.append(frame)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = True
+
+
+async def make_service(websocket, session_id="s1") -> StreamService:
+    service = StreamService()
+
+    async def no_channels():
+        pass
+
+    service._update_channels = no_channels
+    await service.connect(websocket, session_id)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_report_task_stops_with_last_throttled_subscription():
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "a", {}, sample=0.5)
+    await service.subscribe("s1", "b", {}, max_rate=10)
+    task = service._report_task
+    assert task is not None
+
+    await service.unsubscribe("s1", "a")
+    assert service._report_task is task
+    await service.unsubscribe("s1", "b")
+    assert service._report_task is None
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    await service.disconnect("s1")
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_applies_per_frame():
+    websocket = FakeWebSocket(delay=0.02)
+    service = await make_service(websocket)
+    service.send_timeout = 0.05
+    for i in range(10):
+        await service.send("s1", {"n": i})
+    await asyncio.sleep(0.5)
+    # Ten frames take longer than one timeout, but no single send does
+    assert len(websocket.sent) == 10
+    assert "s1" in service.connections
+    await service.disconnect("s1")
+
+
+@pytest.mark.asyncio
+async def test_stalled_send_disconnects():
+    service = await make_service(FakeWebSocket(delay=1.0))
+    service.send_timeout = 0.05
+    await service.send("s1", {"n": 1})
+    await asyncio.sleep(0.2)
+    assert "s1" not in service.connections
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_close_task_is_kept():
+    websocket = FakeWebSocket(delay=1.0)
+    service = await make_service(websocket)
+    service.queue_size = 1
+    await service.subscribe("s1", "a", {}, overflow="disconnect")
+    conn = service.connections["s1"]
+    sub = conn.subscriptions["a"]
+    service._enqueue(conn, sub, "{}", 1)
+    service._enqueue(conn, sub, "{}", 1)
+    assert len(service._background) == 1
+    await asyncio.sleep(0.05)
+    assert not service._background
+    assert websocket.closed
+
+
+async def stalled_connection(service: StreamService):
+    """Stop the writer so queued frames stay put."""
+    conn = service.connections["s1"]
+    conn.writer_task.cancel()
+    await asyncio.sleep(0)
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_drops_new_frame_when_only_control_frames_are_queued():
+    service = await make_service(FakeWebSocket())
+    service.queue_size = 2
+    await service.subscribe("s1", "a", {}, overflow="drop_oldest")
+    conn = await stalled_connection(service)
+    sub = conn.subscriptions["a"]
+    await service.send("s1", {"type": "pong"})
+    await service.send("s1", {"type": "pong"})
+
+    service._enqueue(conn, sub, "log", 1)
+
+    assert [s for s, _, _ in conn.queue] == [None, None]
+    assert sub.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_only_evicts_drop_oldest_frames():
+    service = await make_service(FakeWebSocket())
+    service.queue_size = 2
+    await service.subscribe("s1", "keep", {}, overflow="drop_newest")
+    await service.subscribe("s1", "old", {}, overflow="drop_oldest")
+    conn = await stalled_connection(service)
+    keep, old = conn.subscriptions["keep"], conn.subscriptions["old"]
+
+    service._enqueue(conn, keep, "k1", 1)
+    service._enqueue(conn, old, "o1", 1)
+    service._enqueue(conn, old, "o2", 1)
+
+    assert [frame for _, frame, _ in conn.queue] == ["k1", "o2"]
+    assert (keep.dropped, old.dropped) == (0, 1)
+
+
+def log(app="api", severity="error", message="boom") -> dict:
+    return {"severity": severity, "message": message, "source": {"app_id": app, "host": "h1"}}
+
+
+@pytest.mark.asyncio
+async def test_logs_reach_only_matching_subscriptions():
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "api", {"source_app": "api"})
+    await service.subscribe("s1", "errors", {"min_severity": "error", "message": "boom"})
+    conn = await stalled_connection(service)
+
+    await service._broadcast_to_local(log("api", "info"))
+    await service._broadcast_to_local(log("web", "fatal"))
+    await service._broadcast_to_local(log("web", "error", message="fine"))
+    await service._broadcast_to_local(log("api", "error"))
+
+    delivered = [(json.loads(frame)["subscription_id"], json.loads(frame)["data"]["source"]["app_id"])
+                 for _, frame, _ in conn.queue]
+    assert delivered == [("api", "api"), ("errors", "web"), ("api", "api"), ("errors", "api")]
+
+    await service.unsubscribe("s1", "api")
+    conn.queue.clear()
+    await service._broadcast_to_local(log("api", "info"))
+    assert not conn.queue
+
+
+@pytest.mark.asyncio
+async def test_batches_flush_at_max_logs_and_max_ms():
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "b", {}, batch={"max_logs": 3, "max_ms": 20})
+    conn = await stalled_connection(service)
+
+    for i in range(4):
+        await service._broadcast_to_local(log(message=f"m{i}"))
+    [(_, frame, count)] = conn.queue
+    assert count == 3
+    assert [entry["message"] for entry in json.loads(frame)["data"]] == ["m0", "m1", "m2"]
+
+    await asyncio.sleep(0.05)
+    assert [count for _, _, count in conn.queue] == [3, 1]
+    assert json.loads(conn.queue[1][1]) == {"type": "logs", "subscription_id": "b", "data": [log(message="m3")]}
+
+
+@pytest.mark.asyncio
+async def test_each_log_is_encoded_once_for_all_subscribers(monkeypatch):
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "a", {})
+    await service.subscribe("s1", "b", {}, batch={"max_logs": 1})
+    conn = await stalled_connection(service)
+    encoded = []
+    real_dumps = json.dumps
+
+    def dumps(obj, **kwargs):
+        encoded.append(obj)
+        return real_dumps(obj, **kwargs)
+
+    monkeypatch.setattr(json, "dumps", dumps)
+    await service._broadcast_to_local(log())
+    monkeypatch.undo()
+
+    assert len(encoded) == 1
+    assert [json.loads(frame)["type"] for _, frame, _ in conn.queue] == ["log", "logs"]
+
+
+@pytest.mark.asyncio
+async def test_pause_buffer_evicts_oldest_past_its_byte_cap():
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "p", {})
+    conn = await stalled_connection(service)
+    size = len(json.dumps(log(message="m0")))
+    service.pause_buffer_bytes = size * 3
+    await service.pause("s1", "p")
+
+    for i in range(5):
+        await service._broadcast_to_local(log(message=f"m{i}"))
+    sub = conn.subscriptions["p"]
+    assert not conn.queue
+    assert (len(sub.paused_buffer), sub.paused_bytes, sub.paused_dropped) == (3, size * 3, 2)
+    assert service.paused_bytes_total == size * 3
+
+    assert await service.resume("s1", "p") == {"replayed": 3, "dropped": 2}
+    [(_, frame, count)] = conn.queue
+    assert count == 3
+    assert [entry["message"] for entry in json.loads(frame)["data"]] == ["m2", "m3", "m4"]
+    assert service.paused_bytes_total == 0
+
+
+@pytest.mark.asyncio
+async def test_pause_buffers_share_the_process_cap():
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "a", {})
+    await service.subscribe("s1", "b", {})
+    conn = await stalled_connection(service)
+    size = len(json.dumps(log()))
+    service.pause_total_bytes = size * 2
+    await service.pause("s1", "a")
+    await service._broadcast_to_local(log())
+    await service._broadcast_to_local(log())
+    await service.pause("s1", "b")
+    await service._broadcast_to_local(log())
+
+    a, b = conn.subscriptions["a"], conn.subscriptions["b"]
+    # a's buffer fills the process cap: a evicts its own oldest, b gets nothing
+    assert (len(a.paused_buffer), a.paused_dropped) == (2, 1)
+    assert (len(b.paused_buffer), b.paused_dropped) == (0, 1)
+
+    await service.unsubscribe("s1", "a")
+    assert service.paused_bytes_total == 0
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels: set[str] = set()
+        self.patterns: set[str] = set()
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def psubscribe(self, pattern):
+        self.patterns.add(pattern)
+
+    async def punsubscribe(self, pattern):
+        self.patterns.discard(pattern)
+
+
+@pytest.mark.asyncio
+async def test_shard_subscriptions_follow_interest_refcounts():
+    service = StreamService()
+    service._pubsub = pubsub = FakePubSub()
+    await service.connect(FakeWebSocket(), "s1")
+    api = service._channel(service._shard("api"))
+
+    await service.subscribe("s1", "a", {"source_app": "api"})
+    await service.subscribe("s1", "b", {"source_app": ["api", "web"]})
+    assert pubsub.channels == {api, service._channel(service._shard("web"))}
+    assert service._shard_refs[service._shard("api")] == 2
+
+    await service.unsubscribe("s1", "b")
+    assert pubsub.channels == {api}
+
+    # A subscription without source_app switches to the pattern, keeping shard counts
+    await service.subscribe("s1", "all", {})
+    assert (pubsub.patterns, pubsub.channels) == ({"strym:logs:*"}, set())
+    await service.unsubscribe("s1", "all")
+    assert (pubsub.patterns, pubsub.channels) == (set(), {api})
+
+    await service.disconnect("s1")
+    assert (pubsub.patterns, pubsub.channels) == (set(), set())
+    assert not service._shard_refs
+
+
+@pytest.mark.asyncio
+async def test_identical_aggregate_subscriptions_share_one_aggregator():
+    service = await make_service(FakeWebSocket())
+    await service.connect(FakeWebSocket(), "s2")
+    spec = await service.subscribe_aggregate("s1", "a", {"source_app": "api"}, {"interval": 1})
+    assert await service.subscribe_aggregate("s2", "a", {"source_app": "api"}, {"interval": 1}) == spec
+    aggregator = service._aggregators[spec]
+
+    await service._broadcast_to_local(log("api"))
+    await service._broadcast_to_local(log("web"))
+    assert aggregator.total == 1
+
+    await service.disconnect("s1")
+    assert service._aggregators == {spec: aggregator}
+    await service.unsubscribe("s2", "a")
+    assert not service._aggregators
+    await asyncio.sleep(0)
+    assert aggregator.task.cancelled()
+    await service.disconnect("s2")
+
+
+@pytest.mark.asyncio
+async def test_max_rate_caps_delivery_and_counts_suppressed():
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "r", {}, max_rate=3)
+    await service.subscribe("s1", "all", {})
+    conn = await stalled_connection(service)
+
+    for _ in range(10):
+        await service._broadcast_to_local(log())
+
+    delivered = [json.loads(frame)["subscription_id"] for _, frame, _ in conn.queue]
+    assert delivered.count("r") == 3
+    assert delivered.count("all") == 10
+    assert conn.subscriptions["r"].rate_limited == 7
+
+
+@pytest.mark.asyncio
+async def test_sample_keeps_a_fraction(monkeypatch):
+    service = await make_service(FakeWebSocket())
+    await service.subscribe("s1", "s", {}, sample=0.25)
+    conn = await stalled_connection(service)
+    draws = iter([0.1, 0.3, 0.2, 0.9])
+    monkeypatch.setattr("app.services.stream_service.random.random", lambda: next(draws))
+
+    for _ in range(4):
+        await service._broadcast_to_local(log())
+
+    assert len(conn.queue) == 2
+    assert conn.subscriptions["s"].sampled_out == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limits", [{"max_rate": -1}, {"max_rate": 10**9}, {"sample": 0}, {"sample": 1.5}, {"sample": "x"}])
+async def test_invalid_limits_are_rejected(limits):
+    service = await make_service(FakeWebSocket())
+    with pytest.raises(ValueError):
+        await service.subscribe("s1", "x", {}, **limits)
+    await service.disconnect("s1")
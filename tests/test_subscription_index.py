@@ -0,0 +1,38 @@
+from app.services.subscription_index import SubscriptionIndex, indexed_values
+
+
+def test_min_severity_folds_into_severity_set():
+    assert indexed_values({"source_app": "api", "min_severity": "error"}) == (
+        frozenset({"api"}), frozenset({"error", "fatal"}),
+    )
+    assert indexed_values({"severity": ["info", "error"], "min_severity": "warn"}) == (
+        None, frozenset({"error"}),
+    )
+    assert indexed_values({}) == (None, None)
+
+
+def test_match_probes_specific_and_wildcard_buckets():
+    index = SubscriptionIndex()
+    index.add("api-errors", "api-errors", frozenset({"api"}), frozenset({"error"}))
+    index.add("api", "api", frozenset({"api", "web"}), None)
+    index.add("errors", "errors", None, frozenset({"error", "fatal"}))
+    index.add("all", "all", None, None)
+
+    assert sorted(index.match("api", "error")) == ["all", "api", "api-errors", "errors"]
+    assert sorted(index.match("web", "info")) == ["all", "api"]
+    assert sorted(index.match("worker", "fatal")) == ["all", "errors"]
+    assert index.match(None, None) == ["all"]
+
+
+def test_add_replaces_and_remove_empties_buckets():
+    index = SubscriptionIndex()
+    index.add("s", 1, frozenset({"api"}), None)
+    index.add("s", 2, frozenset({"web"}), None)
+    assert index.match("api", "info") == []
+    assert index.match("web", "info") == [2]
+    assert len(index) == 1
+
+    index.remove("s")
+    index.remove("s")
+    assert len(index) == 0
+    assert not index._buckets
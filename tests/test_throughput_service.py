@@ -0,0 +1,73 @@
+import pytest
+
+from app.services import throughput_service as module
+from app.services.throughput_service import ThroughputService
+
+MINUTE = 1_700_000_040  # a whole minute, long closed
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes: dict[bytes, dict[bytes, bytes]] = {}
+        self.pending: dict[bytes, int] = {}
+
+    async def zrangebyscore(self, key, low, high):
+        return [k for k, score in self.pending.items() if score <= high]
+
+    async def zrem(self, key, member):
+        return self.pending.pop(member, None) is not None
+
+    async def zadd(self, key, mapping):
+        self.pending.update(mapping)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class FakeRepository:
+    saved: list = []
+    fail = False
+
+    async def save_minute(self, app, bucket, sketch):
+        if FakeRepository.fail:
+            raise ConnectionError("database down")
+        FakeRepository.saved.append((app, bucket, sketch.count))
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(module, "RateSketchRepository", FakeRepository)
+    FakeRepository.saved, FakeRepository.fail = [], False
+    service = ThroughputService()
+    service._redis = FakeRedis()
+    key = f"{service.PREFIX}api:{MINUTE}".encode()
+    service._redis.hashes[key] = {b"0": b"3", b"59": b"4"}
+    service._redis.pending[key] = MINUTE
+    return service, key
+
+
+@pytest.mark.asyncio
+async def test_fold_saves_then_deletes_counts(service):
+    service, key = service
+    await service._fold_closed_minutes()
+    assert [(app, count) for app, _, count in FakeRepository.saved] == [("api", 60)]
+    assert key not in service._redis.hashes
+    assert not service._redis.pending
+
+
+@pytest.mark.asyncio
+async def test_failed_save_keeps_minute_for_retry(service):
+    service, key = service
+    FakeRepository.fail = True
+    with pytest.raises(ConnectionError):
+        await service._fold_closed_minutes()
+    assert service._redis.pending == {key: MINUTE}
+    assert key in service._redis.hashes
+
+    FakeRepository.fail = False
+    await service._fold_closed_minutes()
+    assert len(FakeRepository.saved) == 1
+    assert key not in service._redis.hashes
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.time_buckets import as_utc, ceil_time, floor_time, plan_segments
+from app.repositories.stats_repository import ROLLUPS
+
+UTC = timezone.utc
+
+
+def test_as_utc_reads_naive_as_utc():
+    assert as_utc(datetime(2024, 1, 1)) == datetime(2024, 1, 1, tzinfo=UTC)
+    assert as_utc(None) is None
+    aware = datetime(2024, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+    assert as_utc(aware) is aware
+
+
+def test_floor_and_ceil_align_to_epoch():
+    ts = datetime(2024, 1, 1, 10, 7, 30, tzinfo=UTC)
+    assert floor_time(ts, timedelta(minutes=5)) == datetime(2024, 1, 1, 10, 5, tzinfo=UTC)
+    assert ceil_time(ts, timedelta(minutes=5)) == datetime(2024, 1, 1, 10, 10, tzinfo=UTC)
+    aligned = datetime(2024, 1, 1, 10, tzinfo=UTC)
+    assert ceil_time(aligned, timedelta(hours=1)) == aligned
+
+
+def test_naive_request_times_plan_like_utc():
+    start, end = as_utc(datetime(2024, 1, 1, 0, 0, 30)), as_utc(datetime(2024, 1, 3, 12))
+    segments = plan_segments(start, end, ROLLUPS)
+    assert segments[-1].end == end